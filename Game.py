@@ -1,8 +1,23 @@
 
+import functools
+import time
 from settings import *
-from sprites import Player, Platform, Collectible, Goal
-from levels import LEVELS, MAX_LEVELS
-from ui import Button, draw_text
+from sprites import Player, TickPhysics, Platform, MovingPlatform, Collectible, Goal, AnimationClock, load_scaled, build_player_animation
+from levelpack import get_level_pack
+from ui import Button, draw_text, get_glyph_atlas, BOOST_GLYPHS
+from collision import SpatialHash, SweepAndPrune
+from inputs import KeyboardInput
+from render import DirtyRectRenderer, blit_counter
+from profiler import FrameProfiler
+from snapshot import LevelTemplate, LevelTemplateCache, GameSnapshot
+from replay import ReplayRecorder
+from ghost import GhostStore, GhostRecorder, draw_ghost
+from leaderboard import Leaderboard
+from asset_cache import AssetCache
+from asset_loader import AssetLoader
+from atlas import TextureAtlas
+from world import Camera, StreamedWorld
+from tracing import log, traced, TRACER
 def format_time(total_seconds):
     """Formats time in seconds to MM:SS:ms"""
     # Check for infinity OR None (safer initial state)
@@ -13,13 +28,25 @@ def format_time(total_seconds):
     minutes = int(total_seconds // 60)
     return f"{minutes:02}:{seconds:02}:{milliseconds:03}"
 class Game:
-    def __init__(self):
+    def __init__(self, headless=False, input_source=None):
+        """
+        Args:
+            headless (bool): Run on SDL's dummy video/audio drivers and never flip the display
+                (benchmarks, replay verification, bots).
+            input_source: Object with next_tick()/handle_event()/reset() supplying per-tick INPUT_* bits.
+                Defaults to the live keyboard.
+        """
+        self.headless = headless
+        self.startup_time = time.perf_counter()  # For the time-to-first-frame log
+        if headless:  # Must be set before SDL initialises its subsystems
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'; os.environ['SDL_AUDIODRIVER'] = 'dummy'
+        self.input_source = input_source if input_source is not None else KeyboardInput()
         pygame.mixer.pre_init(44100, -16, 2, 512);
         pygame.init();
         pygame.mixer.init()
         self.current_screen_width = SCREEN_WIDTH;
         self.current_screen_height = SCREEN_HEIGHT
-        self.screen_flags = pygame.RESIZABLE | pygame.SCALED
+        self.screen_flags = 0 if headless else pygame.RESIZABLE | pygame.SCALED
         self.screen = pygame.display.set_mode((self.current_screen_width, self.current_screen_height),
                                               self.screen_flags)
         pygame.display.set_caption(TITLE);
@@ -27,29 +54,60 @@ class Game:
         self.running = True;
         self.fullscreen = False
 
+        # --- Fixed-Timestep Simulation Clock ---
+        self.set_tick_rate(PHYSICS_TICK_RATE)  # tick_rate/tick_dt: physics ticks per second, seconds per tick
+        self.dt = 0.0  # Real time of the last rendered frame
+        self.accumulator = 0.0  # Real time not yet consumed by physics ticks
+        self.alpha = 1.0  # Fraction of a tick to interpolate the player by when drawing
+        self.sim_time_ms = 0.0  # Simulated milliseconds; drives power-up timing
+        self.dirty_renderer = DirtyRectRenderer() if DIRTY_RECT_RENDERING else None
+        self.profiler = FrameProfiler()  # F3 overlay; timings are recorded by run()
+        self.focused = True  # Window has input focus (unfocused frames are capped at BACKGROUND_FPS)
+        self.still_frame = None  # Menu/end screen without its buttons, composed once per visit
+        self.still_key = None  # (state, button hover states) last presented; None forces a recompose
+        self.end_overlay = None  # Translucent dimmer over the level on end screens
+        self.replay_recorder = ReplayRecorder() if RECORD_REPLAYS and not headless else None
+        self.ghost_store = GhostStore() if GHOST_ENABLED and not headless else None
+        self.ghost_recorder = GhostRecorder() if self.ghost_store is not None else None
+        self.ghost = None  # Best run of the current level, if one is stored
+
         # --- Timer and High Score Variables ---
         self.level_elapsed_time = 0.0
         self.total_game_time = 0.0  # Accumulates *successfully completed* level times
         self.final_time = None  # Set only upon winning the *entire* game
         self.timer_active = False
-        self.high_score = self.load_highscore()  # Load best time initially
+        self.leaderboard = Leaderboard() if not headless else None  # Every finished run, with per-level splits
+        self.high_score = self.load_highscore()  # Load best time initially (kept in memory afterwards)
         # ------------------------------------
         self.coins_for_powerup_count = 0
         self.powerup_active = False
         self.powerup_end_time = 0
         # -----------------------------
+        self.level_pack = get_level_pack()  # Compiled levels.py, read one level at a time
+        self.level_templates = LevelTemplateCache()  # Prebuilt levels survive returns to the menu
+        self.level_start_snapshot = None  # State right after the current level loaded (restart target)
+        self.asset_cache = AssetCache()  # Pre-scaled frames from earlier launches
         self.load_assets();
-        self.setup_game_variables()  # Initial setup
+        self.setup_game_variables()  # Initial setup (creates the Player, which loads its frames)
+        if self.asset_cache.save(): log.info("Asset cache updated (%d rebuilt): %s", self.asset_cache.misses, ASSET_CACHE_FILE)
 
     def setup_game_variables(self):
         """Initialize/Reset game state variables for a new game session from menu."""
         self.game_state = STATE_MENU
         self.current_level_index = 0
+        self.level_ticks = 0  # Physics ticks into the current attempt (ghost playback position)
         self.score = 0
         self.all_sprites = pygame.sprite.Group();
         self.platforms = pygame.sprite.Group();
         self.collectibles = pygame.sprite.Group();
         self.goal_group = pygame.sprite.GroupSingle()
+        self.platform_grid = None  # Broadphase over self.platforms, from the level template
+        self.level_layer = None  # Background + platforms pre-composited, from the level template
+        self.movers = []  # The level's MovingPlatforms, advanced every tick (from the level template)
+        self.mover_broadphase = None  # SweepAndPrune over self.movers, None when the level has none
+        self.world = None  # Chunk streamer for levels bigger than the screen, from the level template
+        self.camera = Camera()  # Fixed at (0, 0) unless the level scrolls
+        self.level_start_snapshot = None
         if not hasattr(self, 'player'):  # Create player only once
             self.player = Player(self)
         else:
@@ -60,6 +118,7 @@ class Game:
         self.level_elapsed_time = 0.0
         self.total_game_time = 0.0
         self.final_time = None  # Reset final time
+        self.level_splits = []  # Time of each completed level this run, in order
         self.timer_active = False
         # --- High score is NOT reset here ---
 
@@ -78,7 +137,7 @@ class Game:
         self.exit_button = Button(btn_center_x, 500, "Exit", RED, self.button_font, self.button_img_normal,
                                   self.button_img_hover)
         self.menu_buttons = [self.play_button, self.controls_button, self.exit_button]
-        self.back_button = Button(btn_center_x, SCREEN_HEIGHT - 100, "Back", BUTTON_TEXT_COLOR, self.button_font,
+        self.back_button = Button(btn_center_x, SCREEN_HEIGHT - 80, "Back", BUTTON_TEXT_COLOR, self.button_font,
                                   self.button_img_normal, self.button_img_hover)
         self.next_level_button = Button(btn_center_x, SCREEN_HEIGHT // 2 + 50, "Next Level", BUTTON_TEXT_COLOR,
                                         self.button_font, self.button_img_normal, self.button_img_hover)
@@ -86,81 +145,18 @@ class Game:
                                            self.button_font, self.button_img_normal, self.button_img_hover)
         self.main_menu_button = Button(btn_center_x, SCREEN_HEIGHT // 2 + 140, "Main Menu", BUTTON_TEXT_COLOR,
                                        self.button_font, self.button_img_normal, self.button_img_hover)
-        self.win_main_menu_button = Button(btn_center_x, SCREEN_HEIGHT // 2 + 100, "Main Menu", BUTTON_TEXT_COLOR,
+        self.win_main_menu_button = Button(btn_center_x, SCREEN_HEIGHT // 2 + 120, "Main Menu", BUTTON_TEXT_COLOR,
                                            self.button_font, self.button_img_normal, self.button_img_hover)
 
         # main.py -> Game class
 
     def load_highscore(self):
-        """Loads the high score from the file, creating/fixing it if necessary."""
-        score = float('inf')  # Default to infinity (means no valid score yet)
-        filepath = HIGHSCORE_FILE
-        try:
-            # Create file with 'inf' if it doesn't exist
-            if not os.path.exists(filepath):
-                try:
-                    with open(filepath, 'w') as f:
-                        f.write(str(float('inf')))
-                    print(f"Created high score file: {filepath}")
-                except IOError as e_create:
-                    print(f"ERROR: Could not create HS file: {e_create}");
-                    return score
-
-            # Read the file
-            with open(filepath, 'r') as f:
-                score_str = f.read().strip()
-                if score_str:
-                    try:
-                        loaded_score = float(score_str)
-                        # Treat 0.0 or less as invalid/no score yet, same as infinity
-                        if loaded_score <= 0:
-                            print(
-                                f"Warning: Found score <= 0 ({loaded_score}) in {filepath}. Treating as no score yet.")
-                            score = float('inf')
-                            # Optionally fix the file now
-                            # try:
-                            #     with open(filepath, 'w') as f_fix: f_fix.write(str(float('inf')))
-                            # except IOError: pass
-                        else:
-                            score = loaded_score  # Use the valid loaded score
-                        print(f"Loaded high score: {format_time(score)} ({score})")
-                    except ValueError:
-                        print(f"ERROR: Invalid content '{score_str}' in {filepath}. Resetting.")
-                        score = float('inf')
-                        try:  # Attempt to fix the file
-                            with open(filepath, 'w') as f_fix:
-                                f_fix.write(str(float('inf')))
-                        except IOError:
-                            pass
-                else:  # File was empty
-                    print(f"Warning: High score file {filepath} empty. Resetting.")
-                    score = float('inf')
-                    try:  # Attempt to fix the file
-                        with open(filepath, 'w') as f_fix:
-                            f_fix.write(str(float('inf')))
-                    except IOError:
-                        pass
-        except IOError as e_read:
-            print(f"ERROR: Could not read HS file {filepath}: {e_read}");
-            score = float('inf')
-        except Exception as e:
-            print(f"Unexpected error loading HS: {e}");
-            score = float('inf')
+        """Best total time from the leaderboard (migrated from highscore.txt on first run), inf if none."""
+        if self.leaderboard is None: return float('inf')
+        score = self.leaderboard.best_total_time()
+        log.info("Loaded high score: %s (%s)", format_time(score), score)
         return score
 
-    def save_highscore(self):
-        """Saves the current valid high score to the file."""
-        # Only save if high_score is a valid number (not infinity)
-        if self.high_score != float('inf') and isinstance(self.high_score, (int, float)):
-            try:
-                with open(HIGHSCORE_FILE, 'w') as f:
-                    f.write(str(self.high_score))  # Save the current best score
-                    print(f"Saved new high score: {format_time(self.high_score)} ({self.high_score})")
-            except IOError as e:
-                print(f"ERROR: Could not save high score to {HIGHSCORE_FILE}: {e}")
-        else:
-            print("Skipping save: High score is still infinity or invalid.")
-
     def load_level(self, level_index):
         """Load sprites and player position, but DO NOT reset level timer here."""
         # Clear groups
@@ -168,26 +164,114 @@ class Game:
         self.platforms.empty();
         self.collectibles.empty();
         self.goal_group.empty()
-        if level_index < 0 or level_index >= MAX_LEVELS: print(
+        if level_index < 0 or level_index >= len(self.level_pack): print(
             f"Invalid level index {level_index}"); self.game_state = STATE_MENU; return
-        level_data = LEVELS[level_index]
-        # Load level elements
-        for p_data in level_data['platforms']: platform = Platform(self, *p_data); self.all_sprites.add(
-            platform); self.platforms.add(platform)
-        for c_data in level_data['collectibles']: collectible = Collectible(self.collectible_frames,
-                                                                            *c_data); self.all_sprites.add(
-            collectible); self.collectibles.add(collectible)
-        goal = Goal(self, *level_data['goal']);
-        self.all_sprites.add(goal);
-        self.goal_group.add(goal)
+        template = self.level_templates.get(level_index)
+        if template is None:
+            template = self.build_level_template(level_index); self.level_templates.put(template)
+        # Load level elements (prebuilt sprites, no surfaces are created here)
+        self.world = template.world
+        if self.world is None:
+            self.platforms.add(template.platforms); self.collectibles.add(template.collectibles)
+            self.all_sprites.add(template.platforms, template.collectibles)
+            self.camera = Camera()
+        else:  # Only the chunks around the start are loaded; update() streams the rest in as the camera moves
+            self.world.reset()
+            self.camera = Camera(self.world.width, self.world.height)
+            self.camera.follow(*template.player_start); self.world.stream(self.camera.rect)
+        self.goal_group.add(template.goal); self.all_sprites.add(template.goal)
+        self.platform_grid = template.platform_grid
+        self.level_layer = template.level_layer
+        self.movers = template.movers; self.mover_broadphase = template.mover_broadphase
+        for mover in self.movers: mover.reset()
+        if self.mover_broadphase is not None: self.mover_broadphase.update()
         # Reset player state for the new level
-        self.player.reset(*level_data['player_start'])
+        self.player.reset(*template.player_start)
+        self.follow_player()
+        self.input_source.reset()  # Drop jump presses queued before the (re)load
+        if self.replay_recorder is not None: self.replay_recorder.discard()  # Next tick starts a new recording
+        if self.ghost_recorder is not None: self.ghost_recorder.discard()
+        self.ghost = self.ghost_store.get(level_index) if self.ghost_store is not None else None
+        self.level_ticks = 0
         # Add player to sprite group for drawing if not drawing manually (we are, so skip)
         # self.all_sprites.add(self.player)
         self.score = 0;
+        self.level_start_snapshot = self.snapshot_state()
         # --- DO NOT reset level_elapsed_time or set timer_active here ---
-        print(f"Level {level_index + 1} loaded. Total time before this level: {self.total_game_time:.3f}s")
-        print(f"Level {level_index + 1} loaded. Coins towards powerup: {self.coins_for_powerup_count}, Active: {self.powerup_active}")
+        log.info("Level %d loaded. Total time before this level: %.3fs", level_index + 1, self.total_game_time)
+        log.debug("Level %d loaded. Coins towards powerup: %d, Active: %s", level_index + 1, self.coins_for_powerup_count, self.powerup_active)
+    def build_level_template(self, level_index):
+        """Build a level's sprites, spatial hash and static layer from the level pack (done once per cached level)."""
+        level = self.level_pack.level(level_index)  # Reads only this level's arrays
+        goal = Goal(self, *level.goal)
+        movers = [MovingPlatform(self, index, *m_data) for index, m_data in enumerate(level.movers())]
+        mover_broadphase = SweepAndPrune(movers) if movers else None
+        if level.world_size is not None:  # Scrolls: sprites are made per chunk as the world streams
+            world = StreamedWorld(self, level)
+            return LevelTemplate(level_index, [], [], goal, world.grid, None, level.player_start, world,
+                                 movers, mover_broadphase)
+        platforms = [Platform(self, *p_data) for p_data in level.platforms()]
+        collectibles = [Collectible(self.collectible_frames, *c_data, clock=self.coin_clock) for c_data in level.collectibles()]
+        platform_grid = SpatialHash()
+        for platform in platforms: platform_grid.insert(platform)
+        return LevelTemplate(level_index, platforms, collectibles, goal, platform_grid,
+                             self.build_level_layer(platforms), level.player_start, None, movers, mover_broadphase)
+
+    def build_level_layer(self, platforms):
+        """Composite the background and all (static) platforms into one screen-sized surface."""
+        level_layer = self.background_img.copy()
+        for platform in platforms: level_layer.blit(platform.image, platform.rect)
+        return level_layer
+
+    def snapshot_state(self):
+        """Cheap copy of the current attempt's state (player, remaining coins, timers, power-up)."""
+        return GameSnapshot(self)
+
+    def restore_state(self, snapshot):
+        """Return to a snapshot of the current level. Only collected coins are re-added; nothing is rebuilt."""
+        self.level_ticks = snapshot.level_ticks
+        for mover, state in zip(self.movers, snapshot.movers): mover.set_state(state)
+        if self.mover_broadphase is not None: self.mover_broadphase.update()
+        self.player.set_state(snapshot.player_state)
+        if self.world is not None:
+            self.world.restore(snapshot.world_collected); self.follow_player()
+        elif self.collectibles.sprites() != snapshot.collectibles:  # Snapshots may come from another timeline
+            for coin in self.collectibles.sprites(): coin.kill()
+            self.collectibles.add(snapshot.collectibles); self.all_sprites.add(snapshot.collectibles)
+        self.score = snapshot.score
+        self.level_elapsed_time = snapshot.level_elapsed_time; self.timer_active = snapshot.timer_active
+        self.sim_time_ms = snapshot.sim_time_ms
+        self.coins_for_powerup_count = snapshot.coins_for_powerup_count
+        self.powerup_active = snapshot.powerup_active; self.powerup_end_time = snapshot.powerup_end_time
+
+    def follow_player(self):
+        """Moves the camera to the player and streams in the chunks around it (no-op on single-screen levels)."""
+        if self.world is None: return
+        self.camera.follow(*self.player.rect.center)
+        self.world.stream(self.camera.rect)
+
+    def restart_level(self):
+        """Instant restart of the current level from its start snapshot (full load if it isn't active)."""
+        snapshot = self.level_start_snapshot
+        if snapshot is None or snapshot.level_index != self.current_level_index:
+            self.load_level(self.current_level_index); return
+        self.restore_state(snapshot)
+        self.input_source.reset()
+        if self.replay_recorder is not None: self.replay_recorder.discard()
+        if self.ghost_recorder is not None: self.ghost_recorder.discard()
+
+    def start_attempt(self, level_index, coins=0, powerup_remaining_ms=None):
+        """
+        Fresh attempt at level_index with its timer running, for tools driving a headless Game (replays, TAS,
+        environments, benchmarks). coins and powerup_remaining_ms (None = no power-up) are the power-up state
+        carried in from the previous level, as a replay records it.
+        """
+        self.current_level_index = level_index; self.restart_level()
+        self.level_elapsed_time = 0.0; self.timer_active = True
+        self.coins_for_powerup_count = coins; self.powerup_active = powerup_remaining_ms is not None
+        self.powerup_end_time = self.sim_time_ms + powerup_remaining_ms if self.powerup_active else 0
+        self.game_state = STATE_PLAYING
+
     def load_assets(self):
         """Load images, sounds, fonts, and animation frames."""
         # --- Fonts ---
@@ -197,7 +281,7 @@ class Game:
             self.title_font = pygame.font.Font(BUTTON_FONT_PATH, TITLE_FONT_SIZE)
             self.controls_font = pygame.font.Font(BUTTON_FONT_PATH, CONTROLS_FONT_SIZE)
             self.info_font = pygame.font.Font(BUTTON_FONT_PATH, INFO_FONT_SIZE)
-            print(f"Loaded custom font: {BUTTON_FONT_NAME}")
+            log.info("Loaded custom font: %s", BUTTON_FONT_NAME)
             custom_font_loaded = True
         except (FileNotFoundError, pygame.error) as e:
             print(f"Warning: Failed custom font '{BUTTON_FONT_PATH}'. Using default.\n{e}")
@@ -205,79 +289,116 @@ class Game:
             self.title_font = pygame.font.Font(None, TITLE_FONT_SIZE)
             self.controls_font = pygame.font.Font(None, CONTROLS_FONT_SIZE)
             self.info_font = pygame.font.Font(None, INFO_FONT_SIZE)
+        self.profiler_font = pygame.font.Font(None, PROFILER_FONT_SIZE)  # Default font: narrow and readable at small sizes
 
-        # --- Background ---
-        try:
-            original_background = pygame.image.load(os.path.join(IMG_DIR, BACKGROUND_IMG)).convert()
-            original_width, original_height = original_background.get_size();
-            target_width, target_height = SCREEN_WIDTH, SCREEN_HEIGHT
-            if original_width != target_width or original_height != target_height:
-                self.background_img = pygame.transform.scale(original_background, (target_width, target_height))
-            else:
-                self.background_img = original_background
+        # --- Start Decoding (worker threads; cache hits need no decoding) ---
+        loader = AssetLoader(self.asset_cache)
+        BUTTON_DISPLAY_WIDTH = 220;
+        BUTTON_DISPLAY_HEIGHT = 80;
+        button_size = (BUTTON_DISPLAY_WIDTH, BUTTON_DISPLAY_HEIGHT)
+        background_path = os.path.join(IMG_DIR, BACKGROUND_IMG)
+        loader.request('background', functools.partial(load_scaled, background_path, (SCREEN_WIDTH, SCREEN_HEIGHT), smooth=False),
+                       [background_path], (SCREEN_WIDTH, SCREEN_HEIGHT), fmt='RGB')
+        loader.request('platform_tile', functools.partial(load_scaled, os.path.join(IMG_DIR, PLATFORM_TILE_IMG)), fmt='RGB')
+        loader.request('door', functools.partial(load_scaled, os.path.join(IMG_DIR, DOOR_IMG)))
+        for name, filename in (('button_normal', BUTTON_NORMAL_IMG), ('button_hover', BUTTON_HOVER_IMG)):
+            path = os.path.join(IMG_DIR, filename)
+            loader.request(name, functools.partial(load_scaled, path, button_size), [path], button_size)
+        log.info("Loading collectible frames '%s'...", COLLECTIBLE_IMG_PATTERN)
+        for i in range(COLLECTIBLE_IMG_COUNT):  # One job per frame so they spread across cores
+            path = os.path.join(IMG_DIR, COLLECTIBLE_IMG_PATTERN.format(i))
+            loader.request(f"collectible_{i:02}", functools.partial(load_scaled, path, (COLLECTIBLE_WIDTH, COLLECTIBLE_HEIGHT)),
+                           [path], (COLLECTIBLE_WIDTH, COLLECTIBLE_HEIGHT))
+        for anim_name, sheet_name, num_frames in (('idle', PLAYER_IDLE_IMG, PLAYER_IDLE_FRAMES),
+                                                  ('run', PLAYER_RUN_IMG, PLAYER_RUN_FRAMES)):
+            path = os.path.join(IMG_DIR, sheet_name)
+            loader.request(f"player_{anim_name}", functools.partial(build_player_animation, path, num_frames, anim_name),
+                           [path], (PLAYER_WIDTH, PLAYER_HEIGHT, num_frames))
+        loader.request('sfx_jump', functools.partial(pygame.mixer.Sound, os.path.join(SND_DIR, SFX_JUMP)), fmt=None)
+        loader.request('sfx_collect', functools.partial(pygame.mixer.Sound, os.path.join(SND_DIR, SFX_COLLECT)), fmt=None)
+        try:  # Music streams from disk, so there is nothing to decode up front
+            pygame.mixer.music.load(os.path.join(SND_DIR, MUSIC_BACKGROUND)); pygame.mixer.music.set_volume(0.4)
         except pygame.error as e:
-            print(f"CRITICAL ERROR loading background: {e}"); self.background_img = pygame.Surface(
+            print(f"Music load error: {e}")
+        loader.wait(self.draw_loading_screen)
+
+        # --- Background ---
+        background = loader.get('background')
+        if background: self.background_img = background[0]
+        else:
+            print("CRITICAL ERROR loading background"); self.background_img = pygame.Surface(
                 (SCREEN_WIDTH, SCREEN_HEIGHT)); self.background_img.fill(BLACK)
 
         # --- Other Assets ---
-        try:
-            self.platform_tile_img = pygame.image.load(os.path.join(IMG_DIR, PLATFORM_TILE_IMG)).convert()
-        except pygame.error as e:
-            print(f"Platform tile load error: {e}"); self.platform_tile_img = pygame.Surface((32, 32)).fill(GRAY)
-        try:
-            self.door_img = pygame.image.load(os.path.join(IMG_DIR, DOOR_IMG)).convert_alpha()
-        except pygame.error as e:
-            print(f"Door load error: {e}"); self.door_img = None
+        # (platform tile and door are small and unscaled: decoded on the pool but not worth caching)
+        platform_tile = loader.get('platform_tile')
+        if platform_tile: self.platform_tile_img = platform_tile[0]
+        else: print("Platform tile load error"); self.platform_tile_img = pygame.Surface((32, 32)).fill(GRAY)
+        door = loader.get('door')
+        if door: self.door_img = door[0]
+        else: print("Door load error"); self.door_img = None
 
         # --- Buttons ---
-        BUTTON_DISPLAY_WIDTH = 220;
-        BUTTON_DISPLAY_HEIGHT = 80;
-        temp_button_normal = None;
-        temp_button_hover = None
-        try:
-            temp_button_normal = pygame.image.load(os.path.join(IMG_DIR,
-                                                                BUTTON_NORMAL_IMG)).convert_alpha(); self.button_img_normal = pygame.transform.smoothscale(
-                temp_button_normal, (BUTTON_DISPLAY_WIDTH, BUTTON_DISPLAY_HEIGHT))
-        except pygame.error as e:
-            print(f"CRITICAL button normal load/scale error: {e}"); self.button_img_normal = pygame.Surface(
-                (BUTTON_DISPLAY_WIDTH, BUTTON_DISPLAY_HEIGHT)); self.button_img_normal.fill(BLUE)
-        try:
-            temp_button_hover = pygame.image.load(os.path.join(IMG_DIR,
-                                                               BUTTON_HOVER_IMG)).convert_alpha(); self.button_img_hover = pygame.transform.smoothscale(
-                temp_button_hover, (BUTTON_DISPLAY_WIDTH, BUTTON_DISPLAY_HEIGHT))
-        except pygame.error as e:
-            print(f"Warning: button hover load/scale error: {e}"); self.button_img_hover = None
+        button_normal = loader.get('button_normal')
+        if button_normal: self.button_img_normal = button_normal[0]
+        else:
+            print("CRITICAL button normal load/scale error"); self.button_img_normal = pygame.Surface(button_size)
+            self.button_img_normal.fill(BLUE)
+        button_hover = loader.get('button_hover')
+        self.button_img_hover = button_hover[0] if button_hover else None
 
         # --- Collectibles ---
-        self.collectible_frames = [];
-        print(f"Loading collectible frames '{COLLECTIBLE_IMG_PATTERN}'...")
+        self.collectible_frames = []
         for i in range(COLLECTIBLE_IMG_COUNT):
-            filename = COLLECTIBLE_IMG_PATTERN.format(i);
-            filepath = os.path.join(IMG_DIR, filename)
-            try:
-                original_frame = pygame.image.load(
-                    filepath).convert_alpha(); frame_scaled = pygame.transform.smoothscale(original_frame, (
-                COLLECTIBLE_WIDTH, COLLECTIBLE_HEIGHT)); self.collectible_frames.append(frame_scaled)
-            except (pygame.error, Exception) as e:
-                print(f"Error loading/scaling collectible {filepath}: {e}"); break
+            frame = loader.get(f"collectible_{i:02}")
+            if not frame:
+                print(f"Error loading/scaling collectible {COLLECTIBLE_IMG_PATTERN.format(i)}")
+                break  # Keep the frames before the first bad one (remaining jobs already finished)
+            self.collectible_frames.append(frame[0])
         if not self.collectible_frames: print(
             "Warning: Collectible frames empty. Using fallback."); fallback = pygame.Surface(
             (COLLECTIBLE_WIDTH, COLLECTIBLE_HEIGHT)); fallback.fill(YELLOW); fallback.set_colorkey(
             BLACK); self.collectible_frames = [fallback]
+        self.coin_clock = AnimationClock(len(self.collectible_frames), COLLECTIBLE_ANIM_SPEED)  # Drives every coin
+
+        # --- Player Animations (shared by every Player instance) ---
+        self.player_animations = {'idle': loader.get('player_idle'), 'run': loader.get('player_run')}
+
+        # --- Sprite Atlas (doors are added per size by get_door_image) ---
+        self.sprite_atlas = TextureAtlas()
+        self.sprite_atlas.add_all(self.collectible_frames)
+        for frames in self.player_animations.values(): self.sprite_atlas.add_all(frames or [])
+        self.door_images = {}  # (width, height) -> door scaled to that goal size
 
         # --- Sounds ---
         try:
-            pygame.mixer.music.load(os.path.join(SND_DIR, MUSIC_BACKGROUND)); pygame.mixer.music.set_volume(0.4)
-        except pygame.error as e:
-            print(f"Music load error: {e}")
-        try:
-            self.sfx_jump = pygame.mixer.Sound(os.path.join(SND_DIR, SFX_JUMP)); self.sfx_collect = pygame.mixer.Sound(
-                os.path.join(SND_DIR, SFX_COLLECT)); self.sfx_jump.set_volume(0.6); self.sfx_collect.set_volume(0.7)
+            self.sfx_jump = loader.get('sfx_jump'); self.sfx_collect = loader.get(
+                'sfx_collect'); self.sfx_jump.set_volume(0.6); self.sfx_collect.set_volume(0.7)
         except pygame.error as e:
             print(f"SFX load error: {e}"); self.sfx_jump = pygame.mixer.Sound(
                 pygame.scrap.get("application/octet-stream")); self.sfx_collect = pygame.mixer.Sound(
                 pygame.scrap.get("application/octet-stream"))
 
+    def get_door_image(self, size):
+        """Door scaled to a goal's size, shared by every goal of that size and packed into the sprite atlas."""
+        image = self.door_images.get(size)
+        if image is None:
+            image = self.door_images[size] = pygame.transform.smoothscale(self.door_img, size)
+            self.sprite_atlas.add(image)
+        return image
+
+    def draw_loading_screen(self, done, total):
+        """Progress bar shown while asset jobs run on the loader's threads."""
+        pygame.event.pump()  # Keep the window responsive
+        self.screen.fill(BLACK)
+        draw_text("Loading...", self.info_font, WHITE, self.screen, SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 40,
+                  center=True)
+        bar = pygame.Rect(0, 0, SCREEN_WIDTH // 2, 16); bar.center = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 20)
+        pygame.draw.rect(self.screen, GRAY, bar, 2)
+        pygame.draw.rect(self.screen, WHITE, (bar.x + 4, bar.y + 4, (bar.width - 8) * done // max(total, 1), bar.height - 8))
+        if not self.headless:
+            with TRACER.span('display.flip'): pygame.display.flip()
+
     def play_sound(self, sound):
         # ... () ...
         try:
@@ -304,8 +425,24 @@ class Game:
             self.screen_flags = pygame.RESIZABLE | pygame.SCALED; self.screen = pygame.display.set_mode(
                 (self.current_screen_width, self.current_screen_height), self.screen_flags)
         pygame.display.set_caption(TITLE);
+        if self.dirty_renderer is not None: self.dirty_renderer.invalidate()
+        self.still_key = None
         print("Display mode toggled.")
 
+    def set_tick_rate(self, rate):
+        """Physics ticks per second; movement is scaled to feel the same at any rate (sprites.TickPhysics)."""
+        if not rate > 0: raise ValueError(f"Physics tick rate must be positive, not {rate}")
+        self.tick_rate = rate; self.tick_dt = 1.0 / rate
+        if hasattr(self, 'player'): self.player.physics = TickPhysics(self.tick_dt)  # Movers re-time on their next reset
+        self.level_start_snapshot = None  # So the next restart reloads the level (and re-times its movers)
+
+    def toggle_trace(self):
+        """Starts tracing, or stops it and writes the buffer to TRACE_DIR as a Chrome trace."""
+        if not TRACER.enabled: TRACER.start(); log.info("Tracing started (F9 to stop and save)."); return
+        TRACER.stop()
+        path = os.path.join(TRACE_DIR, time.strftime('trace_%Y%m%d_%H%M%S.json'))
+        log.info("Trace saved: %s (%d events)", path, TRACER.export_chrome(path))
+
     def run(self):
         # ... () ...
         if pygame.mixer.music.get_busy() == 0 and hasattr(pygame.mixer.music, 'play'):
@@ -314,20 +451,83 @@ class Game:
             except pygame.error as e:
                 print(f"Error starting music: {e}")
         while self.running:
-            self.dt = self.clock.tick(FPS) / 1000.0;
-            self.events();
-            self.update();
-            self.draw()
+            if IDLE_RENDERING and self.game_state != STATE_PLAYING: self.run_idle_frame()
+            else: self.run_frame()
+            if self.startup_time is not None:
+                print(f"Time to first frame: {(time.perf_counter() - self.startup_time) * 1000:.0f} ms "
+                      f"(asset cache: {self.asset_cache.hits} hits, {self.asset_cache.misses} misses)")
+                self.startup_time = None
         pygame.mixer.music.stop()
-
-    def events(self):
-        """Handle all input events and state changes affecting timer."""
+        if self.leaderboard is not None: self.leaderboard.close()  # Finish pending writes
+
+    def run_frame(self):
+        """One frame of play: input, fixed physics ticks, draw. Capped at BACKGROUND_FPS while unfocused."""
+        self.dt = self.clock.tick(FPS if self.focused else BACKGROUND_FPS) / 1000.0;
+        TRACER.counter('frame_ms', self.dt * 1000.0)
+        frame_start = time.perf_counter()
+        self.events();
+        events_done = time.perf_counter()
+        self.step_simulation(self.dt);
+        update_done = time.perf_counter()
+        self.draw()
+        self.profiler.end_frame(self.dt * 1000.0, events_done - frame_start, update_done - events_done,
+                                time.perf_counter() - update_done)
+
+    def run_idle_frame(self):
+        """Menu and end screens: sleep until an event arrives (or IDLE_WAIT_MS passes), then draw only if needed."""
+        event = pygame.event.wait(IDLE_WAIT_MS)
+        self.dt = self.clock.tick() / 1000.0
+        TRACER.counter('frame_ms', self.dt * 1000.0)
+        frame_start = time.perf_counter()
+        self.advance_clock(self.dt)  # Before events(), which may start play
+        update_done = time.perf_counter()
+        self.events(event if event.type != pygame.NOEVENT else None);
+        events_done = time.perf_counter()
+        self.draw()
+        self.profiler.end_frame(self.dt * 1000.0, events_done - update_done, update_done - frame_start,
+                                time.perf_counter() - events_done)
+
+    def advance_clock(self, seconds):
+        """
+        Idle counterpart of step_simulation. Outside play a tick only moves the clocks (power-ups still expire
+        on end screens), so every due tick is run instead of capping them per frame.
+        """
+        self.accumulator += seconds
+        while self.accumulator >= self.tick_dt:
+            self.update()
+            self.accumulator -= self.tick_dt
+
+    def step_simulation(self, frame_time):
+        """Consume real frame time in fixed physics ticks, leaving the remainder for interpolation."""
+        self.accumulator += min(frame_time, MAX_FRAME_TIME)
+        steps = 0
+        while self.accumulator >= self.tick_dt and steps < MAX_PHYSICS_STEPS_PER_FRAME:
+            self.update()
+            self.accumulator -= self.tick_dt
+            steps += 1
+        TRACER.counter('physics_steps', steps)
+        if self.accumulator >= self.tick_dt:  # Too slow to catch up: drop the backlog rather than spiral
+            self.accumulator = self.accumulator % self.tick_dt
+        self.alpha = self.accumulator / self.tick_dt
+
+    @traced('events')
+    def events(self, first=None):
+        """Handle all input events and state changes affecting timer. first is an event already taken off the queue."""
         mouse_pos = pygame.mouse.get_pos()
-        for event in pygame.event.get():
+        pending = pygame.event.get()
+        if first is not None: pending.insert(0, first)
+        for event in pending:
             if event.type == pygame.QUIT: self.running = False
+            if event.type in (pygame.WINDOWEXPOSED, pygame.WINDOWRESIZED, pygame.WINDOWRESTORED):
+                if self.dirty_renderer is not None: self.dirty_renderer.invalidate()  # Screen contents were lost
+                self.still_key = None
+            if event.type == pygame.WINDOWFOCUSLOST: self.focused = False
+            elif event.type == pygame.WINDOWFOCUSGAINED: self.focused = True
 
             if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_F11: self.toggle_fullscreen(); continue
+                if event.key == pygame.K_F11 and not self.headless: self.toggle_fullscreen(); continue
+                if event.key == pygame.K_F9: self.toggle_trace(); continue
+                if event.key == pygame.K_F3: self.profiler.toggle(); continue
 
             if self.game_state == STATE_MENU:
                 if self.play_button.is_clicked(event):
@@ -346,30 +546,30 @@ class Game:
                 if self.back_button.is_clicked(event): self.game_state = STATE_MENU
 
             elif self.game_state == STATE_PLAYING:
+                self.input_source.handle_event(event)  # Jump presses are applied on the next physics tick
                 if event.type == pygame.KEYDOWN:
-                    if event.key in (pygame.K_SPACE, pygame.K_UP, pygame.K_w): self.player.jump()
                     if event.key == pygame.K_r:
+                        self.restart_level()  # Back to the level-start snapshot
                         self.level_elapsed_time = 0.0  # Reset time for this level attempt
                         self.timer_active = True  # Ensure timer is active
 
                         self.coins_for_powerup_count = 0
                         self.powerup_active = False
                         self.powerup_end_time = 0
-                        print("  Power-up state reset.")
-                        self.load_level(self.current_level_index)  # Reload assets/player pos
+                        log.debug("Power-up state reset.")
                         self.game_state = STATE_PLAYING
                     if event.key == pygame.K_ESCAPE:
-                        print(f"ESCAPE KEY: Going to Menu. Resetting game variables.")
-                        self.high_score = self.load_highscore()  # Reload highscore first
+                        log.info("ESCAPE KEY: Going to Menu. Resetting game variables.")
                         self.setup_game_variables()  # Full reset including timers
                         self.game_state = STATE_MENU
                         if hasattr(pygame.mixer.music, 'rewind'): pygame.mixer.music.rewind()
 
             elif self.game_state == STATE_LEVEL_COMPLETE:
-                if self.current_level_index + 1 < MAX_LEVELS and self.next_level_button.is_clicked(event):
+                if self.current_level_index + 1 < len(self.level_pack) and self.next_level_button.is_clicked(event):
                     # --- Accumulate time HERE ---
                     self.total_game_time += self.level_elapsed_time
-                    print(f"NEXT LEVEL: Added {self.level_elapsed_time:.3f}s. New total = {self.total_game_time:.3f}s")
+                    self.level_splits.append(self.level_elapsed_time)
+                    log.info("NEXT LEVEL: Added %.3fs. New total = %.3fs", self.level_elapsed_time, self.total_game_time)
                     self.level_elapsed_time = 0.0  # Reset for next level immediately
                     # ---------------------------
                     self.current_level_index += 1
@@ -377,63 +577,63 @@ class Game:
                     self.load_level(self.current_level_index)  # Load assets/player pos
                     self.game_state = STATE_PLAYING
                 elif self.main_menu_button.is_clicked(event):
-                    self.high_score = self.load_highscore()  # Reload high score
                     self.setup_game_variables()  # Full reset
                     self.game_state = STATE_MENU
                     if hasattr(pygame.mixer.music, 'rewind'): pygame.mixer.music.rewind()
                 elif event.type == pygame.KEYDOWN and event.key == pygame.K_r:
+                    self.restart_level()  # Back to the level-start snapshot
                     self.level_elapsed_time = 0.0  # Reset time for this level attempt
                     self.timer_active = True  # Ensure timer is active
-                    self.load_level(self.current_level_index)  # Reload assets/player pos
                     self.game_state = STATE_PLAYING
 
             elif self.game_state == STATE_GAME_OVER:
                 if self.restart_level_button.is_clicked(event):
+                    self.restart_level()  # Back to the level-start snapshot
                     self.coins_for_powerup_count = 0
                     self.powerup_active = False
                     self.powerup_end_time = 0
-                    print("  Power-up state reset.")
+                    log.debug("Power-up state reset.")
                     self.level_elapsed_time = 0.0  # Reset time for this level attempt
                     self.timer_active = True  # Ensure timer is active
-                    self.load_level(self.current_level_index)  # Reload assets/player pos
                     self.game_state = STATE_PLAYING
                 elif self.main_menu_button.is_clicked(event):
-                    self.high_score = self.load_highscore()  # Reload high score
                     self.setup_game_variables()  # Full reset
                     self.game_state = STATE_MENU
                     if hasattr(pygame.mixer.music, 'rewind'): pygame.mixer.music.rewind()
                 elif event.type == pygame.KEYDOWN and event.key == pygame.K_r:
+                    self.restart_level()  # Back to the level-start snapshot
                     self.level_elapsed_time = 0.0  # Reset time for this level attempt
                     self.timer_active = True  # Ensure timer is active
-                    self.load_level(self.current_level_index)  # Reload assets/player pos
                     self.game_state = STATE_PLAYING
 
             elif self.game_state == STATE_GAME_WON:
                 if self.win_main_menu_button.is_clicked(event):
-                    self.high_score = self.load_highscore()  # Reload high score
                     self.setup_game_variables()  # Full reset
                     self.game_state = STATE_MENU
                     if hasattr(pygame.mixer.music, 'rewind'): pygame.mixer.music.rewind()
 
         # Button Hover States ( needed)
-        if self.game_state == STATE_MENU:
-            [b.check_hover(mouse_pos) for b in self.menu_buttons]
-        elif self.game_state == STATE_CONTROLS:
-            self.back_button.check_hover(mouse_pos)
-        elif self.game_state == STATE_LEVEL_COMPLETE:
-            if self.current_level_index + 1 < MAX_LEVELS: self.next_level_button.check_hover(mouse_pos)
-            self.main_menu_button.check_hover(mouse_pos)
-        elif self.game_state == STATE_GAME_OVER:
-            self.restart_level_button.check_hover(mouse_pos); self.main_menu_button.check_hover(mouse_pos)
-        elif self.game_state == STATE_GAME_WON:
-            self.win_main_menu_button.check_hover(mouse_pos)
-
+        for button in self.state_buttons(): button.check_hover(mouse_pos)
+
+    def state_buttons(self):
+        """Buttons shown in the current state."""
+        if self.game_state == STATE_MENU: return self.menu_buttons
+        if self.game_state == STATE_CONTROLS: return [self.back_button]
+        if self.game_state == STATE_LEVEL_COMPLETE:
+            if self.current_level_index + 1 < len(self.level_pack): return [self.next_level_button, self.main_menu_button]
+            return [self.main_menu_button]
+        if self.game_state == STATE_GAME_OVER: return [self.restart_level_button, self.main_menu_button]
+        if self.game_state == STATE_GAME_WON: return [self.win_main_menu_button]
+        return []
+
+    @traced('update')
     def update(self):
-        """Update game logic, including timer and high score check."""
+        """Advance the game by one fixed physics tick, including timer and high score check."""
+        self.sim_time_ms += self.tick_dt * 1000.0
         # --- Power-up Timer Check ---
-        now = pygame.time.get_ticks()
+        now = self.sim_time_ms
         if self.powerup_active and now >= self.powerup_end_time:
-            print("Power-up Expired.")
+            log.debug("Power-up Expired.")
             self.powerup_active = False
             # Player physics will automatically revert in the Player class
         # --------------------------
@@ -441,34 +641,41 @@ class Game:
         # --- Timer Increment ---
         # Increment ONLY if timer is active (set during state transitions)
         if self.timer_active:
-            self.level_elapsed_time += self.dt
+            self.level_elapsed_time += self.tick_dt
         # ---------------------
 
         if self.game_state == STATE_PLAYING:
-            self.player.update(self.platforms)
+            inputs = self.input_source.next_tick()
+            if self.replay_recorder is not None: self.replay_recorder.record(self, inputs)
+            if self.movers: self.update_movers()
+            if inputs & INPUT_JUMP: self.player.jump()
+            self.player.update(self.platforms, inputs)
+            self.follow_player()
+            self.level_ticks += 1
+            if self.ghost_recorder is not None: self.ghost_recorder.record(self.player)
 
-            self.all_sprites.update()  # Includes Collectible animation
+            self.coin_clock.update(self.sim_time_ms)  # Animates every coin at once, on simulated time
 
             collected_items = pygame.sprite.spritecollide(self.player, self.collectibles, True)
             if collected_items:
+                if self.world is not None: self.world.collect(collected_items)
                 num_collected = len(collected_items)
                 self.score += num_collected  # Increase general score display
             #if collected_items: self.score += len(collected_items);
                 self.play_sound(self.sfx_collect)
                 # Process each collected coin for power-up logic
-                current_time = pygame.time.get_ticks()  # Get time again in case loop takes time
+                current_time = self.sim_time_ms
                 for _ in range(num_collected):
                     if self.powerup_active:
                         self.powerup_end_time += POWERUP_EXTENSION_PER_COIN
-                        print(
-                            f"Power-up extended! New end: {(self.powerup_end_time - current_time) / 1000.0:.1f}s remaining")
+                        log.debug("Power-up extended! New end: %.1fs remaining", (self.powerup_end_time - current_time) / 1000.0)
                         # Add a sound effect for extension?
                     else:
                         # Work towards activating power-up
                         self.coins_for_powerup_count += 1
-                        print(f"Coins towards power-up: {self.coins_for_powerup_count}/{COINS_NEEDED_FOR_POWERUP}")
+                        log.debug("Coins towards power-up: %d/%d", self.coins_for_powerup_count, COINS_NEEDED_FOR_POWERUP)
                         if self.coins_for_powerup_count >= COINS_NEEDED_FOR_POWERUP:
-                            print("Power-up Activated!")
+                            log.debug("Power-up Activated!")
                             self.powerup_active = True
                             self.powerup_end_time = current_time + POWERUP_INITIAL_DURATION
                             self.coins_for_powerup_count = 0  # Reset count for the *next* power-up
@@ -478,58 +685,108 @@ class Game:
             # --- Goal Hit Logic ---
             if pygame.sprite.spritecollide(self.player, self.goal_group, False):
                 if self.timer_active:
-                    print(f"GOAL HIT: Pausing timer.")
+                    log.debug("GOAL HIT: Pausing timer.")
                     self.timer_active = False
                 current_level_final_time = self.level_elapsed_time  # Time for *this* level
+                if self.replay_recorder is not None: self.replay_recorder.finish(current_level_final_time)
+                if self.ghost_recorder is not None:
+                    best_run = self.ghost_recorder.finish(self.current_level_index, current_level_final_time)
+                    if best_run is not None and self.ghost_store.submit(best_run): self.ghost = best_run
                 self.final_time = self.total_game_time + current_level_final_time  # Total time for *this run*
 
-                if self.current_level_index + 1 >= MAX_LEVELS:  # Last level?
+                if self.current_level_index + 1 >= len(self.level_pack):  # Last level?
                     self.game_state = STATE_GAME_WON
-                    print(f"Game Won! Final Total Time: {format_time(self.final_time)}")
+                    log.info("Game Won! Final Total Time: %s", format_time(self.final_time))
 
                     # --- Check and Save High Score ---
+                    # Every finished run goes to the leaderboard; the write happens on its own thread
+                    if self.leaderboard is not None:
+                        self.leaderboard.submit_run(self.final_time, self.level_splits + [current_level_final_time])
                     # Compare final_time of this run with the loaded high_score
                     if self.final_time is not None and self.final_time < self.high_score:
-                        print(f"New High Score! Beating {format_time(self.high_score)}")
+                        log.info("New High Score! Beating %s", format_time(self.high_score))
                         self.high_score = self.final_time  # Update the high score in memory
-                        self.save_highscore()  # Save the *updated* self.high_score to file
                     else:
-                        print(f"Did not beat high score of {format_time(self.high_score)}")
+                        log.info("Did not beat high score of %s", format_time(self.high_score))
                     # -------------------------------
 
                 else:  # Not last level
                     self.game_state = STATE_LEVEL_COMPLETE
-                print(
-                    f"Level {self.current_level_index + 1} finished. Time for level: {format_time(current_level_final_time)}. State: {self.game_state}")
+                log.info("Level %d finished. Time for level: %s. State: %s", self.current_level_index + 1, format_time(current_level_final_time), self.game_state)
             # --- End Goal Hit ---
 
             # ... (Falling out logic) ...
 
             # Falling out
-            if self.player.rect.top > SCREEN_HEIGHT + 50:
+            if self.player.rect.top > self.camera.world_height + 50:
                 if self.timer_active:  # Check if timer was running
-                    print(f"FELL OUT: Pausing timer.")
+                    log.debug("FELL OUT: Pausing timer.")
                     self.timer_active = False  # PAUSE timer
                 self.game_state = STATE_GAME_OVER
-                print(f"Player fell out! State: {self.game_state}")
+                if self.replay_recorder is not None: self.replay_recorder.discard()
+                if self.ghost_recorder is not None: self.ghost_recorder.discard()
+                log.info("Player fell out! State: %s", self.game_state)
         # --- End STATE_PLAYING block ---
 
+    @traced('movers')
+    def update_movers(self):
+        """Moving platforms take their tick before the player, so Player.ride can carry it by their move."""
+        for mover in self.movers: mover.advance(self.player)
+        self.mover_broadphase.update()
+
+    @traced('draw')
     def draw(self):
         # ... (draw method contents - s needed here for timer logic) ...
-        self.screen.blit(self.background_img, (0, 0))
+        if self.game_state != STATE_PLAYING: self.draw_still_screen(); return
+        self.still_key = None  # Whatever screen comes next is composed afresh
+        if self.dirty_renderer is not None:
+            if self.level_layer is not None: self.draw_playing_dirty(); return
+            self.dirty_renderer.invalidate()  # Anything else is a full redraw; so is the next dirty frame
+        # Levels start from the cached level layer in draw_level_scene instead
+        if self.level_layer is None: self.screen.blit(self.background_img, (0, 0)); blit_counter.count += 1
+        self.draw_playing()
+        if self.profiler.visible: self.draw_profiler()
+        self.present()
+
+    def present(self):
+        """Flips the whole display (timed for the profiler overlay)."""
+        if self.headless: return
+        flip_start = time.perf_counter()
+        with TRACER.span('display.flip'): pygame.display.flip()
+        self.profiler.flip_seconds += time.perf_counter() - flip_start
+
+    def draw_still_screen(self):
+        """
+        Menu, controls and end screens don't animate: everything but the buttons is composed once into
+        still_frame, and afterwards a frame is only drawn when a button's hover state changes.
+        """
+        buttons = self.state_buttons()
+        key = (self.game_state, tuple(button.is_hovered for button in buttons))
+        if key == self.still_key and not self.profiler.visible: return
+        if self.still_key is None or self.still_key[0] != self.game_state: self.compose_still_screen()
+        else: self.screen.blit(self.still_frame, (0, 0)); blit_counter.count += 1
+        for button in buttons: button.draw(self.screen)
+        self.still_key = key
+        if self.profiler.visible: self.draw_profiler()
+        self.present()
+
+    def compose_still_screen(self):
+        if self.dirty_renderer is not None: self.dirty_renderer.invalidate()  # Next play frame is a full redraw
+        # Level states start from the cached level layer in draw_level_scene instead
+        if self.game_state in (STATE_MENU, STATE_CONTROLS, STATE_GAME_WON) or self.level_layer is None:
+            self.screen.blit(self.background_img, (0, 0)); blit_counter.count += 1
         if self.game_state == STATE_MENU:
             self.draw_menu()
         elif self.game_state == STATE_CONTROLS:
             self.draw_controls()
-        elif self.game_state == STATE_PLAYING:
-            self.draw_playing()
         elif self.game_state == STATE_LEVEL_COMPLETE:
             self.draw_level_complete()
         elif self.game_state == STATE_GAME_OVER:
             self.draw_game_over()
         elif self.game_state == STATE_GAME_WON:
             self.draw_game_won()
-        pygame.display.flip()
+        if self.still_frame is None: self.still_frame = self.screen.copy()
+        else: self.still_frame.blit(self.screen, (0, 0))
 
     # --- Drawing Helper Methods ---
     def draw_menu(self):
@@ -539,7 +796,6 @@ class Game:
         draw_text(f"Best Time: {highscore_str}", self.info_font, YELLOW, self.screen, SCREEN_WIDTH // 2, 230,
                   center=True)
         # --- End High Score ---
-        for button in self.menu_buttons: button.draw(self.screen)
 
     def draw_controls(self):
         # ... (s needed) ...
@@ -572,56 +828,107 @@ class Game:
             draw_text(line, self.controls_font, clr, self.screen, x_pos, y_offset)
             y_offset += line_height  # Use line_height variable
 
-        self.back_button.rect.centery = SCREEN_HEIGHT - 80  # Adjusted Back button position slightly
-        self.back_button.draw(self.screen)
+    def draw_level_scene(self, alpha=1.0):
+        """Cached background/platform layer (or the world's chunks), then the sprites that can change."""
+        offset = (0, 0)
+        if self.level_layer is not None: self.screen.blit(self.level_layer, (0, 0)); blit_counter.count += 1
+        elif self.world is not None:  # Camera follows the interpolated player so scrolling is as smooth as movement
+            prev_x, prev_y = self.player.prev_topleft; rect = self.player.rect
+            offset = self.camera.follow(prev_x + (rect.x - prev_x) * alpha + rect.width / 2,
+                                        prev_y + (rect.y - prev_y) * alpha + rect.height / 2)
+            self.world.draw(self.screen, offset)
+        self.draw_level_sprites(alpha, offset)
+
+    def draw_level_sprites(self, alpha=1.0, offset=(0, 0)):
+        """
+        Moving platforms, coins, goal, ghost and player over whatever is on screen, drawn from the sprite atlas
+        in one Surface.blits call (two when a ghost is shown in between). offset is the camera's top-left in
+        the world. Returns the screen rects of the movers, ghost and player.
+        """
+        blit_args = self.sprite_atlas.blit_args
+        ox, oy = offset
+        draw_list = []; drawn_rects = []
+        screen_rect = self.screen.get_rect(); view = self.camera.rect
+        for mover in self.movers:  # Under everything else; crumbled ones and those out of view are skipped
+            if not mover.solid or not view.colliderect(mover.rect): continue
+            x, y = mover.draw_position(alpha); x -= ox; y -= oy
+            draw_list.append(blit_args(mover.image, (x, y))); drawn_rects.append(screen_rect.clip((x, y), mover.rect.size))
+        draw_list.extend(blit_args(sprite.image, (sprite.rect.x - ox, sprite.rect.y - oy)) for sprite in self.collectibles)
+        draw_list.extend(blit_args(sprite.image, (sprite.rect.x - ox, sprite.rect.y - oy)) for sprite in self.goal_group)
+        if self.game_state == STATE_PLAYING and self.ghost is not None:
+            self.screen.blits(draw_list, doreturn=False); blit_counter.count += len(draw_list); draw_list.clear()  # Ghost goes between goal and player
+            ghost_rect = draw_ghost(self.ghost, self.player, self.screen, self.level_ticks, alpha, offset)
+            if ghost_rect is not None: drawn_rects.append(ghost_rect)
+        image_draw_x, image_draw_y = self.player.draw_position(alpha)
+        image_draw_x -= ox; image_draw_y -= oy
+        draw_list.append(blit_args(self.player.image, (image_draw_x, image_draw_y)))
+        self.screen.blits(draw_list, doreturn=False); blit_counter.count += len(draw_list)
+        drawn_rects.append(screen_rect.clip((image_draw_x, image_draw_y), self.player.image.get_size()))
+        return drawn_rects
 
     def draw_playing(self):
-        # ... (drawing non-player sprites and player - ) ...
-        non_player_sprites = pygame.sprite.Group([s for s in self.all_sprites if s != self.player]);
-        non_player_sprites.draw(self.screen)
-        image_draw_x = self.player.rect.centerx - (PLAYER_WIDTH // 2);
-        image_draw_y = (self.player.rect.bottom - PLAYER_HEIGHT) + PLAYER_VISUAL_Y_OFFSET
-        self.screen.blit(self.player.image, (image_draw_x, image_draw_y))
+        self.draw_level_scene(self.alpha)
         #pygame.draw.rect(self.screen, (255, 0, 0), self.player.rect, 1) # Debug hitbox
-
-        # --- Draw UI ---
-        draw_text(f"Scrolls: {self.score}", self.info_font, WHITE, self.screen, 10, 10)
-        draw_text(f"Level: {self.current_level_index + 1}/{MAX_LEVELS}", self.info_font, WHITE, self.screen,
-                  SCREEN_WIDTH - 150, 10)
+        self.draw_hud()
+
+    def draw_playing_dirty(self):
+        """Dirty-rect variant of draw_playing: restore, redraw and update only the changed regions."""
+        full_redraw = self.dirty_renderer.begin_frame(self.screen, self.level_layer)
+        # Coins animate and the door is alpha-blended, so both are restored and redrawn every frame
+        drawn_rects = [s.rect.copy() for s in self.collectibles] + [s.rect.copy() for s in self.goal_group]
+        drawn_rects.extend(self.draw_level_sprites(self.alpha))
+        drawn_rects.extend(self.draw_hud())
+        if self.profiler.visible: drawn_rects.append(self.draw_profiler())
+        flip_start = time.perf_counter()
+        self.dirty_renderer.end_frame(drawn_rects, full_redraw, present=not self.headless)
+        self.profiler.flip_seconds += time.perf_counter() - flip_start
+
+    def draw_hud(self):
+        """Score, level, timer and boost text. Returns the rects drawn."""
+        hud_rects = [
+            draw_text(f"Scrolls: {self.score}", self.info_font, WHITE, self.screen, 10, 10),
+            draw_text(f"Level: {self.current_level_index + 1}/{len(self.level_pack)}", self.info_font, WHITE, self.screen,
+                      SCREEN_WIDTH - 150, 10)]
         # --- Calculate and Format Display Time ---
         # Display TOTAL accumulated time + current level's time
         display_time = self.total_game_time + self.level_elapsed_time
         time_str = format_time(display_time)
         # --- End Calculation ---
-        draw_text(time_str, self.info_font, WHITE, self.screen, SCREEN_WIDTH // 2, 10,
-                  center=True)  # Draw formatted time
+        # Timer and boost countdown change every frame: assemble them from pre-rendered glyphs
+        hud_rects.append(get_glyph_atlas(self.info_font, WHITE).draw(time_str, self.screen, SCREEN_WIDTH // 2, 10,
+                                                                     center=True))  # Draw formatted time
         # --- Draw Power-up Indicator (Optional) ---
         if self.powerup_active:
-            now = pygame.time.get_ticks()
+            now = self.sim_time_ms
             remaining_ms = max(0, self.powerup_end_time - now)  # Avoid negative display
             remaining_s = remaining_ms / 1000.0
             powerup_text = f"Boost: {remaining_s:.1f}s"
             # Position it somewhere visible, e.g., below the main timer
-            draw_text(powerup_text, self.info_font, YELLOW, self.screen, SCREEN_WIDTH // 2, 40, center=True)
+            hud_rects.append(get_glyph_atlas(self.info_font, YELLOW, BOOST_GLYPHS).draw(
+                powerup_text, self.screen, SCREEN_WIDTH // 2, 40, center=True))
         elif self.coins_for_powerup_count > 0:
             # Optionally show progress towards next powerup
             powerup_progress_text = f"Boost: {self.coins_for_powerup_count}/{COINS_NEEDED_FOR_POWERUP}"
-            draw_text(powerup_progress_text, self.info_font, GRAY, self.screen, SCREEN_WIDTH // 2, 40, center=True)
+            hud_rects.append(draw_text(powerup_progress_text, self.info_font, GRAY, self.screen, SCREEN_WIDTH // 2, 40,
+                                       center=True))
         # -----------------------------------------
+        return hud_rects
+
+    def draw_profiler(self):
+        """F3 frame-time overlay. Returns its rect."""
+        return self.profiler.draw(self.screen, self.profiler_font, self.sprite_counts)
+
+    def sprite_counts(self):
+        return (('sprites', len(self.all_sprites)), ('platforms', len(self.platforms)), ('movers', len(self.movers)),
+                ('coins', len(self.collectibles)), ('goal', len(self.goal_group)))
 
     def draw_end_screen_overlay(self):
-        # ... ( needed) ...
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA);
-        overlay.fill((0, 0, 0, 180));
-        self.screen.blit(overlay, (0, 0))
+        if self.end_overlay is None:  # Built once; it never changes
+            self.end_overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA); self.end_overlay.fill((0, 0, 0, 180))
+        self.screen.blit(self.end_overlay, (0, 0)); blit_counter.count += 1
 
     def draw_level_complete(self):
-        # ... (draw background sprites/player - ) ...
-        non_player_sprites = pygame.sprite.Group([s for s in self.all_sprites if s != self.player]);
-        non_player_sprites.draw(self.screen)
-        image_draw_x = self.player.rect.centerx - (PLAYER_WIDTH // 2);
-        image_draw_y = (self.player.rect.bottom - PLAYER_HEIGHT) + PLAYER_VISUAL_Y_OFFSET;
-        self.screen.blit(self.player.image, (image_draw_x, image_draw_y))
+        self.draw_level_scene()
         self.draw_end_screen_overlay();
         draw_text(f"Level {self.current_level_index + 1} Complete!", self.title_font, GREEN, self.screen,
                   SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 100, center=True);
@@ -632,24 +939,14 @@ class Game:
         # --- Display Score ---
         draw_text(f"Coins Collected: {self.score}", self.info_font, WHITE, self.screen, SCREEN_WIDTH // 2,
                   SCREEN_HEIGHT // 2 + 0, center=True)  # Adjusted y slightly
-        # --- Buttons ---
-        if self.current_level_index + 1 < MAX_LEVELS: self.next_level_button.draw(self.screen)
-        self.main_menu_button.draw(self.screen)
 
     def draw_game_over(self):
-        # ... (draw background sprites/player - ) ...
-        non_player_sprites = pygame.sprite.Group([s for s in self.all_sprites if s != self.player]);
-        non_player_sprites.draw(self.screen)
-        image_draw_x = self.player.rect.centerx - (PLAYER_WIDTH // 2);
-        image_draw_y = (self.player.rect.bottom - PLAYER_HEIGHT) + PLAYER_VISUAL_Y_OFFSET;
-        self.screen.blit(self.player.image, (image_draw_x, image_draw_y))
+        self.draw_level_scene()
         self.draw_end_screen_overlay();
         draw_text("Game Over!", self.title_font, RED, self.screen, SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 100,
                   center=True);
         draw_text("You fell into the abyss...", self.info_font, WHITE, self.screen, SCREEN_WIDTH // 2,
                   SCREEN_HEIGHT // 2, center=True)  # Centered text
-        self.restart_level_button.draw(self.screen);
-        self.main_menu_button.draw(self.screen)
 
     def draw_game_won(self):
         self.screen.fill(LIGHT_BLUE);
@@ -669,7 +966,4 @@ class Game:
         else:
             highscore_str = format_time(self.high_score)
             draw_text(f"(Best: {highscore_str})", self.controls_font, GRAY, self.screen, SCREEN_WIDTH // 2,
-                      SCREEN_HEIGHT // 2 + 40, center=True)
-        # Position button lower
-        self.win_main_menu_button.rect.centery = SCREEN_HEIGHT // 2 + 120
-        self.win_main_menu_button.draw(self.screen)
\ No newline at end of file
+                      SCREEN_HEIGHT // 2 + 40, center=True)
\ No newline at end of file
@@ -0,0 +1,131 @@
+# asset_cache.py
+# On-disk cache of preprocessed (scaled/flipped) images as raw pixel buffers in one packed file.
+#   python asset_cache.py build   # (Re)build the cache
+#   python asset_cache.py bench   # Compare cold and warm time-to-first-frame
+import argparse
+import hashlib
+import json
+import struct
+import subprocess
+import sys
+import pygame
+from settings import * # Import all settings
+
+CACHE_MAGIC = b'SHAC'; CACHE_VERSION = 1
+CACHE_HEADER = struct.Struct('<4sBI') # magic, version, index length (JSON); pixel data follows
+
+def fingerprint(source_paths, params):
+    """Hash of the source files' bytes plus the settings that shape the processed result."""
+    digest = hashlib.sha1(repr((CACHE_VERSION, params)).encode())
+    for path in source_paths:
+        try:
+            with open(path, 'rb') as f: digest.update(f.read())
+        except OSError:
+            digest.update(b'<missing>')
+    return digest.hexdigest()
+
+# --- Asset Cache ---
+class AssetCache:
+    def __init__(self, path=ASSET_CACHE_FILE):
+        """
+        Entries map a name to a fingerprint and a list of frames (size, pixel format, offset into the pack).
+        The pack is read once here; a stale or unreadable pack just behaves as empty.
+        """
+        self.path = path
+        self.index = {} # name -> {'fingerprint': str, 'frames': [[w, h, fmt, offset, length], ...]}
+        self.data = b''
+        self.pending = {} # name -> (fingerprint, [(w, h, fmt, bytes), ...]) to write on save()
+        self.hits = 0; self.misses = 0
+        try:
+            with open(path, 'rb') as f: blob = f.read()
+            magic, version, index_len = CACHE_HEADER.unpack_from(blob)
+            if magic == CACHE_MAGIC and version == CACHE_VERSION:
+                start = CACHE_HEADER.size
+                self.index = json.loads(blob[start:start + index_len].decode())
+                self.data = memoryview(blob)[start + index_len:]
+        except (OSError, ValueError, struct.error):
+            pass # No usable cache yet
+
+    def get(self, name, key):
+        """Unconverted Surfaces for name if cached with a matching fingerprint, else None."""
+        entry = self.index.get(name)
+        if entry is None or entry['fingerprint'] != key:
+            self.misses += 1
+            return None
+        frames = []
+        for width, height, fmt, offset, length in entry['frames']:
+            frames.append(pygame.image.frombuffer(self.data[offset:offset + length], (width, height), fmt))
+        self.hits += 1
+        return frames
+
+    def put(self, name, key, surfaces, fmt='RGBA'):
+        """Queues processed surfaces for the next save()."""
+        self.pending[name] = (key, [(s.get_width(), s.get_height(), fmt, pygame.image.tobytes(s, fmt))
+                                    for s in surfaces])
+
+    def save(self):
+        """Rewrites the pack with the up-to-date entries and any new ones (no-op if nothing changed)."""
+        if not self.pending: return False
+        index = {}; chunks = []; offset = 0
+        for name, entry in self.index.items():
+            if name in self.pending: continue
+            frames = []
+            for width, height, fmt, old_offset, length in entry['frames']:
+                chunks.append(self.data[old_offset:old_offset + length])
+                frames.append([width, height, fmt, offset, length]); offset += length
+            index[name] = {'fingerprint': entry['fingerprint'], 'frames': frames}
+        for name, (key, frames_data) in self.pending.items():
+            frames = []
+            for width, height, fmt, pixels in frames_data:
+                chunks.append(pixels)
+                frames.append([width, height, fmt, offset, len(pixels)]); offset += len(pixels)
+            index[name] = {'fingerprint': key, 'frames': frames}
+        index_bytes = json.dumps(index, separators=(',', ':')).encode()
+        tmp_path = self.path + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, len(index_bytes)))
+                f.write(index_bytes)
+                for chunk in chunks: f.write(chunk)
+            os.replace(tmp_path, self.path) # Readers never see a half-written pack
+        except OSError as e:
+            print(f"Warning: Could not write asset cache {self.path}: {e}")
+            return False
+        self.pending.clear()
+        return True
+
+
+def measure_startup():
+    """Seconds from Game() construction to the first drawn frame (headless)."""
+    import time
+    import Game
+    start = time.perf_counter()
+    game = Game.Game(headless=True)
+    game.draw()
+    elapsed = time.perf_counter() - start
+    if game.leaderboard is not None: game.leaderboard.close()
+    return elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build or benchmark the preprocessed asset cache.")
+    parser.add_argument('command', choices=('build', 'bench', '_measure'))
+    args = parser.parse_args()
+    if args.command == '_measure': # Run in a fresh process by 'bench'
+        import contextlib
+        with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null): elapsed = measure_startup()
+        print(f"{elapsed:.4f}")
+    elif args.command == 'build':
+        if os.path.exists(ASSET_CACHE_FILE): os.remove(ASSET_CACHE_FILE)
+        import contextlib
+        with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null): elapsed = measure_startup()
+        print(f"Built {ASSET_CACHE_FILE} ({os.path.getsize(ASSET_CACHE_FILE) / 1024:.0f} KB) in {elapsed:.3f}s")
+    else:
+        def run_once():
+            out = subprocess.run([sys.executable, __file__, '_measure'], capture_output=True, text=True, check=True)
+            return float(out.stdout.strip().splitlines()[-1])
+        if os.path.exists(ASSET_CACHE_FILE): os.remove(ASSET_CACHE_FILE)
+        cold = run_once() # Also rebuilds the cache
+        warm = min(run_once() for _ in range(3))
+        print(f"Time to first frame: cold {cold * 1000:.1f} ms, cached {warm * 1000:.1f} ms")
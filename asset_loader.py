@@ -0,0 +1,61 @@
+# asset_loader.py
+# Startup asset loading: file decoding and scaling run on a thread pool (pygame releases the GIL
+# inside image decoding and smoothscale); only convert()/convert_alpha() runs on the main thread.
+import concurrent.futures
+from settings import * # Import all settings
+from asset_cache import fingerprint
+
+# --- Asset Loader ---
+class AssetLoader:
+    def __init__(self, cache, workers=ASSET_LOADER_WORKERS):
+        """
+        Args:
+            cache (AssetCache): Checked before decoding anything; freshly built images are queued into it.
+            workers (int): Thread pool size (0 = one per CPU core).
+        """
+        self.cache = cache
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = None # Started on the first cache miss
+        self.requests = {} # name -> [cache key, fmt, frames, future]
+
+    def request(self, name, build, source_paths=None, params=None, fmt='RGBA'):
+        """
+        Starts loading name. For images (fmt 'RGBA' or 'RGB') build() returns a list of unconverted
+        Surfaces, or None on failure; with source_paths the result is cached and build() is skipped on a
+        hit. With fmt None, build() is any other job (e.g. a Sound) and its result is returned as-is.
+        build() runs on a worker thread, so it must not touch the display (no convert()).
+        """
+        key = fingerprint(source_paths, params) if source_paths is not None and fmt is not None else None
+        frames = self.cache.get(name, key) if key is not None and ASSET_CACHE_ENABLED else None
+        future = None
+        if frames is None:
+            if self.pool is None:
+                self.pool = concurrent.futures.ThreadPoolExecutor(self.workers, thread_name_prefix="asset-loader")
+            future = self.pool.submit(build)
+        self.requests[name] = [key, fmt, frames, future]
+
+    def progress(self):
+        """(finished, total) requests."""
+        done = sum(1 for _, _, _, future in self.requests.values() if future is None or future.done())
+        return done, len(self.requests)
+
+    def wait(self, on_progress=None, interval=1 / 30):
+        """Blocks until every request is finished, calling on_progress(done, total) about every interval seconds."""
+        pending = {future for _, _, _, future in self.requests.values() if future is not None}
+        while pending:
+            _, pending = concurrent.futures.wait(pending, timeout=interval)
+            if on_progress is not None: on_progress(*self.progress())
+        if self.pool is not None: self.pool.shutdown(); self.pool = None
+
+    def get(self, name):
+        """
+        Result of request(name) (waits if needed). Images come back display-ready, converted here on the
+        main thread, or None if they failed; exceptions from other jobs are re-raised.
+        """
+        key, fmt, frames, future = self.requests.pop(name)
+        if fmt is None: return future.result()
+        if future is not None:
+            frames = future.result()
+            if frames and key is not None and ASSET_CACHE_ENABLED: self.cache.put(name, key, frames, fmt)
+        if not frames: return None
+        return [f.convert_alpha() if fmt == 'RGBA' else f.convert() for f in frames] # Copies out of the pack
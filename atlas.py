@@ -0,0 +1,44 @@
+# atlas.py
+# Packs sprite frames into a few large pages so a frame's draw list can go to Surface.blits in one call.
+import pygame
+from settings import * # Import all settings
+
+# --- Texture Atlas ---
+class TextureAtlas:
+    def __init__(self, page_size=ATLAS_PAGE_SIZE):
+        """
+        Shelf-packed pages of per-pixel-alpha frames. regions maps each added Surface (by identity) to
+        its (page, area), so drawing code can swap a sprite's image for an area of a shared page.
+        """
+        self.page_size = page_size
+        self.pages = []
+        self.regions = {} # Surface -> (page Surface, area Rect)
+        self.shelf_x = self.shelf_y = self.shelf_height = 0 # Free space on the newest page
+
+    def add(self, surface):
+        """Copies surface into a page (once). Returns True if it is now drawable from the atlas."""
+        if surface in self.regions: return True
+        width, height = surface.get_size()
+        if (not surface.get_flags() & pygame.SRCALPHA or surface.get_colorkey() is not None
+                or width > self.page_size or height > self.page_size): return False # Drawn on its own instead
+        if not self.pages or self.shelf_x + width > self.page_size: # Start a new shelf
+            self.shelf_x = 0; self.shelf_y += self.shelf_height; self.shelf_height = 0
+        if not self.pages or self.shelf_y + height > self.page_size: # Start a new page
+            page = pygame.Surface((self.page_size, self.page_size), pygame.SRCALPHA).convert_alpha()
+            page.fill((0, 0, 0, 0)); self.pages.append(page)
+            self.shelf_x = self.shelf_y = self.shelf_height = 0
+        page = self.pages[-1]
+        area = pygame.Rect(self.shelf_x, self.shelf_y, width, height)
+        page.blit(surface, area, special_flags=pygame.BLEND_RGBA_MAX) # Exact copy onto the cleared page
+        self.regions[surface] = (page, area)
+        self.shelf_x += width; self.shelf_height = max(self.shelf_height, height)
+        return True
+
+    def add_all(self, surfaces):
+        for surface in surfaces: self.add(surface)
+
+    def blit_args(self, surface, dest):
+        """(source, dest, area) for Surface.blits: the atlas area if surface was added, else surface itself."""
+        region = self.regions.get(surface)
+        if region is None: return surface, dest, None
+        return region[0], dest, region[1]
@@ -0,0 +1,343 @@
+# batch_physics.py
+# Steps thousands of players through one level at once: per-agent state lives in NumPy arrays and each
+# tick is a handful of vectorized operations, mirroring Game.update()'s playing branch (power-up timer,
+# jump, Player.update physics, coins, goal, falling out) exactly for every agent.
+#   python batch_physics.py check                 # Agent-by-agent parity against Game.update on every level
+#                                                 # (random inputs plus every saved replay of the level)
+#   python batch_physics.py check --level 3 -n 200
+#   python batch_physics.py bench --agents 4096   # Agent-ticks per second against one Game
+import argparse
+import contextlib
+import glob
+import sys
+import time
+import numpy as np
+import pygame
+from settings import * # Import all settings
+from levelpack import get_level_pack
+from sprites import TickPhysics
+
+HALF_HITBOX = PLAYER_HITBOX_HEIGHT / 2 # check_collisions_y's alignment margin
+BROADPHASE_MARGIN = 64 # Platforms further than this from every live agent are skipped for the tick
+
+def _rects(rects):
+    """(left, top, right, bottom) int arrays for a list of pygame.Rects, dropping empty ones (they never collide)."""
+    rects = [r for r in rects if r.width > 0 and r.height > 0]
+    return tuple(np.array([getattr(r, side) for r in rects], dtype=np.int64).reshape(-1)
+                 for side in ('left', 'top', 'right', 'bottom'))
+
+def _overlap(x, y, w, h, rects):
+    """(agents, rects) bool matrix of Rect.colliderect between each agent's w x h box at (x, y) and rects."""
+    left, top, right, bottom = rects
+    x = x[:, None]; y = y[:, None]
+    return (x < right) & (x + w > left) & (y < bottom) & (y + h > top)
+
+# --- Batched Physics ---
+class BatchPhysics:
+    def __init__(self, level, count, sim_time_ms=0.0):
+        """
+        Args:
+            level (PackedLevel): Level every agent plays (from levelpack).
+            count (int): Number of agents.
+            sim_time_ms (float): Game.sim_time_ms at the start, for power-up timing identical to a Game's.
+
+        Per-agent arrays: pos/vel/acc (count, 2) float64, rect (count, 2) int64 hitbox top-left,
+        on_ground/wall_sliding/facing_right/powerup bool, jumps_left/wall_slide_side int8, status
+        (STATE_PLAYING, STATE_LEVEL_COMPLETE or STATE_GAME_OVER), ticks, score, coins_for_powerup,
+        powerup_end and sim_time_ms, plus coins (count, coin count) bool of coins still there.
+        Agents that aren't STATE_PLAYING are left untouched by step().
+        """
+        if level.mover_count: raise ValueError(f"BatchPhysics only simulates static platforms (level has {level.mover_count} moving)")
+        self.level = level; self.count = count
+        self.platforms = _rects([pygame.Rect(*p) for p in level.platforms()])
+        # check_collisions_y resolves against platforms sorted by top (a stable sort keeps level order for ties)
+        self.y_order = np.lexsort((np.arange(len(self.platforms[0])), self.platforms[1])).argsort()
+        coin_rects = []
+        for x, y, _ in level.collectibles():
+            rect = pygame.Rect(0, 0, COLLECTIBLE_WIDTH, COLLECTIBLE_HEIGHT); rect.center = (x, y); coin_rects.append(rect)
+        self.coin_rects = tuple(np.array([getattr(r, side) for r in coin_rects], dtype=np.int64).reshape(-1)
+                                for side in ('left', 'top', 'right', 'bottom'))
+        gx, gy, gw, gh = level.goal
+        goal = pygame.Rect(0, 0, int(gw), int(gh)); goal.topleft = (gx, gy)
+        self.goal = _rects([goal])
+        self.fall_limit = max((level.world_size or (SCREEN_WIDTH, SCREEN_HEIGHT))[1], SCREEN_HEIGHT) + 50
+        self.tick_ms = 1.0 / PHYSICS_TICK_RATE * 1000.0 # As Game.update adds it
+        self.physics = TickPhysics(1.0 / PHYSICS_TICK_RATE) # As Game.set_tick_rate gives the Player
+
+        self.pos = np.zeros((count, 2)); self.vel = np.zeros((count, 2)); self.acc = np.zeros((count, 2))
+        self.rect = np.zeros((count, 2), dtype=np.int64)
+        self.on_ground = np.zeros(count, dtype=bool); self.wall_sliding = np.zeros(count, dtype=bool)
+        self.facing_right = np.ones(count, dtype=bool); self.powerup = np.zeros(count, dtype=bool)
+        self.jumps_left = np.zeros(count, dtype=np.int8); self.wall_slide_side = np.zeros(count, dtype=np.int8)
+        self.status = np.full(count, STATE_PLAYING, dtype=np.int8)
+        self.ticks = np.zeros(count, dtype=np.int64); self.score = np.zeros(count, dtype=np.int64)
+        self.coins_for_powerup = np.zeros(count, dtype=np.int64)
+        self.powerup_end = np.zeros(count); self.sim_time_ms = np.zeros(count)
+        self.coins = np.ones((count, len(coin_rects)), dtype=bool)
+        self.start = self._start_position()
+        self.reset(sim_time_ms=sim_time_ms)
+
+    def _start_position(self):
+        """Hitbox top-left after Player.reset() at the level's start (snapped onto the ground below)."""
+        x, y = self.level.player_start
+        rect = pygame.Rect(0, 0, PLAYER_HITBOX_WIDTH, PLAYER_HITBOX_HEIGHT); rect.topleft = (x, y)
+        left, top, right, _ = self.platforms
+        below = (left < rect.centerx) & (rect.centerx < right) & (top >= y)
+        if below.any(): rect.bottom = int(top[below].min())
+        return rect.x, rect.y
+
+    def reset(self, agents=None, sim_time_ms=0.0):
+        """Puts agents (indices or a bool mask; all by default) back at the start of the level, as Game.load_level does."""
+        agents = slice(None) if agents is None else agents
+        self.pos[agents] = self.start; self.rect[agents] = self.start
+        self.vel[agents] = 0.0; self.acc[agents] = 0.0
+        self.on_ground[agents] = False; self.wall_sliding[agents] = False; self.facing_right[agents] = True
+        self.jumps_left[agents] = 2; self.wall_slide_side[agents] = 0
+        self.status[agents] = STATE_PLAYING; self.ticks[agents] = 0; self.score[agents] = 0
+        self.powerup[agents] = False; self.coins_for_powerup[agents] = 0; self.powerup_end[agents] = 0.0
+        self.sim_time_ms[agents] = sim_time_ms; self.coins[agents] = True
+
+    def _nearby_platforms(self, rect_x, rect_y, reach=0):
+        """
+        Platforms near any of the given hitboxes, with their y-sort ranks (keeps big levels cheap). reach is
+        the longest move this tick, for agents fast enough to travel further than BROADPHASE_MARGIN.
+        """
+        left, top, right, bottom = self.platforms
+        margin = BROADPHASE_MARGIN + reach
+        near = ((left < rect_x.max() + PLAYER_HITBOX_WIDTH + margin) & (right > rect_x.min() - margin)
+                & (top < rect_y.max() + PLAYER_HITBOX_HEIGHT + margin) & (bottom > rect_y.min() - margin))
+        if near.all(): return self.platforms, self.y_order
+        return tuple(side[near] for side in self.platforms), self.y_order[near]
+
+    def step(self, inputs):
+        """Advances every playing agent one tick. inputs is one INPUT_* bitmask per agent (or one for all)."""
+        live = np.flatnonzero(self.status == STATE_PLAYING)
+        if not live.size: return
+        bits = np.broadcast_to(np.asarray(inputs), (self.count,))[live]
+        px, py = self.pos[live].T.copy(); vx, vy = self.vel[live].T.copy()
+        rx, ry = self.rect[live].T.copy()
+        on_ground = self.on_ground[live]; wall_sliding = self.wall_sliding[live]; facing_right = self.facing_right[live]
+        jumps_left = self.jumps_left[live]; side = self.wall_slide_side[live]
+
+        # --- Power-up Timer (Game.update) ---
+        now = self.sim_time_ms[live] + self.tick_ms
+        powerup = self.powerup[live] & ~(now >= self.powerup_end[live])
+
+        # --- Jump (Player.jump) ---
+        jump_mult = np.where(powerup, POWERUP_JUMP_MULTIPLIER, 1.0)
+        jumping = (bits & INPUT_JUMP) != 0
+        wall_jump = jumping & wall_sliding
+        ground_jump = jumping & ~wall_sliding & on_ground
+        air_jump = jumping & ~wall_sliding & ~on_ground & (jumps_left > 0)
+        physics = self.physics
+        vy = np.where(wall_jump, physics.wall_jump_y_power * jump_mult, vy)
+        vx = np.where(wall_jump, physics.wall_jump_x_power * -side, vx)
+        facing_right = np.where(wall_jump, vx > 0, facing_right)
+        vy = np.where(ground_jump, physics.jump_power * jump_mult, vy)
+        vy = np.where(air_jump, physics.double_jump_power * jump_mult, vy)
+        jumps_left = np.where(wall_jump, 1, jumps_left - (ground_jump | air_jump)).astype(np.int8)
+        wall_sliding = wall_sliding & ~wall_jump; on_ground = on_ground & ~jumping
+
+        # --- Acceleration, Friction and Speed Caps (Player.update) ---
+        speed_mult = np.where(powerup, POWERUP_SPEED_MULTIPLIER, 1.0)
+        held_left = (bits & INPUT_LEFT) != 0; held_right = (bits & INPUT_RIGHT) != 0
+        ax = np.where(held_right, physics.acc * speed_mult, np.where(held_left, -physics.acc * speed_mult, 0.0))
+        moving = held_left | held_right
+        ax = np.where(moving, ax, ax + vx * physics.friction)
+        ay = np.full(live.size, float(physics.gravity))
+        facing_right = np.where(held_right, True, np.where(held_left, False, facing_right))
+        vx = vx + ax; vy = vy + ay
+        max_speed = physics.max_run_speed * speed_mult
+        vx = np.where(np.abs(vx) > max_speed, np.where(vx > 0, max_speed, -max_speed), vx)
+        vx = np.where(np.abs(vx) < physics.stop_speed, 0.0, vx)
+
+        dx = vx + 0.5 * ax; dy = vy + 0.5 * ay # dy only shrinks below (wall sliding), so it bounds the reach
+        platforms, y_order = self._nearby_platforms(rx, ry, int(np.ceil(max(np.abs(dx).max(), np.abs(dy).max()))))
+        if not platforms[0].size: hits_right = hits_left = np.zeros(live.size, dtype=bool)
+        else:
+            hits_right = _overlap(rx + 1, ry, PLAYER_HITBOX_WIDTH, PLAYER_HITBOX_HEIGHT, platforms).any(axis=1)
+            hits_left = _overlap(rx - 1, ry, PLAYER_HITBOX_WIDTH, PLAYER_HITBOX_HEIGHT, platforms).any(axis=1)
+
+        # --- Wall Sliding ---
+        checking = ~on_ground & (vy > 0)
+        slide_right = checking & hits_right & held_right
+        slide_left = checking & ~slide_right & held_left & hits_left
+        wall_sliding = slide_right | slide_left
+        side = np.where(slide_right, 1, np.where(slide_left, -1, 0)).astype(np.int8)
+        vy = np.where(wall_sliding, np.minimum(vy, physics.wall_slide_speed), vy)
+        jumps_left = np.where(wall_sliding, 1, jumps_left).astype(np.int8)
+
+        # --- Swept Moves (Player.move_swept: long moves with platforms in the way go in equal sub-steps) ---
+        dy = vy + 0.5 * ay
+        steps = np.ones(live.size, dtype=np.int64); allowed = True # Platforms each agent resolves against
+        fast = (np.abs(dx) > CCD_MAX_STEP_X) | (np.abs(dy) > CCD_MAX_STEP_Y)
+        if fast.any() and platforms[0].size:
+            ex = np.rint(px + dx).astype(np.int64); ey = np.rint(py + dy).astype(np.int64)
+            sx = np.minimum(rx, ex); sy = np.minimum(ry, ey)
+            swept = _overlap(sx, sy, (np.maximum(rx, ex) - sx + PLAYER_HITBOX_WIDTH)[:, None],
+                             (np.maximum(ry, ey) - sy + PLAYER_HITBOX_HEIGHT)[:, None], platforms)
+            allowed = np.where(fast[:, None], swept, True)
+            steps = np.where(fast & swept.any(axis=1), np.maximum(np.ceil(np.abs(dx) / CCD_MAX_STEP_X),
+                                                                  np.ceil(np.abs(dy) / CCD_MAX_STEP_Y)), 1).astype(np.int64)
+            dx = dx / steps; dy = dy / steps
+        on_ground = on_ground & wall_sliding
+        landed = np.zeros(live.size, dtype=bool)
+        for sub_step in range(int(steps.max())):
+            moving = steps > sub_step
+
+            # --- Horizontal Movement (check_collisions_x: the first platform hit, in level order, stops it) ---
+            px = np.where(moving, px + dx, px); rx = np.where(moving, np.rint(px).astype(np.int64), rx)
+            if platforms[0].size:
+                hits = _overlap(rx, ry, PLAYER_HITBOX_WIDTH, PLAYER_HITBOX_HEIGHT, platforms) & allowed & moving[:, None]
+                hit = hits.any(axis=1); first = hits.argmax(axis=1)
+                rx = np.where(hit & (vx > 0), platforms[0][first] - PLAYER_HITBOX_WIDTH,
+                              np.where(hit & (vx < 0), platforms[2][first], rx))
+                px = np.where(hit, rx, px); vx = np.where(hit, 0.0, vx); dx = np.where(hit, 0.0, dx)
+
+            # --- Vertical Movement (check_collisions_y: the highest aligned platform hit resolves it) ---
+            py = np.where(moving, py + dy, py); ry = np.where(moving, np.rint(py).astype(np.int64), ry)
+            if platforms[0].size:
+                hits = _overlap(rx, ry, PLAYER_HITBOX_WIDTH, PLAYER_HITBOX_HEIGHT, platforms) & allowed & moving[:, None]
+                centery = (ry + PLAYER_HITBOX_HEIGHT // 2)[:, None]
+                down = hits & (vy > 0)[:, None] & (centery < platforms[1] + HALF_HITBOX)
+                up = hits & (vy < 0)[:, None] & (centery > platforms[3] - HALF_HITBOX)
+                resolving = down | up
+                hit = resolving.any(axis=1); first = np.where(resolving, y_order, len(self.y_order)).argmin(axis=1)
+                landed = landed | (hit & (vy > 0))
+                ry = np.where(hit & (vy > 0), platforms[1][first] - PLAYER_HITBOX_HEIGHT, np.where(hit, platforms[3][first], ry))
+                py = np.where(hit, ry, py); vy = np.where(hit, 0.0, vy); dy = np.where(hit, 0.0, dy)
+        on_ground = on_ground | landed
+        wall_sliding = wall_sliding & ~landed; side = np.where(landed, 0, side).astype(np.int8)
+        jumps_left = np.where(landed, 2, jumps_left).astype(np.int8)
+        vy = np.where(vy > physics.max_fall_speed, float(physics.max_fall_speed), vy)
+
+        # --- Coins, Power-up, Goal and Falling Out (Game.update) ---
+        coins = self.coins[live]; score = self.score[live]
+        counting = self.coins_for_powerup[live]; powerup_end = self.powerup_end[live]
+        if coins.shape[1]:
+            taken = coins & _overlap(rx, ry, PLAYER_HITBOX_WIDTH, PLAYER_HITBOX_HEIGHT, self.coin_rects)
+            coins = coins & ~taken; collected = taken.sum(axis=1); score = score + collected
+            for n in range(int(collected.max())): # Coins taken in one tick count one at a time
+                this_coin = collected > n
+                extending = this_coin & powerup
+                powerup_end = np.where(extending, powerup_end + POWERUP_EXTENSION_PER_COIN, powerup_end)
+                counting = np.where(this_coin & ~powerup, counting + 1, counting)
+                activating = this_coin & ~powerup & (counting >= COINS_NEEDED_FOR_POWERUP)
+                powerup = powerup | activating
+                powerup_end = np.where(activating, now + POWERUP_INITIAL_DURATION, powerup_end)
+                counting = np.where(activating, 0, counting)
+        at_goal = _overlap(rx, ry, PLAYER_HITBOX_WIDTH, PLAYER_HITBOX_HEIGHT, self.goal).any(axis=1)
+        status = np.where(ry > self.fall_limit, STATE_GAME_OVER, np.where(at_goal, STATE_LEVEL_COMPLETE, STATE_PLAYING))
+
+        self.pos[live] = np.column_stack((px, py)); self.vel[live] = np.column_stack((vx, vy))
+        self.acc[live] = np.column_stack((ax, ay)); self.rect[live] = np.column_stack((rx, ry))
+        self.on_ground[live] = on_ground; self.wall_sliding[live] = wall_sliding; self.facing_right[live] = facing_right
+        self.jumps_left[live] = jumps_left; self.wall_slide_side[live] = side
+        self.powerup[live] = powerup; self.powerup_end[live] = powerup_end; self.sim_time_ms[live] = now
+        self.coins_for_powerup[live] = counting; self.coins[live] = coins; self.score[live] = score
+        self.ticks[live] += 1; self.status[live] = status
+
+    def agent_state(self, agent):
+        """One agent's physics as comparable values (the same fields game_agent_state reads from a Game)."""
+        return (float(self.pos[agent, 0]), float(self.pos[agent, 1]), float(self.vel[agent, 0]), float(self.vel[agent, 1]),
+                int(self.rect[agent, 0]), int(self.rect[agent, 1]), bool(self.on_ground[agent]), int(self.jumps_left[agent]),
+                bool(self.wall_sliding[agent]), int(self.wall_slide_side[agent]), bool(self.facing_right[agent]),
+                bool(self.powerup[agent]), int(self.score[agent]), int(self.status[agent]))
+
+def game_agent_state(game):
+    """agent_state() fields of a Game's player (GAME_WON counts as LEVEL_COMPLETE, as the batch has no next level)."""
+    player = game.player
+    state = STATE_LEVEL_COMPLETE if game.game_state == STATE_GAME_WON else game.game_state
+    return (player.pos.x, player.pos.y, player.vel.x, player.vel.y, player.rect.x, player.rect.y, player.on_ground,
+            player.jumps_left, player.wall_sliding, player.wall_slide_side, player.facing_right, game.powerup_active,
+            game.score, state)
+
+def random_inputs(ticks, count, seed=0):
+    """(ticks, count) uint8 input bits: each agent holds a random direction for a while and presses jump now and then."""
+    rng = np.random.default_rng(seed)
+    changes = rng.random((ticks, count)) < 0.08; changes[0] = True
+    moves = np.array([0, INPUT_LEFT, INPUT_RIGHT, INPUT_RIGHT], dtype=np.uint8)[rng.integers(0, 4, (ticks, count))]
+    last_change = np.maximum.accumulate(np.where(changes, np.arange(ticks)[:, None], 0), axis=0)
+    held = np.take_along_axis(moves, last_change, axis=0)
+    return held | np.where(rng.random((ticks, count)) < 0.07, INPUT_JUMP, 0).astype(np.uint8)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Batched NumPy physics: parity check against Game.update, or benchmark.")
+    parser.add_argument('command', choices=('check', 'bench'))
+    parser.add_argument('--level', type=int, help="Level number (1-based); all levels by default")
+    parser.add_argument('-n', '--agents', type=int, help="Random-input agents per level (check: 48, bench: 4096)")
+    parser.add_argument('--ticks', type=int, default=600)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    import Game
+    from inputs import ScriptedInput
+    from replay import Replay
+    pack = get_level_pack()
+    indices = range(len(pack)) if args.level is None else [args.level - 1]
+    with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null): game = Game.Game(headless=True)
+
+    def start_level(level_index):
+        """Starts level_index in the Game and returns its start snapshot."""
+        game.start_attempt(level_index); return game.snapshot_state()
+
+    if args.command == 'check':
+        count = args.agents or 48; mismatches = 0
+        for level_index in indices:
+            if pack.level(level_index).mover_count: print(f"Level {level_index + 1}: has moving platforms, skipped"); continue
+            inputs = random_inputs(args.ticks, count, args.seed + level_index)
+            # Saved runs reach the goal, collect coins and use the power-up, which random inputs rarely do
+            replays = [Replay.load(path) for path in sorted(glob.glob(os.path.join(REPLAY_DIR, f"level_{level_index + 1:02}_*.rpl")))]
+            replays = [r for r in replays if r.level_index == level_index and not r.start_coins and not r.start_powerup_active]
+            if replays:
+                ticks = max([args.ticks] + [r.tick_count for r in replays])
+                columns = [np.repeat(np.array([bits for bits, _ in r.runs], dtype=np.uint8), [n for _, n in r.runs]) for r in replays]
+                inputs = np.column_stack([np.pad(inputs, ((0, ticks - args.ticks), (0, 0)))]
+                                         + [np.pad(c, (0, ticks - len(c))) for c in columns])
+            ticks, agents = inputs.shape
+            with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null):
+                start = start_level(level_index)
+                batch = BatchPhysics(pack.level(level_index), agents, game.sim_time_ms)
+                expected = [[None] * agents for _ in range(ticks)]
+                for agent in range(agents):
+                    game.restore_state(start); game.game_state = STATE_PLAYING
+                    game.input_source = ScriptedInput([(int(b), 1) for b in inputs[:, agent]])
+                    for tick in range(ticks):
+                        if game.game_state != STATE_PLAYING: break
+                        game.update(); expected[tick][agent] = game_agent_state(game)
+            first = None
+            for tick in range(ticks):
+                batch.step(inputs[tick])
+                for agent in range(agents):
+                    want = expected[tick][agent]
+                    if want is not None and batch.agent_state(agent) != want and first is None:
+                        first = (tick, agent, want, batch.agent_state(agent))
+            finished = int((batch.status == STATE_LEVEL_COMPLETE).sum()); fell = int((batch.status == STATE_GAME_OVER).sum())
+            if first is None:
+                print(f"Level {level_index + 1}: {count} random + {len(replays)} replay agents x {ticks} ticks match "
+                      f"({finished} finished, {fell} fell out, {int(batch.score.sum())} coins)")
+            else:
+                mismatches += 1
+                print(f"Level {level_index + 1}: MISMATCH at tick {first[0]}, agent {first[1]}\n  Game:  {first[2]}\n  batch: {first[3]}")
+        pygame.quit()
+        sys.exit(1 if mismatches else 0)
+    else:
+        count = args.agents or 4096
+        level_index = indices[0]
+        inputs = random_inputs(args.ticks, count, args.seed)
+        with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null):
+            start = start_level(level_index)
+            game.input_source = ScriptedInput([(int(b), 1) for b in inputs[:, 0]])
+            started = time.perf_counter(); game_ticks = 0
+            while game_ticks < args.ticks and game.game_state == STATE_PLAYING: game.update(); game_ticks += 1
+            game_rate = game_ticks / (time.perf_counter() - started)
+        batch = BatchPhysics(pack.level(level_index), count)
+        started = time.perf_counter(); agent_ticks = 0
+        for tick in range(args.ticks):
+            agent_ticks += int((batch.status == STATE_PLAYING).sum())
+            batch.step(inputs[tick])
+        elapsed = time.perf_counter() - started
+        print(f"Level {level_index + 1}, {count} agents x {args.ticks} ticks: {agent_ticks / elapsed:,.0f} agent-ticks/s "
+              f"({elapsed / args.ticks * 1000:.2f} ms/tick); Game.update: {game_rate:,.0f} ticks/s "
+              f"({agent_ticks / elapsed / game_rate:.0f}x)")
+        pygame.quit()
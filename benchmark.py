@@ -0,0 +1,88 @@
+# benchmark.py
+# Headless throughput benchmark: plays every level with scripted input and reports
+# simulated ticks per second, per-phase timings and allocation counts.
+#   python benchmark.py [--ticks 2000] [--alloc-ticks 300] [--no-draw]
+import argparse
+import contextlib
+import gc
+import time
+import tracemalloc
+import Game
+from settings import *
+from inputs import ScriptedInput
+from levelpack import get_level_pack
+
+# Run right with regular hops, then double back: covers running, jumps, landings and wall slides
+BENCH_SCRIPT = [(INPUT_RIGHT, 25), (INPUT_RIGHT | INPUT_JUMP, 1), (INPUT_RIGHT, 14), (INPUT_RIGHT | INPUT_JUMP, 1),
+                (INPUT_RIGHT, 60), (INPUT_LEFT | INPUT_JUMP, 1), (INPUT_LEFT, 40), (0, 10)]
+PHASES = ('events', 'update', 'draw')
+
+
+def play_level(game, level_index, ticks, draw, timings=None):
+    """Runs one events/update/draw cycle per tick, restarting whenever the attempt ends. Returns restart count."""
+    game.start_attempt(level_index)
+    clock = time.perf_counter; restarts = 0
+    for _ in range(ticks):
+        t0 = clock(); game.events()
+        t1 = clock(); game.update()
+        t2 = clock()
+        if draw: game.draw()
+        t3 = clock()
+        if timings is not None:
+            timings['events'] += t1 - t0; timings['update'] += t2 - t1; timings['draw'] += t3 - t2
+        if game.game_state != STATE_PLAYING: # Goal reached or fell out
+            game.start_attempt(level_index); restarts += 1
+    return restarts
+
+
+def measure_allocations(game, level_index, ticks, draw):
+    """Net new memory blocks and traced peak over a separate (slower) tracemalloc pass."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    play_level(game, level_index, ticks, draw)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    new_blocks = sum(stat.count_diff for stat in after.compare_to(before, 'lineno') if stat.count_diff > 0)
+    return new_blocks, peak
+
+
+def run_benchmark(ticks, alloc_ticks, draw):
+    game = Game.Game(headless=True, input_source=ScriptedInput(BENCH_SCRIPT))
+    rows = []
+    for level_index in range(len(game.level_pack)):
+        timings = dict.fromkeys(PHASES, 0.0)
+        gc_before = gc.get_stats()[0]['collections']
+        restarts = play_level(game, level_index, ticks, draw, timings)
+        gc_runs = gc.get_stats()[0]['collections'] - gc_before
+        new_blocks, peak = measure_allocations(game, level_index, alloc_ticks, draw) if alloc_ticks > 0 else (0, 0)
+        rows.append((level_index, timings, restarts, gc_runs, new_blocks, peak))
+    return rows
+
+
+def print_report(rows, ticks, alloc_ticks):
+    print(f"{'Level':>5} {'ticks/s':>9} " + " ".join(f"{p + ' us':>10}" for p in PHASES) +
+          f" {'restarts':>8} {'gc0':>5} {'blocks':>8} {'peak KB':>8}")
+    totals = dict.fromkeys(PHASES, 0.0)
+    for level_index, timings, restarts, gc_runs, new_blocks, peak in rows:
+        elapsed = sum(timings.values())
+        for p in PHASES: totals[p] += timings[p]
+        print(f"{level_index + 1:>5} {ticks / elapsed if elapsed else 0:>9.0f} " +
+              " ".join(f"{timings[p] / ticks * 1e6:>10.1f}" for p in PHASES) +
+              f" {restarts:>8} {gc_runs:>5} {new_blocks:>8} {peak / 1024:>8.1f}")
+    total_ticks = ticks * len(rows); elapsed = sum(totals.values())
+    print(f"{'All':>5} {total_ticks / elapsed if elapsed else 0:>9.0f} " +
+          " ".join(f"{totals[p] / total_ticks * 1e6:>10.1f}" for p in PHASES))
+    print(f"(phase columns are mean microseconds per tick; blocks/peak from a {alloc_ticks}-tick tracemalloc pass)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Headless game-loop throughput benchmark.")
+    parser.add_argument('--ticks', type=int, default=2000, help="Timed ticks per level")
+    parser.add_argument('--alloc-ticks', type=int, default=300, help="Ticks per level under tracemalloc (0 = skip)")
+    parser.add_argument('--no-draw', action='store_true', help="Skip Game.draw (simulation only)")
+    args = parser.parse_args()
+    with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null): # Game logs to stdout; keep the report clean
+        results = run_benchmark(args.ticks, args.alloc_ticks, not args.no_draw)
+    print_report(results, args.ticks, args.alloc_ticks)
+    pygame.quit()
@@ -0,0 +1,167 @@
+# collision.py
+#   python collision.py bench [--movers 500]   # Mover broadphase cost per tick, and a headless run through a level of movers
+import argparse
+import math
+import time
+from bisect import bisect_left
+import pygame
+from settings import * # Import all settings
+
+# --- Spatial Hash (Broadphase for static platforms) ---
+class SpatialHash:
+    def __init__(self, cell_size=SPATIAL_HASH_CELL_SIZE):
+        """
+        Uniform grid that buckets sprites by the cells their rect overlaps.
+        Args:
+            cell_size (int): Width/height of one grid cell in pixels.
+        """
+        self.cell_size = cell_size
+        self.cells = {}   # (cell_x, cell_y) -> list of sprites
+        self.order = {}   # sprite -> insertion index (keeps results in group order)
+        self.bounds = None # Union of every inserted rect
+
+    def _cell_span(self, rect):
+        """Returns the inclusive cell ranges covered by a rect."""
+        cs = self.cell_size
+        # right/bottom are exclusive, so the last covered pixel is right - 1
+        return (rect.left // cs, (max(rect.right, rect.left + 1) - 1) // cs,
+                rect.top // cs, (max(rect.bottom, rect.top + 1) - 1) // cs)
+
+    def insert(self, sprite, order=None):
+        """
+        Args:
+            order (int): Position in query results. Defaults to insertion order; streamed worlds pass the
+                platform's index in the level so results don't depend on which chunks loaded first.
+        """
+        if sprite in self.order: return
+        self.order[sprite] = len(self.order) if order is None else order
+        x0, x1, y0, y1 = self._cell_span(sprite.rect)
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = self.cells.setdefault((cx, cy), [])
+                bucket.append(sprite)
+                if order is not None and len(bucket) > 1 and self.order[bucket[-2]] > order:
+                    bucket.sort(key=self.order.__getitem__)
+        if self.bounds is None: self.bounds = sprite.rect.copy()
+        else: self.bounds.union_ip(sprite.rect)
+
+    def remove(self, sprite):
+        """Takes a sprite out of the grid (bounds only ever grow until clear())."""
+        if self.order.pop(sprite, None) is None: return
+        x0, x1, y0, y1 = self._cell_span(sprite.rect)
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = self.cells[(cx, cy)]
+                bucket.remove(sprite)
+                if not bucket: del self.cells[(cx, cy)]
+
+    def clear(self):
+        self.cells.clear(); self.order.clear(); self.bounds = None
+
+    def query(self, rect):
+        """Sprites in the cells touched by rect (broadphase only), in insertion order."""
+        x0, x1, y0, y1 = self._cell_span(rect)
+        cells = self.cells
+        if x0 == x1 and y0 == y1: # Common case: hitbox sits inside one cell
+            return list(cells.get((x0, y0), ()))
+        found = set()
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket: found.update(bucket)
+        return sorted(found, key=self.order.__getitem__)
+
+    def collide(self, rect):
+        """Sprites whose rect overlaps rect; same result and order as spritecollide on the group."""
+        return [s for s in self.query(rect) if rect.colliderect(s.rect)]
+
+    def below(self, x, y):
+        """Sprites spanning column x whose top is at or below y (used for ground snapping)."""
+        if self.bounds is None or y >= self.bounds.bottom: return []
+        top = math.floor(y)
+        column = pygame.Rect(int(x), top, 1, self.bounds.bottom - top)
+        return [s for s in self.query(column) if s.rect.left < x < s.rect.right and s.rect.top >= y]
+
+# --- Sweep and Prune (Broadphase for moving platforms) ---
+class SweepAndPrune:
+    def __init__(self, bodies):
+        """
+        Bodies kept sorted along x by their left edge; a query bisects to the ones that can reach the queried
+        rect (left edge within the widest body of it) and prunes the rest. The bodies move every tick, so
+        update() repairs the order in place with an insertion pass, which is linear while it barely changes
+        (nothing is rebuilt). Only solid bodies (crumbled platforms aren't) are returned.
+        Args:
+            bodies (list): Sprites with a rect and a solid flag, in level order.
+        """
+        self.order = {body: index for index, body in enumerate(bodies)} # body -> level index (result order)
+        self.bodies = sorted(bodies, key=lambda body: body.rect.left)
+        self.lefts = [body.rect.left for body in self.bodies] # Sort keys, parallel to bodies
+        self.max_width = max((body.rect.width for body in self.bodies), default=0)
+
+    def __len__(self):
+        return len(self.bodies)
+
+    def update(self):
+        """Re-reads every body's left edge and restores the sort (call once per tick, after the bodies moved)."""
+        bodies = self.bodies; lefts = self.lefts
+        for i in range(len(bodies)):
+            body = bodies[i]; left = body.rect.left; j = i
+            while j and lefts[j - 1] > left: # Bodies before i are already re-read and sorted
+                bodies[j] = bodies[j - 1]; lefts[j] = lefts[j - 1]; j -= 1
+            bodies[j] = body; lefts[j] = left
+
+    def collide(self, rect):
+        """Solid bodies whose rect overlaps rect, in level order."""
+        lefts = self.lefts
+        first = bisect_left(lefts, rect.left - self.max_width + 1)
+        last = bisect_left(lefts, rect.right, first)
+        hits = [body for body in self.bodies[first:last] if body.solid and rect.colliderect(body.rect)]
+        if len(hits) > 1: hits.sort(key=self.order.__getitem__)
+        return hits
+
+
+if __name__ == '__main__':
+    import contextlib
+    import os
+    import tempfile
+    parser = argparse.ArgumentParser(description="Benchmark the moving platform broadphase.")
+    parser.add_argument('command', choices=('bench',))
+    parser.add_argument('--movers', type=int, default=500, help="Moving platforms in the generated level")
+    parser.add_argument('--ticks', type=int, default=600, help="Physics ticks to run")
+    args = parser.parse_args()
+    import Game
+    from inputs import DirectInput
+    from levelpack import LevelPack, compile_levels, generate_mover_level
+    level_data = generate_mover_level(args.movers)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.pack')
+        with open(path, 'wb') as f: f.write(compile_levels([level_data]))
+        with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null):
+            game = Game.Game(headless=True)
+            game.level_pack = LevelPack.open(path); game.level_templates.templates.clear()
+            game.load_level(0); game.game_state = STATE_PLAYING
+        movers = game.movers; broadphase = game.mover_broadphase; player = game.player
+        # Broadphase alone: sweep-and-prune update + query vs rebuilding a spatial hash every tick
+        for label, rebuild in (("sweep and prune", False), ("spatial hash rebuilt per tick", True)):
+            for mover in movers: mover.reset()
+            start = time.perf_counter()
+            for tick in range(args.ticks):
+                for mover in movers: mover.advance(player)
+                if rebuild:
+                    grid = SpatialHash()
+                    for mover in movers: grid.insert(mover)
+                    grid.collide(player.rect)
+                else: broadphase.update(); broadphase.collide(player.rect)
+            elapsed = time.perf_counter() - start
+            print(f"{label}: {elapsed / args.ticks * 1e6:.0f} us/tick ({args.movers} movers, advancing included)")
+        # Whole game update, running right along the level
+        with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null):
+            game.load_level(0); game.game_state = STATE_PLAYING
+        source = game.input_source = DirectInput()
+        start = time.perf_counter()
+        for tick in range(args.ticks): source.bits = INPUT_RIGHT | (INPUT_JUMP if tick % 40 == 0 else 0); game.update()
+        elapsed = time.perf_counter() - start
+        print(f"Game.update: {elapsed / args.ticks * 1000:.3f} ms/tick, {args.ticks / elapsed:.0f} ticks/s "
+              f"(budget at {PHYSICS_TICK_RATE} Hz: {1000 / PHYSICS_TICK_RATE:.1f} ms)")
+        del game
+    pygame.quit()
@@ -0,0 +1,280 @@
+# env.py
+# Reinforcement-learning environments (gym-style reset/step) on the headless engine, no window needed.
+#   ShadowEnv   one level attempt in a headless Game
+#   BatchEnv    N attempts stepped together by batch_physics (same physics, checked by its parity check)
+#   VectorEnv   N attempts split over worker processes; observations come back through shared memory
+#   python env.py bench --envs 4096 --workers 0   # Steps per second (workers 0 = in this process)
+import argparse
+import contextlib
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from settings import * # Import all settings
+from batch_physics import BatchPhysics
+from sprites import TickPhysics
+from inputs import DirectInput
+from levelpack import get_level_pack
+from reachability import DISTANCE_CELL, distance_field, goal_region
+
+ENV_ACTIONS = tuple(move | jump for move in (0, INPUT_LEFT, INPUT_RIGHT) for jump in (0, INPUT_JUMP))
+OBS_PLAYER = 12 # Player/goal features ahead of the per-platform ones
+OBS_SIZE = OBS_PLAYER + ENV_NEAR_PLATFORMS * 4
+PHYSICS = TickPhysics(1.0 / PHYSICS_TICK_RATE) # Speeds are observed relative to the per-tick caps
+
+# --- Observations and Rewards (shared by every environment) ---
+class LevelFeatures:
+    def __init__(self, level):
+        """Per-level data for observations: world size, goal, platform boxes and a free-space distance-to-goal grid."""
+        self.width, self.height = level.world_size or (SCREEN_WIDTH, SCREEN_HEIGHT)
+        gx, gy, gw, gh = level.goal
+        self.goal_x = gx + gw / 2; self.goal_y = gy + gh / 2
+        platforms = np.array(level.platforms(), dtype=np.float64).reshape(-1, 4)
+        self.left = platforms[:, 0]; self.top = platforms[:, 1]
+        self.right = platforms[:, 0] + platforms[:, 2]; self.bottom = platforms[:, 1] + platforms[:, 3]
+        width, height, distances = distance_field(level, goal_region(level))
+        grid = np.array([np.nan if d is None else d for d in distances], dtype=np.float64).reshape(height, width)
+        for _ in range(4): # Cells inside platform corners take their free neighbours' distance
+            if not np.isnan(grid).any(): break
+            padded = np.pad(grid, 1, constant_values=np.nan)
+            with np.errstate(all='ignore'):
+                neighbours = np.fmin(np.fmin(padded[:-2, 1:-1], padded[2:, 1:-1]), np.fmin(padded[1:-1, :-2], padded[1:-1, 2:]))
+            grid = np.where(np.isnan(grid), neighbours, grid)
+        self.max_distance = float(np.nanmax(grid)) if not np.isnan(grid).all() else float(self.width + self.height)
+        self.distances = np.where(np.isnan(grid), self.max_distance, grid)
+
+    def distance(self, rect_x, rect_y):
+        """Free-space distance (px) from hitbox top-lefts to the goal."""
+        rows, columns = self.distances.shape
+        cx = np.clip(np.asarray(rect_x) // DISTANCE_CELL, 0, columns - 1).astype(np.int64)
+        cy = np.clip(np.asarray(rect_y) // DISTANCE_CELL, 0, rows - 1).astype(np.int64)
+        return self.distances[cy, cx]
+
+    def observe(self, out, rect_x, rect_y, vel_x, vel_y, on_ground, jumps_left, wall_sliding, wall_slide_side, powerup):
+        """Fills out (n, OBS_SIZE) float32 for n players; positions are scaled to the world, boxes to the screen."""
+        center_x = np.asarray(rect_x, dtype=np.float64) + PLAYER_HITBOX_WIDTH / 2
+        center_y = np.asarray(rect_y, dtype=np.float64) + PLAYER_HITBOX_HEIGHT / 2
+        out[:, 0] = center_x / self.width; out[:, 1] = center_y / self.height
+        out[:, 2] = np.asarray(vel_x) / PHYSICS.max_run_speed; out[:, 3] = np.asarray(vel_y) / PHYSICS.max_fall_speed
+        out[:, 4] = on_ground; out[:, 5] = np.asarray(jumps_left) / 2; out[:, 6] = wall_sliding
+        out[:, 7] = wall_slide_side; out[:, 8] = powerup
+        out[:, 9] = (self.goal_x - center_x) / self.width; out[:, 10] = (self.goal_y - center_y) / self.height
+        out[:, 11] = self.distance(rect_x, rect_y) / self.max_distance
+        near = out[:, OBS_PLAYER:].reshape(len(out), ENV_NEAR_PLATFORMS, 4)
+        near[:] = 1.0 # Missing platforms read as far away
+        count = min(ENV_NEAR_PLATFORMS, len(self.left))
+        if not count: return out
+        cx = center_x[:, None]; cy = center_y[:, None]
+        gap_x = np.clip(cx, self.left, self.right) - cx; gap_y = np.clip(cy, self.top, self.bottom) - cy
+        gaps = gap_x * gap_x + gap_y * gap_y
+        if count < len(self.left): nearest = np.argpartition(gaps, count - 1, axis=1)[:, :count]
+        else: nearest = np.broadcast_to(np.arange(count), gaps.shape)
+        nearest = np.take_along_axis(nearest, np.take_along_axis(gaps, nearest, axis=1).argsort(axis=1), axis=1)
+        for k, side in enumerate((self.left, self.top, self.right, self.bottom)):
+            offset = side[nearest] - (cx if k % 2 == 0 else cy)
+            near[:, :count, k] = np.clip(offset / SCREEN_WIDTH, -1.0, 1.0)
+        return out
+
+def rewards(previous_distance, distance, status):
+    """Progress towards the goal, plus the goal reward or fall penalty when an attempt ends, minus a step cost."""
+    reward = (previous_distance - distance) * ENV_PROGRESS_REWARD + ENV_STEP_PENALTY
+    reward = reward + np.where(status == STATE_LEVEL_COMPLETE, ENV_GOAL_REWARD, 0.0)
+    return reward + np.where(status == STATE_GAME_OVER, ENV_FALL_PENALTY, 0.0)
+
+# --- One Environment (headless Game) ---
+class ShadowEnv:
+    def __init__(self, level_index=0, max_seconds=ENV_MAX_SECONDS, frame_skip=1):
+        """
+        Args:
+            level_index (int): Level reset() starts unless told otherwise.
+            max_seconds (float): Game time after which an episode is cut off (done, not failed).
+            frame_skip (int): Physics ticks per step; jump is only pressed on the first of them.
+        Actions are indices into ENV_ACTIONS; observations are OBS_SIZE float32 vectors.
+        """
+        import Game # Deferred: only this environment needs the full game
+        self.level_index = level_index; self.max_ticks = int(max_seconds * PHYSICS_TICK_RATE); self.frame_skip = frame_skip
+        self.null = open(os.devnull, 'w') # The game logs state changes; training runs don't want them
+        with contextlib.redirect_stdout(self.null): self.game = Game.Game(headless=True)
+        self.input = self.game.input_source = DirectInput()
+        self.obs = np.zeros((1, OBS_SIZE), dtype=np.float32)
+        self.features = {} # level index -> LevelFeatures
+        self.distance = 0.0
+
+    def reset(self, level_index=None):
+        """Starts an attempt at level_index (the last one by default). Returns the observation."""
+        if level_index is not None: self.level_index = level_index
+        game = self.game
+        with contextlib.redirect_stdout(self.null): game.start_attempt(self.level_index)
+        if self.level_index not in self.features: self.features[self.level_index] = LevelFeatures(game.level_pack.level(self.level_index))
+        self.distance = float(self.features[self.level_index].distance(game.player.rect.x, game.player.rect.y))
+        return self._observe()
+
+    def _observe(self):
+        player = self.game.player
+        self.features[self.level_index].observe(self.obs, [player.rect.x], [player.rect.y], [player.vel.x], [player.vel.y],
+                                                player.on_ground, player.jumps_left, player.wall_sliding,
+                                                player.wall_slide_side, self.game.powerup_active)
+        return self.obs[0].copy()
+
+    def step(self, action):
+        """Returns (observation, reward, done, info) with info 'finished', 'ticks' and 'score'."""
+        game = self.game; bits = ENV_ACTIONS[action]
+        with contextlib.redirect_stdout(self.null):
+            for tick in range(self.frame_skip):
+                self.input.bits = bits if tick == 0 else bits & ~INPUT_JUMP
+                game.update()
+                if game.game_state != STATE_PLAYING: break
+        status = STATE_LEVEL_COMPLETE if game.game_state == STATE_GAME_WON else game.game_state
+        distance = float(self.features[self.level_index].distance(game.player.rect.x, game.player.rect.y))
+        reward = float(rewards(self.distance, distance, np.array(status)))
+        self.distance = distance
+        done = status != STATE_PLAYING or game.level_ticks >= self.max_ticks
+        return self._observe(), reward, done, {'finished': status == STATE_LEVEL_COMPLETE, 'ticks': game.level_ticks,
+                                               'score': game.score}
+
+# --- Many Environments in One Process (batch_physics) ---
+class BatchEnv:
+    def __init__(self, num_envs, level_index=0, max_seconds=ENV_MAX_SECONDS, frame_skip=1, obs=None):
+        """
+        num_envs attempts at one level, stepped together. Finished attempts restart automatically: step()
+        returns their reward and done flag, and the first observation of the next attempt.
+        Args:
+            obs (ndarray): (num_envs, OBS_SIZE) float32 to write observations into (e.g. shared memory).
+        """
+        level = get_level_pack().level(level_index)
+        self.num_envs = num_envs; self.max_ticks = int(max_seconds * PHYSICS_TICK_RATE); self.frame_skip = frame_skip
+        self.batch = BatchPhysics(level, num_envs)
+        self.features = LevelFeatures(level)
+        self.obs = np.zeros((num_envs, OBS_SIZE), dtype=np.float32) if obs is None else obs
+        self.distance = np.zeros(num_envs)
+        self.actions = np.array(ENV_ACTIONS, dtype=np.uint8)
+
+    def reset(self):
+        self.batch.reset(); self.distance[:] = self._distance()
+        return self._observe()
+
+    def _distance(self):
+        return self.features.distance(self.batch.rect[:, 0], self.batch.rect[:, 1])
+
+    def _observe(self):
+        batch = self.batch
+        return self.features.observe(self.obs, batch.rect[:, 0], batch.rect[:, 1], batch.vel[:, 0], batch.vel[:, 1],
+                                     batch.on_ground, batch.jumps_left, batch.wall_sliding, batch.wall_slide_side, batch.powerup)
+
+    def step(self, actions):
+        """actions: one ENV_ACTIONS index per environment. Returns (obs, rewards, dones, info) with info arrays 'finished', 'ticks'."""
+        batch = self.batch; bits = self.actions[np.asarray(actions)]
+        for tick in range(self.frame_skip):
+            batch.step(bits if tick == 0 else bits & ~INPUT_JUMP)
+        distance = self._distance()
+        reward = rewards(self.distance, distance, batch.status).astype(np.float32)
+        done = (batch.status != STATE_PLAYING) | (batch.ticks >= self.max_ticks)
+        info = {'finished': batch.status == STATE_LEVEL_COMPLETE, 'ticks': batch.ticks.copy()}
+        if done.any():
+            batch.reset(done); distance[done] = self._distance()[done]
+        self.distance = distance
+        return self._observe(), reward, done, info
+
+# --- Environments in Worker Processes ---
+def _worker_main(connection, shm_name, num_envs, lo, hi, backend, kwargs):
+    """Steps environments lo:hi of a VectorEnv, reading actions from and writing results to its shared memory."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    obs, actions, reward, done, finished = _shared_views(shm.buf, num_envs)
+    if backend == 'batch': env = BatchEnv(hi - lo, obs=obs[lo:hi], **kwargs); envs = None
+    else: envs = [ShadowEnv(**kwargs) for _ in range(hi - lo)]
+    try:
+        while True:
+            command = connection.recv()
+            if command == 'close': break
+            if envs is None:
+                if command == 'reset': env.reset()
+                else:
+                    _, reward[lo:hi], done[lo:hi], info = env.step(actions[lo:hi]); finished[lo:hi] = info['finished']
+            else:
+                for i, single in enumerate(envs, lo):
+                    if command == 'reset': obs[i] = single.reset(); continue
+                    obs[i], reward[i], done[i], info = single.step(int(actions[i])); finished[i] = info['finished']
+                    if done[i]: obs[i] = single.reset() # Auto-reset, as BatchEnv does
+            connection.send(None)
+    finally:
+        del obs, actions, reward, done, finished
+        shm.close()
+
+def _shared_layout(num_envs):
+    """[(dtype, shape, offset)] of obs, actions, rewards, dones and finished in the shared block, and its size."""
+    layout = []; offset = 0
+    for dtype, shape in ((np.float32, (num_envs, OBS_SIZE)), (np.int64, (num_envs,)), (np.float32, (num_envs,)),
+                         (np.bool_, (num_envs,)), (np.bool_, (num_envs,))):
+        layout.append((dtype, shape, offset))
+        nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize; offset += nbytes + (-nbytes % 8)
+    return layout, offset
+
+def _shared_views(buffer, num_envs):
+    return [np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset) for dtype, shape, offset in _shared_layout(num_envs)[0]]
+
+class VectorEnv:
+    def __init__(self, num_envs, workers=None, backend='batch', **kwargs):
+        """
+        num_envs environments split evenly over worker processes, auto-resetting like BatchEnv.
+        Args:
+            workers (int): Processes (default one per CPU core, at most num_envs).
+            backend (str): 'batch' (BatchEnv per worker, fast) or 'game' (a ShadowEnv per environment).
+            kwargs: level_index, max_seconds and frame_skip for every environment.
+        step() returns arrays in shared memory: they are overwritten by the next step.
+        """
+        self.num_envs = num_envs
+        workers = max(1, min(num_envs, workers or os.cpu_count() or 1))
+        self.shm = shared_memory.SharedMemory(create=True, size=_shared_layout(num_envs)[1])
+        self.obs, self.actions, self.reward, self.done, self.finished = _shared_views(self.shm.buf, num_envs)
+        self.connections = []; self.processes = []
+        bounds = [num_envs * i // workers for i in range(workers + 1)]
+        for lo, hi in zip(bounds, bounds[1:]):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_worker_main, args=(child, self.shm.name, num_envs, lo, hi, backend, kwargs),
+                                              daemon=True)
+            process.start(); self.connections.append(parent); self.processes.append(process)
+
+    def _all(self, command):
+        for connection in self.connections: connection.send(command)
+        for connection in self.connections: connection.recv()
+
+    def reset(self):
+        self._all('reset')
+        return self.obs
+
+    def step(self, actions):
+        self.actions[:] = actions
+        self._all('step')
+        return self.obs, self.reward, self.done, {'finished': self.finished}
+
+    def close(self):
+        if self.shm is None: return
+        for connection in self.connections: connection.send('close')
+        for process in self.processes: process.join()
+        del self.obs, self.actions, self.reward, self.done, self.finished
+        self.shm.close(); self.shm.unlink(); self.shm = None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Training environment throughput.")
+    parser.add_argument('command', choices=('bench',))
+    parser.add_argument('--level', type=int, default=1, help="Level number (1-based)")
+    parser.add_argument('--envs', type=int, default=4096)
+    parser.add_argument('--workers', type=int, default=0, help="Worker processes (0 = BatchEnv in this process)")
+    parser.add_argument('--backend', choices=('batch', 'game'), default='batch')
+    parser.add_argument('--steps', type=int, default=300)
+    args = parser.parse_args()
+    kwargs = {'level_index': args.level - 1}
+    if args.workers: env = VectorEnv(args.envs, args.workers, args.backend, **kwargs)
+    elif args.backend == 'batch': env = BatchEnv(args.envs, **kwargs)
+    else: parser.error("the game backend needs --workers")
+    rng = np.random.default_rng(0)
+    env.reset(); episodes = finished = 0
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        _, _, done, info = env.step(rng.integers(0, len(ENV_ACTIONS), args.envs))
+        episodes += int(done.sum()); finished += int(info['finished'].sum())
+    elapsed = time.perf_counter() - start
+    if args.workers: env.close()
+    print(f"{args.envs} envs x {args.steps} steps ({args.backend}, {args.workers or 'no'} workers): "
+          f"{args.envs * args.steps / elapsed:,.0f} steps/s; {episodes} episodes ended, {finished} at the goal")
@@ -0,0 +1,153 @@
+# ghost.py
+# Best-run "ghost" per level: hitbox position and animation frame for every physics tick.
+import struct
+import sys
+import zlib
+from array import array
+from settings import * # Import all settings
+from render import blit_counter
+
+GHOST_MAGIC = b'SHGH'; GHOST_VERSION = 2
+GHOST_POSITION_TYPES = {1: 'h', 2: 'i'} # Version -> array typecode of the x/y pairs (version 1 was int16)
+GHOST_HEADER = struct.Struct('<4sBHId') # magic, version, level, ticks, level time
+# Frame code byte: bit 7 = facing right, bit 6 = run animation, bits 0-5 = frame index
+FRAME_FACING_RIGHT = 0x80; FRAME_RUN = 0x40; FRAME_INDEX_MASK = 0x3F
+
+def encode_frame(player):
+    code = player.current_frame_index & FRAME_INDEX_MASK
+    if player.facing_right: code |= FRAME_FACING_RIGHT
+    if player.current_action == 'run': code |= FRAME_RUN
+    return code
+
+# --- Ghost (one level's best run) ---
+class Ghost:
+    def __init__(self, level_index, level_time, positions=None, frames=None, packed=None):
+        """
+        Positions are quantized to whole pixels (int32 x/y pairs, as the hitbox rect already is, so streamed
+        worlds wider than int16 fit) and frames are one code byte per tick. Loaded ghosts keep only the zlib-packed payload until first drawn.
+        """
+        self.level_index = level_index
+        self.level_time = level_time
+        self.positions = positions # array('i'): x0, y0, x1, y1, ... (None until decoded)
+        self.frames = frames # array('B'): frame code per tick
+        self.packed = packed
+        self.tick_count = len(frames) if frames is not None else 0
+        self.position_type = 'i' # Of the packed payload; older files are widened on decode
+
+    def decode(self):
+        """Unpacks the payload on first use."""
+        if self.frames is not None or self.packed is None: return
+        raw = zlib.decompress(self.packed)
+        positions = array(self.position_type)
+        frames_offset = self.tick_count * 2 * positions.itemsize
+        positions.frombytes(raw[:frames_offset])
+        if sys.byteorder != 'little': positions.byteswap()
+        self.positions = positions if self.position_type == 'i' else array('i', positions)
+        self.frames = array('B'); self.frames.frombytes(raw[frames_offset:])
+
+    def release(self):
+        """Drops decoded arrays (keeps the packed payload) to bound memory when switching levels."""
+        if self.packed is not None: self.positions = None; self.frames = None
+
+    def to_bytes(self):
+        positions = self.positions
+        if sys.byteorder != 'little': positions = array('i', positions); positions.byteswap()
+        payload = zlib.compress(positions.tobytes() + self.frames.tobytes(), 9)
+        return GHOST_HEADER.pack(GHOST_MAGIC, GHOST_VERSION, self.level_index, self.tick_count,
+                                 self.level_time) + payload
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, level_index, tick_count, level_time = GHOST_HEADER.unpack_from(data)
+        if magic != GHOST_MAGIC or version not in GHOST_POSITION_TYPES: raise ValueError("Not a ghost file")
+        ghost = cls(level_index, level_time, packed=bytes(data[GHOST_HEADER.size:]))
+        ghost.tick_count = tick_count; ghost.position_type = GHOST_POSITION_TYPES[version]
+        return ghost
+
+# --- Ghost Store (lazy per-level files) ---
+class GhostStore:
+    def __init__(self, ghost_dir=GHOST_DIR):
+        self.ghost_dir = ghost_dir
+        self.ghosts = {} # level_index -> Ghost or None (no ghost on disk)
+        self.active_level = None
+
+    def ghost_path(self, level_index):
+        return os.path.join(self.ghost_dir, f"level_{level_index + 1:02}.ghost")
+
+    def get(self, level_index):
+        """The level's best ghost (decoded), or None. Other levels' decoded data is released."""
+        if level_index != self.active_level:
+            previous = self.ghosts.get(self.active_level)
+            if previous is not None: previous.release()
+            self.active_level = level_index
+        if level_index not in self.ghosts:
+            ghost = None
+            path = self.ghost_path(level_index)
+            if os.path.exists(path):
+                try:
+                    with open(path, 'rb') as f: ghost = Ghost.from_bytes(f.read())
+                except (OSError, ValueError, struct.error, zlib.error) as e:
+                    print(f"Warning: Ignoring ghost file {path}: {e}")
+            self.ghosts[level_index] = ghost
+        ghost = self.ghosts[level_index]
+        if ghost is not None: ghost.decode()
+        return ghost
+
+    def submit(self, ghost):
+        """Keeps and saves ghost if it beats the stored one for its level."""
+        best = self.get(ghost.level_index)
+        if best is not None and best.level_time <= ghost.level_time: return False
+        self.ghosts[ghost.level_index] = ghost
+        try:
+            os.makedirs(self.ghost_dir, exist_ok=True)
+            with open(self.ghost_path(ghost.level_index), 'wb') as f: f.write(ghost.to_bytes())
+        except OSError as e:
+            print(f"ERROR: Could not save ghost: {e}")
+        return True
+
+# --- Recorder (hooked into Game.update) ---
+class GhostRecorder:
+    def __init__(self):
+        self.positions = array('i'); self.frames = array('B')
+        self.recording = False
+
+    def record(self, player):
+        """Appends the player's hitbox position and frame after one physics tick."""
+        if not self.recording: self.positions = array('i'); self.frames = array('B'); self.recording = True
+        if len(self.frames) >= GHOST_MAX_TICKS: return # Too long to be a best run worth racing
+        self.positions.append(player.rect.x); self.positions.append(player.rect.y)
+        self.frames.append(encode_frame(player))
+
+    def discard(self):
+        self.recording = False
+
+    def finish(self, level_index, level_time):
+        """Ends the attempt at the goal. Returns it as a Ghost (or None if nothing was recorded)."""
+        if not self.recording or len(self.frames) >= GHOST_MAX_TICKS: self.recording = False; return None
+        self.recording = False
+        return Ghost(level_index, level_time, self.positions, self.frames)
+
+# --- Drawing ---
+def draw_ghost(ghost, player, surface, tick, alpha=1.0, offset=(0, 0)):
+    """
+    Blits the ghost as it was `tick` physics ticks into its run, using the player's own frame lists
+    with temporary surface alpha (no per-frame allocation). offset is the camera's top-left in the world.
+    Returns the drawn rect or None.
+    """
+    if ghost is None or ghost.frames is None or tick <= 0 or tick > ghost.tick_count: return None
+    positions = ghost.positions
+    i = tick - 1; prev = i - 1 if i > 0 else 0
+    x = positions[2 * prev] + (positions[2 * i] - positions[2 * prev]) * alpha
+    y = positions[2 * prev + 1] + (positions[2 * i + 1] - positions[2 * prev + 1]) * alpha
+    code = ghost.frames[i]
+    if code & FRAME_RUN and player.run_frames_r: frame_list = player.run_frames_r if code & FRAME_FACING_RIGHT else player.run_frames_l
+    else: frame_list = player.idle_frames_r if code & FRAME_FACING_RIGHT else player.idle_frames_l
+    if not frame_list: return None
+    image = frame_list[(code & FRAME_INDEX_MASK) % len(frame_list)]
+    image_draw_x = round(x) + player.rect.width // 2 - (PLAYER_WIDTH // 2) - offset[0]
+    image_draw_y = round(y) + player.rect.height - PLAYER_HEIGHT + PLAYER_VISUAL_Y_OFFSET - offset[1]
+    old_alpha = image.get_alpha()
+    image.set_alpha(GHOST_ALPHA)
+    rect = surface.blit(image, (image_draw_x, image_draw_y)); blit_counter.count += 1
+    image.set_alpha(old_alpha)
+    return rect
@@ -0,0 +1,73 @@
+# inputs.py
+import pygame
+from settings import * # Import all settings
+
+JUMP_KEYS = (pygame.K_SPACE, pygame.K_UP, pygame.K_w)
+
+def keys_to_inputs(keys):
+    """Converts a pygame.key.get_pressed() result to held-direction input bits."""
+    bits = 0
+    if keys[pygame.K_LEFT] or keys[pygame.K_a]: bits |= INPUT_LEFT
+    if keys[pygame.K_RIGHT] or keys[pygame.K_d]: bits |= INPUT_RIGHT
+    return bits
+
+# --- Live Keyboard Input ---
+class KeyboardInput:
+    def __init__(self):
+        """Held directions come from the keyboard state, jump presses are queued from KEYDOWN events."""
+        self.jump_pressed = False
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN and event.key in JUMP_KEYS: self.jump_pressed = True
+
+    def next_tick(self):
+        """Returns the input bitmask for the next physics tick."""
+        bits = keys_to_inputs(pygame.key.get_pressed())
+        if self.jump_pressed: bits |= INPUT_JUMP; self.jump_pressed = False
+        return bits
+
+    def reset(self):
+        self.jump_pressed = False
+
+# --- Scripted Input (headless runs, benchmarks) ---
+class ScriptedInput:
+    def __init__(self, runs, loop=True):
+        """
+        Plays back a fixed input script.
+        Args:
+            runs (list): (bits, ticks) pairs, e.g. [(INPUT_RIGHT, 30), (INPUT_RIGHT | INPUT_JUMP, 1)].
+            loop (bool): Start over when the script ends. Otherwise no input is held afterwards.
+        """
+        self.runs = [(bits, ticks) for bits, ticks in runs if ticks > 0]
+        self.loop = loop
+        self.reset()
+
+    def handle_event(self, event):
+        pass # Keyboard events are ignored while scripted
+
+    def next_tick(self):
+        if self.run_index >= len(self.runs):
+            if not self.loop or not self.runs: return 0
+            self.run_index = 0
+        bits, ticks = self.runs[self.run_index]
+        self.tick_in_run += 1
+        if self.tick_in_run >= ticks: self.run_index += 1; self.tick_in_run = 0
+        return bits
+
+    def reset(self):
+        self.run_index = 0; self.tick_in_run = 0
+
+# --- Direct Input (search, training) ---
+class DirectInput:
+    def __init__(self):
+        """Input bits set by code before each update (tas.py, env.py)."""
+        self.bits = 0
+
+    def handle_event(self, event):
+        pass
+
+    def next_tick(self):
+        return self.bits
+
+    def reset(self):
+        self.bits = 0
@@ -0,0 +1,143 @@
+# leaderboard.py
+# Local run history with per-level splits (SQLite, WAL mode). Writes happen on a background thread.
+#   python leaderboard.py [--top 10]
+import argparse
+import queue
+import sqlite3
+import threading
+import time
+from settings import * # Import all settings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    finished_at REAL NOT NULL,
+    total_time REAL NOT NULL,
+    source TEXT NOT NULL DEFAULT 'game'
+);
+CREATE INDEX IF NOT EXISTS runs_by_total ON runs (total_time);
+CREATE TABLE IF NOT EXISTS splits (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    level_index INTEGER NOT NULL,
+    split_time REAL NOT NULL,
+    PRIMARY KEY (run_id, level_index)
+);
+CREATE INDEX IF NOT EXISTS splits_by_level ON splits (level_index, split_time);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+def _connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL") # Safe with WAL; a crash can only lose the latest run
+    return conn
+
+# --- Leaderboard ---
+class Leaderboard:
+    def __init__(self, db_path=LEADERBOARD_DB, legacy_highscore_file=HIGHSCORE_FILE):
+        """
+        Opens (creating if needed) the run database and starts the writer thread. Best total and best
+        splits are cached in memory, so the game never waits on the database after startup.
+        """
+        self.db_path = db_path
+        self.conn = _connect(db_path) # Reads, on the caller's thread
+        self.conn.executescript(SCHEMA)
+        self.migrate_highscore_file(legacy_highscore_file)
+        row = self.conn.execute("SELECT MIN(total_time) FROM runs").fetchone()
+        self.best_total = row[0] if row[0] is not None else float('inf')
+        self.best_splits = dict(self.conn.execute(
+            "SELECT level_index, MIN(split_time) FROM splits GROUP BY level_index").fetchall())
+        self.write_queue = queue.Queue()
+        self.writer = threading.Thread(target=self._writer_loop, name="leaderboard-writer", daemon=True)
+        self.writer.start()
+
+    def migrate_highscore_file(self, path):
+        """
+        One-time import of the single best time from the old highscore.txt. Only marked done once the file
+        was read, so a missing or unopenable file leaves the migration pending for the next start.
+        """
+        if self.conn.execute("SELECT 1 FROM meta WHERE key = 'highscore_migrated'").fetchone(): return
+        score = None
+        try:
+            with open(path, 'r') as f: text = f.read()
+        except OSError:
+            return # Missing or unreadable: try again next time
+        try: score = float(text.strip())
+        except ValueError: print(f"Warning: Ignoring {path}: not a time") # Read but not a time: nothing to migrate
+        with self.conn:
+            if score is not None and 0 < score < float('inf'):
+                self.conn.execute("INSERT INTO runs (finished_at, total_time, source) VALUES (?, ?, ?)",
+                                  (os.path.getmtime(path), score, 'highscore.txt'))
+                print(f"Migrated best time {score:.3f}s from {path}")
+            self.conn.execute("INSERT INTO meta (key, value) VALUES ('highscore_migrated', ?)", (str(time.time()),))
+
+    def _writer_loop(self):
+        conn = _connect(self.db_path) # sqlite3 connections stay on the thread that made them
+        while True:
+            item = self.write_queue.get()
+            try:
+                if item is None: break
+                finished_at, total_time, splits = item
+                with conn:
+                    run_id = conn.execute("INSERT INTO runs (finished_at, total_time) VALUES (?, ?)",
+                                          (finished_at, total_time)).lastrowid
+                    conn.executemany("INSERT INTO splits (run_id, level_index, split_time) VALUES (?, ?, ?)",
+                                     [(run_id, level_index, split) for level_index, split in enumerate(splits)])
+            except sqlite3.Error as e:
+                print(f"ERROR: Could not save run to {self.db_path}: {e}")
+            finally:
+                self.write_queue.task_done()
+        conn.close()
+
+    def submit_run(self, total_time, splits):
+        """Queues a completed run (splits in level order). Returns True if it is a new best total."""
+        new_best = total_time < self.best_total
+        if new_best: self.best_total = total_time
+        for level_index, split in enumerate(splits):
+            if split < self.best_splits.get(level_index, float('inf')): self.best_splits[level_index] = split
+        self.write_queue.put((time.time(), total_time, list(splits)))
+        return new_best
+
+    def best_total_time(self):
+        return self.best_total
+
+    def sum_of_best(self, level_count):
+        """Best possible total from the fastest split of each level (inf until every level has one)."""
+        if any(i not in self.best_splits for i in range(level_count)): return float('inf')
+        return sum(self.best_splits[i] for i in range(level_count))
+
+    def top_runs(self, n=10):
+        """[(total_time, finished_at, [splits...])] fastest first. Waits for queued writes."""
+        self.flush()
+        runs = self.conn.execute("SELECT id, total_time, finished_at FROM runs ORDER BY total_time LIMIT ?",
+                                 (n,)).fetchall()
+        result = []
+        for run_id, total_time, finished_at in runs:
+            splits = [s for (s,) in self.conn.execute(
+                "SELECT split_time FROM splits WHERE run_id = ? ORDER BY level_index", (run_id,))]
+            result.append((total_time, finished_at, splits))
+        return result
+
+    def flush(self):
+        """Blocks until every queued run is written."""
+        self.write_queue.join()
+
+    def close(self):
+        self.write_queue.put(None)
+        self.writer.join()
+        self.conn.close()
+
+
+if __name__ == '__main__':
+    from Game import format_time
+    from levelpack import get_level_pack
+    parser = argparse.ArgumentParser(description="Show the local leaderboard.")
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+    board = Leaderboard(); level_count = len(get_level_pack())
+    for rank, (total_time, finished_at, splits) in enumerate(board.top_runs(args.top), 1):
+        when = time.strftime('%Y-%m-%d %H:%M', time.localtime(finished_at))
+        print(f"{rank:>3}. {format_time(total_time)}  {when}  " + " ".join(format_time(s) for s in splits))
+    print("Best splits: " + " ".join(format_time(board.best_splits.get(i, float('inf'))) for i in range(level_count)))
+    print(f"Sum of best: {format_time(board.sum_of_best(level_count))}")
+    board.close()
@@ -0,0 +1,280 @@
+# levelpack.py
+# Compiled level pack: levels.py converted to flat binary arrays, memory-mapped and read one level at a time.
+# Rebuilt automatically when levels.py or settings.py is newer than the pack.
+#   python levelpack.py build            # Force a rebuild
+#   python levelpack.py info             # Per-level counts
+#   python levelpack.py bench --tiles N  # Compile and load a generated N-tile streamed level
+import argparse
+import mmap
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from settings import * # Import all settings
+
+PACK_MAGIC = b'SHLV'; PACK_VERSION = 2
+PACK_HEADER = struct.Struct('<4sBxHI4x') # magic, version, chunk size, level count (16 bytes, keeps arrays 8-aligned)
+# Per level: source crc, data offset, platforms, collectibles, chunks, chunk refs, movers, mover keys, platform and
+# collectible value types ('i' or 'd'), goal x/y/w/h, player start x/y, world w/h (0 = single screen)
+LEVEL_ENTRY = struct.Struct('<IIIIIIIIcc6x8d')
+CHUNK_FIELDS = 5 # chunk x, chunk y, first coin, coin count, first ref (ref count = next chunk's first ref - this)
+MOVER_FIELDS = 7 # width, height, first key, key count, elevator, crumble hold s, crumble gone s (-1 = doesn't crumble)
+KEY_FIELDS = 3 # seconds, x, y
+
+def level_crc(level_data):
+    """CRC of a levels.py entry as written (replays record it to detect edited layouts)."""
+    return zlib.crc32(repr(level_data).encode())
+
+def _typed_array(rows, width):
+    """Flat array of the rows' values: int32 if every value is an int, else float64 (kept exact either way)."""
+    values = [v for row in rows for v in (tuple(row) + (0,) * (width - len(row)))]
+    return array('i' if all(isinstance(v, int) for v in values) else 'd', values)
+
+def _pad8(out):
+    out.extend(b'\0' * (-len(out) % 8))
+
+def _mover_arrays(movers):
+    """Flat float64 mover records and their keyframes (see MOVER_FIELDS) for a levels.py 'movers' list."""
+    mover_values = array('d'); key_values = array('d')
+    for number, mover in enumerate(movers, 1):
+        keys = mover['keys']
+        if not keys or any(later[0] < earlier[0] for earlier, later in zip(keys, keys[1:])):
+            raise ValueError(f"Mover {number}: needs at least one key, in ascending time order")
+        crumble = mover.get('crumble')
+        if crumble is True: crumble = (MOVER_CRUMBLE_DELAY, MOVER_CRUMBLE_RESPAWN)
+        mover_values.extend((*mover['size'], len(key_values) // KEY_FIELDS, len(keys), bool(mover.get('elevator')),
+                             *(crumble or (-1, -1))))
+        for key in keys: key_values.extend(key)
+    return mover_values, key_values
+
+def compile_levels(levels, chunk_size=WORLD_CHUNK_SIZE):
+    """Pack bytes for a list of levels.py-style dicts."""
+    entries = []; body = bytearray()
+    data_start = PACK_HEADER.size + LEVEL_ENTRY.size * len(levels)
+    for level_data in levels:
+        platforms = list(level_data['platforms']); collectibles = list(level_data['collectibles'])
+        world_width, world_height = level_data.get('world_size', (0, 0))
+        chunks = []; refs = array('i')
+        if world_width <= SCREEN_WIDTH and world_height <= SCREEN_HEIGHT: world_width = world_height = 0 # Single screen
+        else:
+            # Streamed: coins sorted by chunk (contiguous per chunk), platforms referenced from every chunk they touch
+            def chunk_of(x, y): return int(x) // chunk_size, int(y) // chunk_size
+            collectibles.sort(key=lambda c: chunk_of(c[0], c[1])[::-1])
+            members = {}
+            for index, (x, y, w, h) in enumerate(platforms):
+                x0, y0 = chunk_of(x, y); x1, y1 = chunk_of(max(int(x) + int(w), int(x) + 1) - 1, max(int(y) + int(h), int(y) + 1) - 1)
+                for cx in range(x0, x1 + 1):
+                    for cy in range(y0, y1 + 1): members.setdefault((cx, cy), [[], 0, 0])[0].append(index)
+            for index, c in enumerate(collectibles):
+                entry = members.setdefault(chunk_of(c[0], c[1]), [[], 0, 0])
+                if entry[2] == 0: entry[1] = index
+                entry[2] += 1
+            for (cx, cy), (platform_refs, first_coin, coin_count) in sorted(members.items()):
+                chunks.extend((cx, cy, first_coin, coin_count, len(refs))); refs.extend(platform_refs)
+        mover_values, key_values = _mover_arrays(level_data.get('movers', ()))
+        platform_values = _typed_array(platforms, 4); collectible_values = _typed_array(collectibles, 3)
+        chunk_values = array('i', chunks)
+        offset = data_start + len(body)
+        for block in (platform_values, collectible_values, chunk_values, refs, mover_values, key_values):
+            if sys.byteorder != 'little': block = array(block.typecode, block); block.byteswap()
+            body.extend(block.tobytes()); _pad8(body)
+        entries.append(LEVEL_ENTRY.pack(level_crc(level_data), offset, len(platforms), len(collectibles),
+                                        len(chunks) // CHUNK_FIELDS, len(refs), len(mover_values) // MOVER_FIELDS,
+                                        len(key_values) // KEY_FIELDS, platform_values.typecode.encode(),
+                                        collectible_values.typecode.encode(), *level_data['goal'],
+                                        *level_data['player_start'], world_width, world_height))
+    return PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, chunk_size, len(levels)) + b''.join(entries) + bytes(body)
+
+def _number(value):
+    return int(value) if value.is_integer() else value
+
+# --- One Level (views into the pack; nothing is copied until asked for) ---
+class PackedLevel:
+    def __init__(self, data, entry, chunk_size):
+        (self.crc, offset, self.platform_count, self.collectible_count, chunk_count, ref_count, self.mover_count,
+         key_count, platform_type, collectible_type, *numbers) = entry
+        numbers = [_number(v) for v in numbers]
+        self.goal = tuple(numbers[0:4]); self.player_start = tuple(numbers[4:6])
+        self.world_size = tuple(numbers[6:8]) if numbers[6] or numbers[7] else None
+        self.chunk_size = chunk_size
+        views = []
+        for typecode, count in ((platform_type.decode(), self.platform_count * 4),
+                                (collectible_type.decode(), self.collectible_count * 3),
+                                ('i', chunk_count * CHUNK_FIELDS), ('i', ref_count),
+                                ('d', self.mover_count * MOVER_FIELDS), ('d', key_count * KEY_FIELDS)):
+            size = count * struct.calcsize(typecode)
+            views.append(data[offset:offset + size].cast(typecode)); offset += size + (-size % 8)
+        self.platform_values, self.collectible_values, chunk_values, self.refs, self.mover_values, self.key_values = views
+        self.chunk_values = chunk_values; self.chunk_count = chunk_count
+
+    def platform(self, index):
+        """(x, y, width, height) of one platform."""
+        return tuple(self.platform_values[index * 4:index * 4 + 4])
+
+    def platforms(self):
+        values = self.platform_values.tolist()
+        return [tuple(values[i:i + 4]) for i in range(0, len(values), 4)]
+
+    def collectible(self, index):
+        """(x, y, anim phase) of one collectible."""
+        x, y, phase = self.collectible_values[index * 3:index * 3 + 3]
+        return x, y, int(phase)
+
+    def collectibles(self):
+        values = self.collectible_values.tolist()
+        return [(values[i], values[i + 1], int(values[i + 2])) for i in range(0, len(values), 3)]
+
+    def movers(self):
+        """[(width, height, keys, elevator, crumble)]: keys [(seconds, x, y), ...], crumble (hold s, gone s) or None."""
+        values = self.mover_values.tolist(); keys = [_number(v) for v in self.key_values.tolist()]; result = []
+        for i in range(0, len(values), MOVER_FIELDS):
+            width, height, first, count, elevator, hold, gone = values[i:i + MOVER_FIELDS]
+            first = int(first) * KEY_FIELDS; end = first + int(count) * KEY_FIELDS
+            result.append((int(width), int(height), [tuple(keys[k:k + KEY_FIELDS]) for k in range(first, end, KEY_FIELDS)],
+                           bool(elevator), (hold, gone) if hold >= 0 else None))
+        return result
+
+    def chunks(self):
+        """{(chunk_x, chunk_y): (first coin, coin count, first ref, ref count)} for streamed levels."""
+        values = self.chunk_values.tolist(); result = {}
+        for n in range(self.chunk_count):
+            cx, cy, first_coin, coin_count, first_ref = values[n * CHUNK_FIELDS:(n + 1) * CHUNK_FIELDS]
+            next_ref = values[(n + 1) * CHUNK_FIELDS + 4] if n + 1 < self.chunk_count else len(self.refs)
+            result[(cx, cy)] = (first_coin, coin_count, first_ref, next_ref - first_ref)
+        return result
+
+# --- Level Pack ---
+class LevelPack:
+    def __init__(self, data):
+        """
+        Args:
+            data: Pack bytes, or an mmap of the pack file (then only touched pages are ever read).
+        """
+        self.data = memoryview(data)
+        magic, version, self.chunk_size, count = PACK_HEADER.unpack_from(self.data)
+        if magic != PACK_MAGIC or version != PACK_VERSION: raise ValueError(f"Not a version {PACK_VERSION} level pack")
+        self.entries = [LEVEL_ENTRY.unpack_from(self.data, PACK_HEADER.size + i * LEVEL_ENTRY.size) for i in range(count)]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def level(self, index):
+        return PackedLevel(self.data, self.entries[index], self.chunk_size)
+
+    def fingerprint(self, index):
+        return self.entries[index][0]
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as f: return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+def build_level_pack(path=LEVEL_PACK_FILE):
+    """
+    Compiles levels.py into path and returns the level count. The pack is written to a temporary file of its
+    own and renamed over path, so processes loading the pack at once (tas/env worker pools) never see a
+    partial pack or clobber each other's writes.
+    """
+    from levels import LEVELS # Only imported when the pack has to be (re)built
+    data = compile_levels(LEVELS)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f: f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try: os.remove(tmp_path)
+        except OSError: pass
+        raise
+    return len(LEVELS)
+
+def load_level_pack(path=LEVEL_PACK_FILE):
+    """The compiled levels, rebuilt first if missing, outdated or built with another chunk size."""
+    sources = [os.path.join(BASE_DIR, 'levels.py'), os.path.join(BASE_DIR, 'settings.py')]
+    try:
+        stale = os.path.getmtime(path) < max(os.path.getmtime(p) for p in sources if os.path.exists(p))
+        pack = None if stale else LevelPack.open(path)
+        if pack is not None and pack.chunk_size != WORLD_CHUNK_SIZE: pack = None
+    except (OSError, ValueError, struct.error):
+        pack = None
+    if pack is None:
+        try:
+            build_level_pack(path); pack = LevelPack.open(path)
+        except OSError as e: # Read-only install: compile in memory instead
+            print(f"Warning: Could not write level pack {path}: {e}")
+            from levels import LEVELS
+            pack = LevelPack(compile_levels(LEVELS))
+    return pack
+
+_level_pack = None
+
+def get_level_pack():
+    """The game's compiled levels, loaded (and built if needed) on first use, so importing this module touches no files."""
+    global _level_pack
+    if _level_pack is None: _level_pack = load_level_pack()
+    return _level_pack
+
+
+def generate_tile_level(tiles, columns=1000):
+    """Streamed level made of `tiles` 32 px tiles laid out in rows of stepped ledges (for benchmarks)."""
+    platforms = []; collectibles = []
+    rows = (tiles + columns - 1) // columns
+    width = columns * 48 + 200; height = max(SCREEN_HEIGHT, rows * 150 + 200)
+    for i in range(tiles):
+        row, column = divmod(i, columns)
+        x = 100 + column * 48; y = height - 100 - row * 150 - (column % 5) * 16
+        platforms.append((x, y, 32, 32))
+        if column % 10 == 0: collectibles.append((x + 16, y - 30))
+    return {'platforms': platforms, 'collectibles': collectibles, 'goal': (width - 100, height - 170, 50, 70),
+            'player_start': (100, height - 300), 'world_size': (width, height)}
+
+def generate_mover_level(movers, columns=40):
+    """Streamed level with `movers` moving platforms in rows over a long floor: shuttles, lifts, elevators and crumbling ledges in turn (for benchmarks)."""
+    rows = (movers + columns - 1) // columns
+    width = columns * 240 + 400; height = max(SCREEN_HEIGHT, rows * 160 + 400)
+    entries = []
+    for i in range(movers):
+        row, column = divmod(i, columns)
+        x = 200 + column * 240; y = height - 130 - row * 160; kind = i % 4
+        if kind == 0: entries.append({'size': (100, 20), 'keys': [(0, x, y), (2, x + 120, y), (4, x, y)]})
+        elif kind == 1: entries.append({'size': (100, 20), 'keys': [(0, x, y), (1.5, x, y - 60), (3, x, y)]})
+        elif kind == 2: entries.append({'size': (100, 20), 'keys': [(0, x, y), (2, x, y - 120)], 'elevator': True})
+        else: entries.append({'size': (100, 20), 'keys': [(0, x, y)], 'crumble': True})
+    return {'platforms': [(0, height - 40, width, 40)], 'collectibles': [], 'goal': (width - 100, height - 110, 50, 70),
+            'player_start': (100, height - 100), 'world_size': (width, height), 'movers': entries}
+
+
+if __name__ == '__main__':
+    import time
+    parser = argparse.ArgumentParser(description="Build, inspect or benchmark the compiled level pack.")
+    parser.add_argument('command', choices=('build', 'info', 'bench'))
+    parser.add_argument('--tiles', type=int, default=100000, help="Tiles in the generated benchmark level")
+    args = parser.parse_args()
+    if args.command == 'build':
+        count = build_level_pack()
+        print(f"Built {LEVEL_PACK_FILE}: {count} levels, {os.path.getsize(LEVEL_PACK_FILE) / 1024:.1f} KB")
+    elif args.command == 'info':
+        pack = get_level_pack()
+        for i in range(len(pack)):
+            level = pack.level(i)
+            print(f"Level {i + 1}: {level.platform_count} platforms, {level.collectible_count} collectibles, "
+                  f"{level.mover_count} movers, {level.chunk_count} chunks, world {level.world_size or 'single screen'}, crc {level.crc:08x}")
+    else:
+        import contextlib
+        import Game
+        data = compile_levels([generate_tile_level(args.tiles)])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.pack')
+            with open(path, 'wb') as f: f.write(data)
+            with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null):
+                game = Game.Game(headless=True)
+                start = time.perf_counter()
+                pack = LevelPack.open(path); game.level_pack = pack
+                opened = time.perf_counter()
+                game.load_level(0)
+                loaded = time.perf_counter()
+            print(f"{args.tiles} tiles, {len(data) / 1024:.0f} KB pack: opened in {(opened - start) * 1000:.2f} ms, "
+                  f"load_level in {(loaded - opened) * 1000:.1f} ms ({len(game.world.loaded)} chunks, "
+                  f"{len(game.platforms)} platforms loaded)")
+            del game, pack
+        pygame.quit()
@@ -9,7 +9,13 @@ GOAL_H = 70
 # Standard distance collectibles float above platform tops
 COLLECT_OFFSET = 30
 
-# Structure: {'platforms': [...], 'collectibles': [...], 'goal': (x, y, w, h), 'player_start': (x, y)}
+# Structure: {'platforms': [...], 'collectibles': [(x, y[, anim phase]), ...], 'goal': (x, y, w, h), 'player_start': (x, y)}
+# Optional 'world_size': (w, h) for levels bigger than the screen. Compiled into the level pack (levelpack.get_level_pack()) on first run after editing.
+# Optional 'movers': [{'size': (w, h), 'keys': [(seconds, x, y), ...][, 'elevator': True][, 'crumble': True or (hold s, gone s)]}]
+#   keys: top-left keyframes, moved between linearly and looped over the last key's time (end where you started for a
+#   closed loop; one key = stays put). Elevators only run along their keys while ridden and back again when not.
+#   Crumbling platforms give way a moment after being landed on and come back later (MOVER_CRUMBLE_* in settings.py).
+#   e.g. {'size': (120, 20), 'keys': [(0, 300, 500), (2, 600, 500), (4, 300, 500)]} # Shuttles right and back every 4 s
 LEVELS = [
     # Level 1 (Original - Adjusted Goal Size)
     {
@@ -1,12 +1,24 @@
 # main.py
+#   python main.py                           # Play
+#   python main.py --trace session.json      # Play with tracing on; Chrome trace written on exit
+#   python main.py --log-level DEBUG         # Also log per-tick events (coins, power-ups)
+import argparse
 import Game
 import sys
 from settings import *
+from tracing import TRACER, log, set_log_level
 
 
 # --- Main Execution ---
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="The Way of the Shadow")
+    parser.add_argument('--trace', metavar='PATH', help="Record spans/counters and write a Chrome trace here on exit")
+    parser.add_argument('--log-level', default=LOG_LEVEL, help="DEBUG, INFO, WARNING or ERROR")
+    args = parser.parse_args()
+    set_log_level(args.log_level)
+    if args.trace: TRACER.start()
     game = Game.Game()
     game.run()
+    if args.trace and TRACER.enabled: log.info("Trace saved: %s (%d events)", args.trace, TRACER.export_chrome(args.trace))
     pygame.quit()
     sys.exit()
@@ -0,0 +1,98 @@
+# profiler.py
+# Frame-time profiler behind the F3 overlay: rolling frame times, percentiles, per-phase cost, blits and sprite counts.
+import time
+from array import array
+from settings import * # Import all settings
+from render import blit_counter
+from ui import get_glyph_atlas, PROFILER_GLYPHS
+
+PHASES = ('events', 'update', 'draw', 'flip')
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile (q in 0..1) of an already sorted sequence."""
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))] if sorted_values else 0.0
+
+# --- Frame Profiler ---
+class FrameProfiler:
+    def __init__(self, history=PROFILER_HISTORY_FRAMES):
+        """
+        Rolling per-frame timings in preallocated arrays (nothing is allocated per frame). Timing is always
+        recorded, so the overlay shows a full history as soon as it is opened.
+        Args:
+            history (int): Frames kept; also the graph's width in pixels.
+        """
+        self.size = history
+        self.frame_ms = array('d', bytes(8 * history)) # Whole frame, including the wait in clock.tick
+        self.work_ms = array('d', bytes(8 * history)) # events + update + draw (+ flip)
+        self.phase_ms = [array('d', bytes(8 * history)) for _ in PHASES]
+        self.index = 0 # Slot the next frame goes into
+        self.count = 0 # Slots filled so far
+        self.flip_seconds = 0.0 # Added by whoever presents the frame, taken out of draw's time
+        self.blits = 0 # Blits in the last frame, not counting the overlay's own
+        self.visible = False
+        self.lines = [] # Stats text, refreshed every PROFILER_REFRESH_MS
+        self.next_refresh = 0.0
+        self.graph = pygame.Surface((history, PROFILER_GRAPH_HEIGHT))
+        self.panel = None # Translucent backing, built on first draw
+
+    def toggle(self):
+        self.visible = not self.visible
+        if self.visible: self.redraw_graph(); self.next_refresh = 0.0
+
+    def end_frame(self, frame_ms, events, update, draw):
+        """Records one frame. events/update/draw are seconds; draw includes any flip_seconds added during it."""
+        flip = self.flip_seconds; self.flip_seconds = 0.0
+        i = self.index
+        self.frame_ms[i] = frame_ms
+        self.work_ms[i] = (events + update + draw) * 1000.0
+        for buffer, seconds in zip(self.phase_ms, (events, update, draw - flip, flip)): buffer[i] = seconds * 1000.0
+        self.index = (i + 1) % self.size
+        if self.count < self.size: self.count += 1
+        self.blits = blit_counter.count; blit_counter.count = 0
+        if self.visible: self.graph.scroll(-1, 0); self.draw_column(self.size - 1, i)
+
+    # --- Overlay ---
+    def draw_column(self, x, i):
+        """One graph column: frame time in gray (red over budget), the busy part of it in green."""
+        height = PROFILER_GRAPH_HEIGHT; scale = height / PROFILER_GRAPH_MAX_MS
+        budget = 1000.0 / FPS
+        self.graph.fill(PROFILER_GRAPH_BG, (x, 0, 1, height))
+        frame_px = min(height, round(self.frame_ms[i] * scale)); work_px = min(frame_px, round(self.work_ms[i] * scale))
+        self.graph.fill(RED if self.frame_ms[i] > budget * 1.5 else GRAY, (x, height - frame_px, 1, frame_px))
+        self.graph.fill(GREEN, (x, height - work_px, 1, work_px))
+        self.graph.set_at((x, height - 1 - min(height - 1, round(budget * scale))), YELLOW) # Frame budget line
+
+    def redraw_graph(self):
+        self.graph.fill(PROFILER_GRAPH_BG)
+        for age in range(self.count): # Newest frame at the right edge
+            self.draw_column(self.size - 1 - age, (self.index - 1 - age) % self.size)
+
+    def refresh_lines(self, sprite_counts):
+        n = self.count
+        frames = sorted(self.frame_ms[:n]) # Slots fill from 0, so the first n are always the live ones
+        phases = "  ".join(f"{name} {sum(buffer) / max(n, 1):.2f}" for name, buffer in zip(PHASES, self.phase_ms))
+        self.lines = [
+            f"frame ms  p50 {percentile(frames, 0.5):.1f}  p95 {percentile(frames, 0.95):.1f}  p99 {percentile(frames, 0.99):.1f}",
+            f"avg ms  {phases}",
+            f"blits {self.blits}  " + "  ".join(f"{name} {count}" for name, count in sprite_counts())]
+
+    def draw(self, screen, font, sprite_counts):
+        """
+        Draws the panel in the bottom-left corner and returns its rect. sprite_counts() gives (name, count)
+        pairs; it is only called when the text refreshes. The overlay's own blits are not counted.
+        """
+        blits_before = blit_counter.count
+        now = time.perf_counter()
+        if now >= self.next_refresh: self.refresh_lines(sprite_counts); self.next_refresh = now + PROFILER_REFRESH_MS / 1000.0
+        atlas = get_glyph_atlas(font, WHITE, PROFILER_GLYPHS)
+        line_height = font.get_height()
+        if self.panel is None:
+            self.panel = pygame.Surface((PROFILER_PANEL_WIDTH, PROFILER_GRAPH_HEIGHT + 3 * line_height + 16), pygame.SRCALPHA)
+            self.panel.fill((0, 0, 0, 170))
+        rect = self.panel.get_rect(bottomleft=(10, SCREEN_HEIGHT - 10))
+        screen.blit(self.panel, rect)
+        screen.blit(self.graph, (rect.x + 6, rect.y + 6))
+        y = rect.y + PROFILER_GRAPH_HEIGHT + 10
+        for line in self.lines: atlas.draw(line, screen, rect.x + 6, y); y += line_height
+        blit_counter.count = blits_before
+        return rect
@@ -0,0 +1,330 @@
+# reachability.py
+# Offline check that each level can be finished, and each coin reached, under the movement constants
+# in settings.py. Jump arcs are precomputed as envelopes (every air-jump timing, any steering), then
+# linked into a graph between the surfaces a player can stand on and the walls they can slide down.
+# Envelopes ignore whatever is in the way, so they over-approximate: anything reported unreachable
+# really is, and the completion times are true lower bounds.
+#   python reachability.py                 # All levels (exit status 1 if a goal or coin is unreachable)
+#   python reachability.py --level 3 -v    # One level, listing its graph
+#   python reachability.py --powerup       # Assume the speed/jump power-up is active throughout
+import argparse
+import heapq
+import sys
+import time
+from settings import * # Import all settings
+from levelpack import get_level_pack
+from sprites import TickPhysics
+
+AIR_JUMP_WINDOW = PHYSICS_TICK_RATE * 3 // 2 # Air jumps are tried at every tick up to this long after launch
+PHYSICS = TickPhysics(1.0 / PHYSICS_TICK_RATE) # Movement settings per tick, as the Player uses them
+DISTANCE_CELL = 10 # Pixels per cell of distance fields (tas.py steers towards its next node by them, env.py towards the goal)
+
+def _merge(ranges):
+    """Sorted (lo, hi) ranges with overlapping ones joined."""
+    merged = []
+    for lo, hi in sorted(ranges):
+        if merged and lo <= merged[-1][1] + 1: merged[-1][1] = max(merged[-1][1], hi)
+        else: merged.append([lo, hi])
+    return [tuple(r) for r in merged]
+
+def _subtract(lo, hi, holes):
+    """Parts of the integer range [lo, hi] not covered by any (lo, hi) hole."""
+    parts = []
+    for hole_lo, hole_hi in _merge(holes):
+        if hole_hi < lo or hole_lo > hi: continue
+        if hole_lo > lo: parts.append((lo, hole_lo - 1))
+        lo = max(lo, hole_hi + 1)
+    if lo <= hi: parts.append((lo, hi))
+    return parts
+
+# --- Jump Envelopes ---
+class JumpEnvelope:
+    def __init__(self, vx_range, vy, air_jumps, depth, powerup=False):
+        """
+        Where the hitbox can be t ticks after leaving a surface or wall, relative to where it left.
+        Mirrors Player.jump()/update(): jumps set the vertical speed before the tick's movement,
+        gravity and the run speed cap apply every tick, and the fall speed is capped after moving.
+
+        Args:
+            vx_range (tuple): Lowest and highest horizontal speed at launch.
+            vy (float): Vertical speed at launch (a jump's power, or 0 for walking off an edge).
+            air_jumps (int): Double jumps still available.
+            depth (int): Arcs are followed until the feet are this far below the launch point.
+
+        Per tick t: dx_min[t]/dx_max[t] bound the horizontal offset, body[t] is the (highest, lowest)
+        feet offset, and falls[t] the merged (lo, hi) feet offsets swept while moving down that tick.
+        """
+        jump_mult = POWERUP_JUMP_MULTIPLIER if powerup else 1.0
+        speed_mult = POWERUP_SPEED_MULTIPLIER if powerup else 1.0
+        self.double_jump = PHYSICS.double_jump_power * jump_mult
+        self.depth = depth
+        self.body = []; falls = []
+        self._follow(0, 0.0, vy, air_jumps, falls)
+        self.falls = [_merge(ranges) for ranges in falls]
+        ticks = len(self.body)
+        self.dx_min = self._steer(vx_range[0], -1, ticks, PHYSICS.acc * speed_mult, PHYSICS.max_run_speed * speed_mult)
+        self.dx_max = self._steer(vx_range[1], 1, ticks, PHYSICS.acc * speed_mult, PHYSICS.max_run_speed * speed_mult)
+        flat = [r for ranges in self.falls for r in ranges]
+        self.fall_bounds = (min(r[0] for r in flat), max(r[1] for r in flat)) if flat else (0, -1)
+
+    def _follow(self, t, y, vy, jumps, falls):
+        """Records one arc from tick t, branching into an air jump at every tick it could be taken."""
+        first = True
+        while y <= self.depth:
+            if jumps and not first and t < AIR_JUMP_WINDOW: self._follow(t, y, self.double_jump, jumps - 1, falls)
+            first = False
+            vy += PHYSICS.gravity
+            new_y = y + vy + 0.5 * PHYSICS.gravity
+            if t == len(self.body): self.body.append([new_y, new_y]); falls.append([])
+            body = self.body[t]
+            if new_y < body[0]: body[0] = new_y
+            elif new_y > body[1]: body[1] = new_y
+            if vy > 0: falls[t].append((int(y), int(new_y + 0.999)))
+            vy = min(vy, PHYSICS.max_fall_speed); y = new_y; t += 1
+
+    @staticmethod
+    def _steer(vx, direction, ticks, acc, cap):
+        """Horizontal offset after each tick while holding one direction (the extreme of what steering allows)."""
+        offsets = []; x = 0.0; ax = acc * direction
+        for _ in range(ticks):
+            vx = max(-cap, min(cap, vx + ax))
+            if abs(vx) < PHYSICS.stop_speed: vx = 0
+            x += vx + 0.5 * ax; offsets.append(x)
+        return offsets
+
+    def first_fall(self, x_range, y_range, target_x, target_y):
+        """
+        First tick (1-based) at which a launch from anywhere in x_range/y_range can be moving down
+        through feet height target_y with its left edge in target_x (all inclusive ranges), or None.
+        """
+        (x0, x1), (y0, y1) = x_range, y_range
+        if target_y[1] < self.fall_bounds[0] + y0 or target_y[0] > self.fall_bounds[1] + y1: return None
+        for t, ranges in enumerate(self.falls):
+            if x0 + self.dx_min[t] > target_x[1] or x1 + self.dx_max[t] < target_x[0]: continue
+            for lo, hi in ranges:
+                if lo + y0 < target_y[1] and hi + y1 >= target_y[0]: return t + 1
+        return None
+
+    def first_touch(self, x_range, y_range, target_x, target_y):
+        """First tick at which the hitbox's left edge can be in target_x and its feet in target_y, or None."""
+        (x0, x1), (y0, y1) = x_range, y_range
+        for t, (top, bottom) in enumerate(self.body):
+            if x0 + self.dx_min[t] > target_x[1] or x1 + self.dx_max[t] < target_x[0]: continue
+            if top + y0 <= target_y[1] and bottom + y1 >= target_y[0]: return t + 1
+        return None
+
+def build_envelopes(depth, powerup=False):
+    """The launches the analyzer follows: jumping or walking off a surface, and jumping or dropping off a wall."""
+    speed = PHYSICS.max_run_speed * (POWERUP_SPEED_MULTIPLIER if powerup else 1.0)
+    jump_mult = POWERUP_JUMP_MULTIPLIER if powerup else 1.0
+    wall_jump = PHYSICS.wall_jump_y_power * jump_mult
+    return {
+        'jump': JumpEnvelope((-speed, speed), PHYSICS.jump_power * jump_mult, 1, depth, powerup),
+        'walk off': JumpEnvelope((-speed, speed), 0, 2, depth, powerup),
+        'wall jump left': JumpEnvelope((-PHYSICS.wall_jump_x_power,) * 2, wall_jump, 1, depth, powerup),
+        'wall jump right': JumpEnvelope((PHYSICS.wall_jump_x_power,) * 2, wall_jump, 1, depth, powerup),
+        'wall drop': JumpEnvelope((0, 0), PHYSICS.wall_slide_speed, 1, depth, powerup),
+    }
+
+# --- Level Graph ---
+class LevelGraph:
+    def __init__(self, level, envelopes):
+        """
+        Reachability graph of one levelpack.PackedLevel. Nodes are (x_range, y_range, side): the range
+        of hitbox left edges and feet heights of a place the player can stay, with side 0 for standing
+        on a surface and -1/1 for sliding down a wall on the player's left/right.
+        Edges map node -> {node: fewest ticks in the air}.
+        """
+        self.level = level
+        self.envelopes = envelopes
+        self.platforms = [tuple(int(v) for v in p) for p in level.platforms()]
+        self.nodes = self.find_surfaces() + self.find_walls()
+        self.edges = {node: {} for node in self.nodes}
+        for node in self.nodes:
+            for target in self.nodes:
+                if target is node: continue
+                ticks = self.travel_ticks(node, target)
+                if ticks is not None: self.edges[node][target] = ticks
+        self.start = self.find_start()
+
+    def blocked(self, left=None, feet=None):
+        """(lo, hi) ranges at which the hitbox would overlap a platform: of left edges at feet height feet,
+        or of feet heights at left edge left."""
+        holes = []
+        for x, y, w, h in self.platforms:
+            lefts = (x - PLAYER_HITBOX_WIDTH + 1, x + w - 1); feet_range = (y + 1, y + h + PLAYER_HITBOX_HEIGHT - 1)
+            if left is not None and lefts[0] <= left <= lefts[1]: holes.append(feet_range)
+            elif feet is not None and feet_range[0] <= feet <= feet_range[1]: holes.append(lefts)
+        return holes
+
+    def find_surfaces(self):
+        """Stretches of platform tops with room to stand."""
+        nodes = []
+        for x, y, w, h in self.platforms:
+            for part in _subtract(x - PLAYER_HITBOX_WIDTH + 1, x + w - 1, self.blocked(feet=y)):
+                nodes.append((part, (y, y), 0))
+        return nodes
+
+    def find_walls(self):
+        """Stretches of platform sides the hitbox can press against while airborne."""
+        nodes = []
+        for x, y, w, h in self.platforms:
+            for left, side in ((x - PLAYER_HITBOX_WIDTH, 1), (x + w, -1)):
+                for part in _subtract(y + 1, y + h + PLAYER_HITBOX_HEIGHT - 1, self.blocked(left=left)):
+                    nodes.append(((left, left), part, side))
+        return nodes
+
+    def launches(self, node):
+        if node[2] == 0: return ('jump', 'walk off')
+        return ('wall jump left' if node[2] == 1 else 'wall jump right', 'wall drop')
+
+    def travel_ticks(self, node, target):
+        """Fewest ticks in the air from node to target, or None if no arc connects them."""
+        x_range, y_range, side = target
+        if side == 1 and node[0][0] > x_range[0]: return None # A wall on the right is reached from its left
+        if side == -1 and node[0][1] < x_range[0]: return None
+        best = None
+        for launch in self.launches(node):
+            ticks = self.envelopes[launch].first_fall(node[0], node[1], x_range, y_range)
+            if ticks is not None and (best is None or ticks < best): best = ticks
+        return best
+
+    def touch_ticks(self, node, rect):
+        """Fewest ticks from node until the hitbox overlaps rect (0 if it can already), or None."""
+        x, y, w, h = rect
+        target_x = (x - PLAYER_HITBOX_WIDTH + 1, x + w - 1); target_y = (y + 1, y + h + PLAYER_HITBOX_HEIGHT - 1)
+        (x0, x1), (y0, y1), _ = node
+        if x0 <= target_x[1] and x1 >= target_x[0] and y0 <= target_y[1] and y1 >= target_y[0]: return 0
+        best = None
+        for launch in self.launches(node):
+            ticks = self.envelopes[launch].first_touch(node[0], node[1], target_x, target_y)
+            if ticks is not None and (best is None or ticks < best): best = ticks
+        return best
+
+    def find_start(self):
+        """Node the player is snapped onto at the start (as in Player.reset), or a walk-off from thin air."""
+        x, y = (int(v) for v in self.level.player_start)
+        centerx = x + PLAYER_HITBOX_WIDTH // 2
+        below = [p for p in self.platforms if p[0] < centerx < p[0] + p[2] and p[1] >= y]
+        if below:
+            top = min(p[1] for p in below)
+            for node in self.nodes:
+                if node[2] == 0 and node[1][0] == top and node[0][0] <= x <= node[0][1]: return node
+        node = ((x, x), (y + PLAYER_HITBOX_HEIGHT,) * 2, 0)
+        self.edges[node] = {target: ticks for target in self.nodes
+                            if (ticks := self.travel_ticks(node, target)) is not None}
+        return node
+
+    def shortest_ticks(self):
+        """Fewest ticks in the air to get from the start to each reachable node (Dijkstra)."""
+        best = {self.start: 0}; queue = [(0, 0, self.start)]; order = 1
+        while queue:
+            ticks, _, node = heapq.heappop(queue)
+            if ticks > best[node]: continue
+            for target, cost in self.edges[node].items():
+                if ticks + cost < best.get(target, float('inf')):
+                    best[target] = ticks + cost; heapq.heappush(queue, (ticks + cost, order, target)); order += 1
+        return best
+
+    def analyze(self):
+        """
+        Dict with 'nodes', 'edges', 'unreachable_coins' [(x, y), ...], 'goal_reachable' and
+        'min_time' (seconds, None if the goal is unreachable).
+        """
+        reached = self.shortest_ticks()
+        half_w, half_h = COLLECTIBLE_WIDTH // 2, COLLECTIBLE_HEIGHT // 2
+        unreachable_coins = []
+        for cx, cy, _ in self.level.collectibles():
+            rect = (int(cx) - half_w, int(cy) - half_h, COLLECTIBLE_WIDTH, COLLECTIBLE_HEIGHT)
+            if not any(self.touch_ticks(node, rect) is not None for node in reached): unreachable_coins.append((cx, cy))
+        goal_ticks = None
+        for node, ticks in reached.items():
+            touch = self.touch_ticks(node, tuple(int(v) for v in self.level.goal))
+            if touch is not None and (goal_ticks is None or ticks + touch < goal_ticks): goal_ticks = ticks + touch
+        min_time = None
+        if goal_ticks is not None:
+            # Walking along surfaces isn't counted in the graph, so also bound by the straight-line run
+            start_x = self.start[0][0]; gx, _, gw, _ = self.level.goal
+            gap = max(0, gx - PLAYER_HITBOX_WIDTH - start_x, start_x - (gx + gw))
+            speed = self.envelopes['jump'].dx_max[0] # Best first-tick run speed
+            min_time = max(goal_ticks, gap / speed) / PHYSICS_TICK_RATE
+        return {'nodes': len(self.nodes), 'edges': sum(len(e) for e in self.edges.values()),
+                'unreachable_coins': unreachable_coins, 'goal_reachable': goal_ticks is not None, 'min_time': min_time}
+
+# --- Distance Fields ---
+def goal_region(level):
+    """(left edge range, feet range) at which the hitbox overlaps the level's goal."""
+    gx, gy, gw, gh = (int(v) for v in level.goal)
+    return (gx - PLAYER_HITBOX_WIDTH + 1, gx + gw - 1), (gy + 1, gy + gh + PLAYER_HITBOX_HEIGHT - 1)
+
+def distance_field(level, target, cell=DISTANCE_CELL):
+    """
+    (width, height, distances) over cells of the level: distances[y * width + x] is the shortest free
+    path in pixels from a hitbox with its top-left in cell (x, y) to target (left edge range, feet
+    range), ignoring physics except that climbing counts double. Cells the hitbox can't occupy are None.
+    Unlike the plan's edges this routes around platforms, so it says which way to head for the target.
+    """
+    world_w, world_h = level.world_size or (SCREEN_WIDTH, SCREEN_HEIGHT)
+    width = world_w // cell + 1; height = world_h // cell + 1
+    free = bytearray(b'\1') * (width * height)
+    for x, y, w, h in level.platforms(): # Top-lefts where the hitbox would overlap the platform
+        x0 = max(0, int(x - PLAYER_HITBOX_WIDTH) // cell + 1); x1 = min(width - 1, int(x + w - 1) // cell)
+        y0 = max(0, int(y - PLAYER_HITBOX_HEIGHT) // cell + 1); y1 = min(height - 1, int(y + h - 1) // cell)
+        for cy in range(y0, y1 + 1): free[cy * width + x0:cy * width + x1 + 1] = b'\0' * max(0, x1 - x0 + 1)
+    distances = [None] * (width * height); queue = []
+    for index in region_cells((width, height), target, cell):
+        if free[index]: distances[index] = 0; queue.append((0, index))
+    while queue:
+        dist, index = heapq.heappop(queue)
+        if dist > distances[index]: continue
+        cx, cy = index % width, index // width
+        # Searched backwards from the target: stepping down here is climbing up for the player
+        for nx, ny, cost in ((cx - 1, cy, cell), (cx + 1, cy, cell), (cx, cy - 1, cell), (cx, cy + 1, 2 * cell)):
+            if not (0 <= nx < width and 0 <= ny < height) or not free[ny * width + nx]: continue
+            n = ny * width + nx
+            if distances[n] is None or dist + cost < distances[n]:
+                distances[n] = dist + cost; heapq.heappush(queue, (dist + cost, n))
+    return width, height, distances
+
+def region_cells(size, target, cell=DISTANCE_CELL):
+    """Cell indices covering target (left edge range, feet range), clamped to the grid."""
+    width, height = size
+    (left_lo, left_hi), (feet_lo, feet_hi) = target
+    def clamp(v, limit): return min(max(int(v) // cell, 0), limit - 1)
+    return [cy * width + cx for cy in range(clamp(feet_lo - PLAYER_HITBOX_HEIGHT, height), clamp(feet_hi - PLAYER_HITBOX_HEIGHT, height) + 1)
+            for cx in range(clamp(left_lo, width), clamp(left_hi, width) + 1)]
+
+def analyze_levels(indices=None, powerup=False):
+    """(level index, LevelGraph) for the given level indices (all by default), sharing one set of envelopes."""
+    pack = get_level_pack()
+    indices = range(len(pack)) if indices is None else indices
+    levels = [pack.level(i) for i in indices]
+    depth = max((level.world_size or (SCREEN_WIDTH, SCREEN_HEIGHT))[1] for level in levels) + PLAYER_HITBOX_HEIGHT + 50
+    envelopes = build_envelopes(depth, powerup)
+    return [(i, LevelGraph(level, envelopes)) for i, level in zip(indices, levels)]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Check every level can be finished and every coin reached.")
+    parser.add_argument('--level', type=int, help="Level number (1-based); all levels by default")
+    parser.add_argument('--powerup', action='store_true', help="Use the power-up's speed and jump multipliers")
+    parser.add_argument('-v', '--verbose', action='store_true', help="List each level's graph")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    indices = None if args.level is None else [args.level - 1]
+    problems = 0
+    for index, graph in analyze_levels(indices, args.powerup):
+        result = graph.analyze()
+        goal = f"goal reachable, at least {result['min_time']:.2f}s" if result['goal_reachable'] else "GOAL UNREACHABLE"
+        movers = graph.level.mover_count # Only static platforms are modelled, so these levels don't fail the check
+        print(f"Level {index + 1}: {result['nodes']} nodes, {result['edges']} edges; {goal}; "
+              f"{len(result['unreachable_coins'])} unreachable coins {result['unreachable_coins'] or ''}"
+              + (f"; {movers} moving platforms ignored, not counted" if movers else ""))
+        if args.verbose:
+            for node, targets in graph.edges.items():
+                kind = 'surface' if node[2] == 0 else 'wall'
+                print(f"  {kind} x {node[0]} y {node[1]} -> {len(targets)}: "
+                      + ", ".join(f"({t[0][0]},{t[1][0]}) {ticks}t" for t, ticks in sorted(targets.items())))
+        if not movers: problems += len(result['unreachable_coins']) + (not result['goal_reachable'])
+    print(f"Analyzed in {time.perf_counter() - start:.2f}s")
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,45 @@
+# render.py
+import pygame
+from settings import * # Import all settings
+from tracing import TRACER
+
+# --- Blit Accounting (read by the profiler overlay) ---
+class BlitCounter:
+    """Blits issued since the last frame. Drawing code adds to count; the profiler reads and resets it."""
+    __slots__ = ('count',)
+    def __init__(self): self.count = 0
+
+blit_counter = BlitCounter()
+
+# --- Dirty-Rectangle Renderer ---
+class DirtyRectRenderer:
+    def __init__(self):
+        """
+        Partial-redraw helper for scenes drawn over a cached static layer. Each frame it restores
+        last frame's dynamic regions from the layer and pushes only old + new regions to the display.
+        """
+        self.last_rects = []  # Screen regions covered by dynamic content last frame
+        self.scene = None  # Layer the last frame was drawn over
+        self.needs_full_redraw = True
+
+    def invalidate(self):
+        """Forces the next frame to redraw and flip the whole screen (state change, window exposed, ...)."""
+        self.needs_full_redraw = True
+
+    def begin_frame(self, screen, layer):
+        """Prepares the screen for drawing dynamic content. Returns True if this frame is a full redraw."""
+        if self.needs_full_redraw or layer is not self.scene:
+            self.scene = layer; self.needs_full_redraw = False; self.last_rects = []
+            screen.blit(layer, (0, 0)); blit_counter.count += 1
+            return True
+        for rect in self.last_rects: screen.blit(layer, rect, rect)
+        blit_counter.count += len(self.last_rects)
+        return False
+
+    def end_frame(self, drawn_rects, full_redraw, present=True):
+        """Sends the changed regions to the display and remembers what to restore next frame."""
+        if present:
+            with TRACER.span('display.flip'):
+                if full_redraw: pygame.display.flip()
+                else: pygame.display.update(self.last_rects + drawn_rects)
+        self.last_rects = drawn_rects
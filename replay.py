@@ -0,0 +1,207 @@
+# replay.py
+# Deterministic per-attempt input recordings and a headless verifier.
+#   python replay.py verify replays/*.rpl
+#   python replay.py info replays/level_01_best.rpl
+import argparse
+import contextlib
+import glob
+import struct
+import sys
+import time
+import zlib
+from settings import * # Import all settings
+from inputs import ScriptedInput
+from levelpack import get_level_pack
+
+REPLAY_MAGIC = b'SHRP'; REPLAY_VERSION = 1
+# magic, version, level, tick rate, physics crc, level crc, start coins, start boost active,
+# start boost remaining ms, ticks, recorded level time
+REPLAY_HEADER = struct.Struct('<4sBHHIIBBdId')
+
+def physics_fingerprint():
+    """CRC of every constant that affects simulation, so replays from other tunings can be spotted."""
+    return zlib.crc32(repr((PHYSICS_TICK_RATE, PLAYER_HITBOX_WIDTH, PLAYER_HITBOX_HEIGHT, PLAYER_ACC,
+                            PLAYER_FRICTION, PLAYER_GRAVITY, PLAYER_JUMP_POWER, PLAYER_DOUBLE_JUMP_POWER,
+                            PLAYER_WALL_SLIDE_SPEED, PLAYER_WALL_JUMP_X_POWER, PLAYER_WALL_JUMP_Y_POWER,
+                            MAX_FALL_SPEED, MAX_RUN_SPEED, COINS_NEEDED_FOR_POWERUP, POWERUP_INITIAL_DURATION,
+                            POWERUP_EXTENSION_PER_COIN, POWERUP_SPEED_MULTIPLIER,
+                            POWERUP_JUMP_MULTIPLIER, CCD_MAX_STEP_X, CCD_MAX_STEP_Y,
+                            MOVER_CRUMBLE_DELAY, MOVER_CRUMBLE_RESPAWN)).encode())
+
+def level_fingerprint(level_index):
+    return get_level_pack().fingerprint(level_index) # CRC of the levels.py entry, stored when the pack was compiled
+
+def _write_varint(out, value):
+    while value >= 0x80: out.append((value & 0x7F) | 0x80); value >>= 7
+    out.append(value)
+
+def _read_varint(data, offset):
+    value = 0; shift = 0
+    while True:
+        byte = data[offset]; offset += 1
+        value |= (byte & 0x7F) << shift; shift += 7
+        if byte < 0x80: return value, offset
+
+# --- Replay (one level attempt) ---
+class Replay:
+    def __init__(self, level_index, runs=None, start_coins=0, start_powerup_active=False,
+                 start_powerup_remaining_ms=0.0, level_time=-1.0, tick_rate=PHYSICS_TICK_RATE,
+                 physics_crc=None, level_crc=None):
+        """
+        Input for one attempt at a level, stored as run-length encoded per-tick INPUT_* bitmasks.
+        Args:
+            runs (list): [bits, ticks] pairs; consecutive ticks with the same bits share one run.
+            start_*: Power-up state carried into the attempt from earlier levels.
+            level_time (float): Level time the recording finished with (-1 if it did not finish).
+        """
+        self.level_index = level_index
+        self.runs = runs if runs is not None else []
+        self.start_coins = start_coins
+        self.start_powerup_active = start_powerup_active
+        self.start_powerup_remaining_ms = start_powerup_remaining_ms
+        self.level_time = level_time
+        self.tick_rate = tick_rate
+        self.physics_crc = physics_fingerprint() if physics_crc is None else physics_crc
+        self.level_crc = level_fingerprint(level_index) if level_crc is None else level_crc
+
+    @property
+    def tick_count(self):
+        return sum(ticks for _, ticks in self.runs)
+
+    def to_bytes(self):
+        out = bytearray(REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.level_index, self.tick_rate,
+                                           self.physics_crc, self.level_crc, self.start_coins,
+                                           int(self.start_powerup_active), self.start_powerup_remaining_ms,
+                                           self.tick_count, self.level_time))
+        _write_varint(out, len(self.runs))
+        for bits, ticks in self.runs:
+            out.append(bits); _write_varint(out, ticks)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        (magic, version, level_index, tick_rate, physics_crc, level_crc, start_coins, start_powerup_active,
+         start_powerup_remaining_ms, tick_count, level_time) = REPLAY_HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError(f"Not a version {REPLAY_VERSION} replay file")
+        run_count, offset = _read_varint(data, REPLAY_HEADER.size)
+        runs = []
+        for _ in range(run_count):
+            bits = data[offset]; ticks, offset = _read_varint(data, offset + 1)
+            runs.append([bits, ticks])
+        replay = cls(level_index, runs, start_coins, bool(start_powerup_active), start_powerup_remaining_ms,
+                     level_time, tick_rate, physics_crc, level_crc)
+        if replay.tick_count != tick_count: raise ValueError("Replay run lengths don't add up to its tick count")
+        return replay
+
+    def save(self, path):
+        with open(path, 'wb') as f: f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f: return cls.from_bytes(f.read())
+
+    def input_source(self):
+        """Input source that feeds the recording back through Game.update."""
+        return ScriptedInput(self.runs, loop=False)
+
+# --- Recorder (hooked into Game.update) ---
+class ReplayRecorder:
+    def __init__(self, replay_dir=REPLAY_DIR):
+        """Records each level attempt; finished attempts are written as level_XX_last/best.rpl."""
+        self.replay_dir = replay_dir
+        self.replay = None # Attempt being recorded
+
+    def record(self, game, bits):
+        """Appends one tick of input, starting a new attempt on the first tick after a (re)load."""
+        replay = self.replay
+        if replay is None:
+            replay = self.replay = Replay(game.current_level_index, [], game.coins_for_powerup_count,
+                                          game.powerup_active,
+                                          max(0.0, game.powerup_end_time - game.sim_time_ms) if game.powerup_active else 0.0)
+        runs = replay.runs
+        if runs and runs[-1][0] == bits: runs[-1][1] += 1
+        else: runs.append([bits, 1])
+
+    def discard(self):
+        """Drops the current attempt (level reloaded, restarted or failed)."""
+        self.replay = None
+
+    def finish(self, level_time):
+        """Ends the current attempt at the goal and saves it. Returns the Replay (or None)."""
+        replay = self.replay; self.replay = None
+        if replay is None: return None
+        replay.level_time = level_time
+        try:
+            os.makedirs(self.replay_dir, exist_ok=True)
+            replay.save(self.replay_path(replay.level_index, 'last'))
+            best_path = self.replay_path(replay.level_index, 'best')
+            best = Replay.load(best_path) if os.path.exists(best_path) else None
+            if best is None or best.level_time < 0 or replay.level_time < best.level_time: replay.save(best_path)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"ERROR: Could not save replay: {e}")
+        return replay
+
+    def replay_path(self, level_index, kind):
+        return os.path.join(self.replay_dir, f"level_{level_index + 1:02}_{kind}.rpl")
+
+# --- Headless Verification ---
+def verify_replay(replay, game=None):
+    """
+    Re-simulates a replay through the normal update path on a headless Game.
+    Returns (finished, ticks_simulated, level_time, problems) where problems lists mismatches.
+    """
+    import Game # Deferred: Game imports this module
+    problems = []
+    if replay.tick_rate != PHYSICS_TICK_RATE: problems.append(f"tick rate {replay.tick_rate} != {PHYSICS_TICK_RATE}")
+    if replay.physics_crc != physics_fingerprint(): problems.append("physics constants changed since recording")
+    if not 0 <= replay.level_index < len(get_level_pack()): return False, 0, -1.0, problems + ["level index out of range"]
+    if replay.level_crc != level_fingerprint(replay.level_index): problems.append("level layout changed since recording")
+    if game is None: game = Game.Game(headless=True)
+    game.input_source = replay.input_source()
+    recorder = game.replay_recorder; game.replay_recorder = None # Don't re-record while verifying
+    game.start_attempt(replay.level_index, replay.start_coins,
+                       replay.start_powerup_remaining_ms if replay.start_powerup_active else None)
+    ticks = 0
+    try:
+        while ticks < replay.tick_count and game.game_state == STATE_PLAYING:
+            game.update(); ticks += 1
+    finally:
+        game.replay_recorder = recorder
+    finished = game.game_state in (STATE_LEVEL_COMPLETE, STATE_GAME_WON)
+    if not finished: problems.append("did not reach the goal")
+    elif ticks != replay.tick_count: problems.append(f"finished after {ticks} ticks, recording has {replay.tick_count}")
+    if finished and replay.level_time >= 0 and abs(game.level_elapsed_time - replay.level_time) > 1e-6:
+        problems.append(f"time {game.level_elapsed_time:.3f}s != recorded {replay.level_time:.3f}s")
+    return finished, ticks, game.level_elapsed_time if finished else -1.0, problems
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Inspect or verify recorded replays.")
+    parser.add_argument('command', choices=('verify', 'info'))
+    parser.add_argument('paths', nargs='+', help="Replay files (globs allowed)")
+    args = parser.parse_args()
+    paths = [p for pattern in args.paths for p in (sorted(glob.glob(pattern)) or [pattern])]
+    game = None; failures = 0
+    for path in paths:
+        try: replay = Replay.load(path)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"{path}: unreadable ({e})"); failures += 1; continue
+        if args.command == 'info':
+            print(f"{path}: level {replay.level_index + 1}, {replay.tick_count} ticks @ {replay.tick_rate} Hz, "
+                  f"{len(replay.runs)} runs, recorded time {replay.level_time:.3f}s")
+            continue
+        with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null):
+            if game is None:
+                import Game
+                game = Game.Game(headless=True)
+            start = time.perf_counter()
+            finished, ticks, level_time, problems = verify_replay(replay, game)
+            elapsed = time.perf_counter() - start
+        speed = ticks / replay.tick_rate / elapsed if elapsed > 0 else 0
+        status = "OK" if finished and not problems else "FAILED"
+        failures += status != "OK"
+        print(f"{path}: {status} level {replay.level_index + 1} time {level_time:.3f}s "
+              f"({ticks} ticks, {speed:.0f}x real-time)" + "".join(f"\n  - {p}" for p in problems))
+    if game is not None: pygame.quit()
+    sys.exit(1 if failures else 0)
@@ -8,6 +8,24 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__)); ASSETS_DIR = os.path.join
 # --- Screen ---
 TITLE = "The Way of the Shadow"; SCREEN_WIDTH = 1000; SCREEN_HEIGHT = 700; FPS = 60
 
+# --- Rendering ---
+DIRTY_RECT_RENDERING = False # Only redraw/update changed regions while playing (helps weak GPUs/CPUs)
+IDLE_RENDERING = True; IDLE_WAIT_MS = 250 # Outside play: sleep until input (waking at least this often) and redraw only on change
+BACKGROUND_FPS = 15 # Frame cap while the window is unfocused; times MAX_PHYSICS_STEPS_PER_FRAME it must cover PHYSICS_TICK_RATE
+ASSET_CACHE_ENABLED = True; ASSET_CACHE_FILE = os.path.join(ASSETS_DIR, 'cache', 'assets.pack') # Pre-scaled frames (python asset_cache.py build)
+LEVEL_PACK_FILE = os.path.join(ASSETS_DIR, 'cache', 'levels.pack') # Compiled levels.py (rebuilt automatically, python levelpack.py build)
+ATLAS_PAGE_SIZE = 1024 # Texture atlas page size; coin, door and player frames are drawn from shared pages
+ASSET_LOADER_WORKERS = 0 # Threads decoding/scaling images at startup (0 = one per CPU core)
+
+# --- Level Loading ---
+LEVEL_TEMPLATE_CACHE_SIZE = 4 # Prebuilt levels kept for instant reloads/restarts
+
+# --- Simulation Timing ---
+PHYSICS_TICK_RATE = 60 # Fixed physics steps per second, > 0 (FPS above only caps rendering). Movement values below are
+                       # per 1/60 s tick and get scaled to this rate (sprites.TickPhysics), so it doesn't change the feel
+MAX_PHYSICS_STEPS_PER_FRAME = 5 # Drop backlog beyond this so a stall can't spiral
+MAX_FRAME_TIME = 0.25 # Seconds; longer frames (window drag, level load) are clamped
+
 # --- Colors ---
 WHITE=(255, 255, 255); BLACK=(0, 0, 0); RED=(255, 0, 0); BLUE=(0, 0, 255); GREEN=(0, 255, 0); YELLOW=(255, 255, 0); GRAY=(128, 128, 128); LIGHT_BLUE=(173, 216, 230); DARK_GRAY=(50, 50, 50)
 
@@ -42,7 +60,43 @@ POWERUP_JUMP_MULTIPLIER = 1.2 # Doubling jump might be too much, adjust as neede
 # --- UI Elements ---
 BUTTON_NORMAL_IMG = 'button_retro_normal.png'; BUTTON_HOVER_IMG = 'button_retro_hover.png'
 BUTTON_TEXT_COLOR = WHITE; BUTTON_FONT_NAME = 'pixel_font.ttf'; BUTTON_FONT_PATH = os.path.join(FONT_DIR, BUTTON_FONT_NAME)
-HIGHSCORE_FILE = "highscore.txt" # <-- NEW: File to store best time
+HIGHSCORE_FILE = os.path.join(BASE_DIR, "highscore.txt") # Legacy best time, imported into the leaderboard once
+LEADERBOARD_DB = os.path.join(BASE_DIR, "leaderboard.db") # Every finished run with per-level splits
+RECORD_REPLAYS = True; REPLAY_DIR = os.path.join(BASE_DIR, 'replays') # Input recordings of finished level attempts
+GHOST_ENABLED = True; GHOST_DIR = os.path.join(BASE_DIR, 'ghosts') # Translucent best run of each level
+GHOST_ALPHA = 110 # 0-255
+GHOST_MAX_TICKS = PHYSICS_TICK_RATE * 60 * 5 # Runs longer than 5 minutes aren't kept as ghosts
+
+# --- Input ---
+INPUT_LEFT = 1; INPUT_RIGHT = 2; INPUT_JUMP = 4 # Per-tick input bitmask bits
+
+# --- Training Environment (env.py) ---
+ENV_MAX_SECONDS = 30 # Episodes end after this much game time
+ENV_NEAR_PLATFORMS = 4 # Closest platforms described in each observation
+ENV_PROGRESS_REWARD = 0.01 # Per pixel closer to the goal (free-space distance)
+ENV_GOAL_REWARD = 10.0; ENV_FALL_PENALTY = -10.0; ENV_STEP_PENALTY = -0.001
+
+# --- Diagnostics (tracing.py) ---
+LOG_LEVEL = 'INFO' # 'DEBUG' adds per-tick messages (coins, power-ups)
+TRACE_BUFFER_EVENTS = 200_000 # Ring buffer size; a few minutes of frames
+TRACE_DIR = os.path.join(BASE_DIR, 'traces') # Where F9 writes Chrome trace files
+PROFILER_HISTORY_FRAMES = 240 # F3 overlay: frames kept for the graph and percentiles
+PROFILER_GRAPH_HEIGHT = 60; PROFILER_GRAPH_MAX_MS = 50.0 # Graph height in pixels and the frame time at its top
+PROFILER_PANEL_WIDTH = 290; PROFILER_FONT_SIZE = 20; PROFILER_REFRESH_MS = 250 # Text updates 4x a second to stay readable
+PROFILER_GRAPH_BG = (20, 20, 20)
+
+# --- Collision ---
+SPATIAL_HASH_CELL_SIZE = 128 # Broadphase grid cell size in pixels (a few hitboxes wide)
+# Longest per-tick move resolved in one step. Longer moves (fast falls, boosted runs, low tick rates) are swept
+# and sub-stepped so they can't skip a platform: x stays under the hitbox width, y keeps the landing/ceiling checks valid
+CCD_MAX_STEP_X = PLAYER_HITBOX_WIDTH - 1; CCD_MAX_STEP_Y = PLAYER_HITBOX_HEIGHT - 2
+
+# --- Moving Platforms (a levels.py entry's 'movers') ---
+MOVER_CRUMBLE_DELAY = 0.5; MOVER_CRUMBLE_RESPAWN = 3.0 # Seconds a 'crumble': True platform holds once landed on, and stays gone
+
+# --- World Streaming (levels with a 'world_size' bigger than the screen) ---
+WORLD_CHUNK_SIZE = 512 # Chunk width/height in pixels
+WORLD_STREAM_MARGIN = 1 # Chunks kept loaded beyond the edges of the view
 
 # --- Game States ---
 STATE_MENU=0; STATE_CONTROLS=1; STATE_PLAYING=2; STATE_LEVEL_COMPLETE=3; STATE_GAME_OVER=4; STATE_GAME_WON=5
@@ -52,3 +106,4 @@ MUSIC_BACKGROUND='music_background.ogg'; SFX_JUMP='sfx_jump.wav'; SFX_COLLECT='s
 
 # --- Fonts ---
 TITLE_FONT_SIZE = 72; BUTTON_FONT_SIZE = 30; INFO_FONT_SIZE = 36; CONTROLS_FONT_SIZE = 24
+TEXT_CACHE_SIZE = 128 # Rendered strings kept by ui.text_cache
@@ -0,0 +1,55 @@
+# snapshot.py
+from collections import OrderedDict
+from settings import * # Import all settings
+
+# --- Prebuilt Level (sprites, broadphase and static layer, built once per level) ---
+class LevelTemplate:
+    def __init__(self, level_index, platforms, collectibles, goal, platform_grid, level_layer, player_start, world=None,
+                 movers=(), mover_broadphase=None):
+        self.level_index = level_index
+        self.platforms = platforms # List of Platform sprites (group order)
+        self.collectibles = collectibles # List of every Collectible sprite in the level
+        self.goal = goal
+        self.platform_grid = platform_grid
+        self.level_layer = level_layer
+        self.player_start = player_start
+        self.world = world # StreamedWorld for levels bigger than the screen (then level_layer is None and
+                          # platforms/collectibles are empty: the world makes sprites per chunk)
+        self.movers = list(movers) # MovingPlatform sprites (reset on every load; never in the static layer)
+        self.mover_broadphase = mover_broadphase # SweepAndPrune over movers, None if there are none
+
+class LevelTemplateCache:
+    def __init__(self, max_levels=LEVEL_TEMPLATE_CACHE_SIZE):
+        """LRU of LevelTemplates so reloading a recently played level allocates no sprites or surfaces."""
+        self.max_levels = max_levels
+        self.templates = OrderedDict() # level_index -> LevelTemplate
+
+    def get(self, level_index):
+        template = self.templates.get(level_index)
+        if template is not None: self.templates.move_to_end(level_index)
+        return template
+
+    def put(self, template):
+        self.templates[template.level_index] = template
+        self.templates.move_to_end(template.level_index)
+        while len(self.templates) > self.max_levels: self.templates.popitem(last=False)
+
+# --- Game State Snapshot ---
+class GameSnapshot:
+    __slots__ = ('level_index', 'level_ticks', 'player_state', 'collectibles', 'world_collected', 'score',
+                 'level_elapsed_time', 'timer_active', 'sim_time_ms', 'coins_for_powerup_count', 'powerup_active',
+                 'powerup_end_time', 'movers')
+
+    def __init__(self, game):
+        """Captures everything a level attempt changes (see Game.restore_state)."""
+        self.level_index = game.current_level_index; self.level_ticks = game.level_ticks
+        self.player_state = game.player.get_state()
+        self.collectibles = game.collectibles.sprites() # Remaining coins; sprites themselves never change
+        # Streamed worlds only hold nearby coins in the group, so they keep the collected ones instead
+        self.world_collected = frozenset(game.world.collected) if game.world is not None else None
+        self.score = game.score
+        self.level_elapsed_time = game.level_elapsed_time; self.timer_active = game.timer_active
+        self.sim_time_ms = game.sim_time_ms
+        self.coins_for_powerup_count = game.coins_for_powerup_count
+        self.powerup_active = game.powerup_active; self.powerup_end_time = game.powerup_end_time
+        self.movers = tuple(mover.get_state() for mover in game.movers) # Path position, crumbling, last move
@@ -1,16 +1,90 @@
 # sprites.py
 
+import math
 import pygame
 import os
 from settings import * # Import all settings
+from inputs import keys_to_inputs
+from tracing import log, traced, TRACER
 
 vec = pygame.math.Vector2
 
+# --- Image Loading (safe on asset loader threads: nothing here converts to the display format) ---
+def load_scaled(path, size=None, smooth=True):
+    """[image] decoded from path, scaled to size if given. None if it can't be loaded."""
+    try:
+        image = pygame.image.load(path)
+        if size is not None and image.get_size() != tuple(size):
+            image = pygame.transform.smoothscale(image, size) if smooth else pygame.transform.scale(image, size)
+    except (pygame.error, ValueError) as e:
+        print(f"Error loading/scaling {path}: {e}"); return None
+    return [image]
+
+def build_player_animation(sheet_path, num_frames, anim_name):
+    """Frames cut from a sprite sheet and scaled to PLAYER_WIDTH/HEIGHT: right-facing, then flipped left-facing."""
+    print(f"  Extracting {anim_name} frames ({num_frames})...")
+    try:
+        spritesheet = pygame.image.load(sheet_path)
+    except pygame.error as e:
+        print(f"Error loading PLAYER {anim_name.upper()} sheet '{sheet_path}': {e}"); return None
+    if spritesheet.get_width() < num_frames or num_frames <= 0:
+        print(f"    Error: Invalid frames/sheet width for {anim_name}."); return None
+    frame_width = spritesheet.get_width() // num_frames
+    frame_height = spritesheet.get_height()
+    print(f"    Sheet: {spritesheet.get_size()}, Frame: {frame_width}x{frame_height}, Scaling to: {PLAYER_WIDTH}x{PLAYER_HEIGHT}")
+    frames_r = []
+    for i in range(num_frames):
+        x = i * frame_width; frame_rect = pygame.Rect(x, 0, frame_width, frame_height)
+        try:
+            frame_surface = spritesheet.subsurface(frame_rect)
+            if frame_surface.get_width() != PLAYER_WIDTH or frame_surface.get_height() != PLAYER_HEIGHT:
+                # Use smoothscale for potentially better results when scaling non-integer amounts
+                frame_surface = pygame.transform.smoothscale(frame_surface, (PLAYER_WIDTH, PLAYER_HEIGHT))
+            frames_r.append(frame_surface)
+        except ValueError as e:
+            print(f"    Error processing {anim_name} frame {i}: {e}")
+            break # Stop processing this sheet (keeps the frames extracted so far)
+    if not frames_r: return None
+    return frames_r + [pygame.transform.flip(frame, True, False) for frame in frames_r]
+
+# --- Shared Animation Clock ---
+class AnimationClock:
+    def __init__(self, frame_count, frame_ms):
+        """Frame counter for one looping animation, set once per tick for every sprite that plays it."""
+        self.frame_count = max(1, frame_count); self.frame_ms = frame_ms
+        self.frame = 0
+
+    def update(self, now):
+        """now is simulated time (Game.sim_time_ms): the frame follows it, so it is the same in headless runs and replays."""
+        self.frame = int(now // self.frame_ms) % self.frame_count
+
+# --- Per-Tick Movement ---
+class TickPhysics:
+    __slots__ = ('acc', 'friction', 'gravity', 'jump_power', 'double_jump_power', 'wall_slide_speed',
+                 'wall_jump_x_power', 'wall_jump_y_power', 'max_fall_speed', 'max_run_speed', 'stop_speed')
+
+    def __init__(self, tick_dt):
+        """
+        The movement settings for ticks of tick_dt seconds. settings.py gives them per 1/60 s tick, so speeds,
+        impulses and friction scale with the tick's length and accelerations with its square: movement feels
+        the same at any PHYSICS_TICK_RATE (paths differ only by the per-tick integration error, a few pixels
+        over a jump), and at 60 these are exactly the settings values.
+        """
+        scale = 60 * tick_dt; scale_sq = scale * scale
+        self.acc = PLAYER_ACC * scale_sq; self.gravity = PLAYER_GRAVITY * scale_sq
+        self.friction = PLAYER_FRICTION * scale # Fraction of the speed taken off per tick (an acceleration)
+        self.jump_power = PLAYER_JUMP_POWER * scale; self.double_jump_power = PLAYER_DOUBLE_JUMP_POWER * scale
+        self.wall_slide_speed = PLAYER_WALL_SLIDE_SPEED * scale
+        self.wall_jump_x_power = PLAYER_WALL_JUMP_X_POWER * scale; self.wall_jump_y_power = PLAYER_WALL_JUMP_Y_POWER * scale
+        self.max_fall_speed = MAX_FALL_SPEED * scale; self.max_run_speed = MAX_RUN_SPEED * scale
+        self.stop_speed = 0.1 * scale # Slower horizontal drift is stopped
+
 # --- Player Class ---
 class Player(pygame.sprite.Sprite):
     def __init__(self, game):
         super().__init__()
         self.game = game
+        self.physics = TickPhysics(game.tick_dt) # Replaced by Game.set_tick_rate
 
         # --- Animation Frame Lists ---
         self.idle_frames_r = []
@@ -34,6 +108,7 @@ class Player(pygame.sprite.Sprite):
 
         # Movement vectors
         self.pos = vec(0, 0); self.vel = vec(0, 0); self.acc = vec(0, 0)
+        self.prev_topleft = self.rect.topleft # Hitbox position at the start of the last physics tick
 
         # Animation state
         self.current_frame_index = 0; self.last_anim_update = pygame.time.get_ticks(); self.facing_right = True
@@ -42,59 +117,24 @@ class Player(pygame.sprite.Sprite):
 
         # Gameplay state variables
         self.on_ground = False; self.jumps_left = 2; self.wall_sliding = False; self.wall_slide_side = 0
+        self.riding = None # MovingPlatform landed on last tick; it carries the player next tick
 
     def load_images(self):
-        """Loads sprite sheets and extracts animation frames, scaled for visuals."""
-        print("Loading player assets...")
-
-        # --- Load IDLE Frames ---
-        idle_sheet_path = os.path.join(IMG_DIR, PLAYER_IDLE_IMG)
-        try:
-            idle_spritesheet = pygame.image.load(idle_sheet_path).convert_alpha()
-            self._extract_frames(idle_spritesheet, PLAYER_IDLE_FRAMES, self.idle_frames_r, self.idle_frames_l, "Idle")
-        except pygame.error as e:
-            print(f"Error loading PLAYER IDLE sheet '{PLAYER_IDLE_IMG}': {e}")
-            self._add_fallback_frame(self.idle_frames_r, self.idle_frames_l)
-
-        # --- Load RUN Frames ---
-        run_sheet_path = os.path.join(IMG_DIR, PLAYER_RUN_IMG)
-        try:
-            run_spritesheet = pygame.image.load(run_sheet_path).convert_alpha()
-            self._extract_frames(run_spritesheet, PLAYER_RUN_FRAMES, self.run_frames_r, self.run_frames_l, "Run")
-        except pygame.error as e:
-            print(f"Error loading PLAYER RUN sheet '{PLAYER_RUN_IMG}': {e}")
-            self._add_fallback_frame(self.run_frames_r, self.run_frames_l)
+        """Takes the animation frames Game.load_assets prepared (scaled for visuals, flipped copies for facing left)."""
+        for anim_name, frame_list_r, frame_list_l in (('idle', self.idle_frames_r, self.idle_frames_l),
+                                                      ('run', self.run_frames_r, self.run_frames_l)):
+            frames = self.game.player_animations.get(anim_name)
+            if frames:
+                half = len(frames) // 2 # Right-facing frames, then the same frames flipped
+                frame_list_r.extend(frames[:half]); frame_list_l.extend(frames[half:])
+            else:
+                print(f"Error loading PLAYER {anim_name.upper()} frames")
+                self._add_fallback_frame(frame_list_r, frame_list_l)
 
         # Final check
         if not self.idle_frames_r: print("WARNING: Player idle frames list is empty!")
         if not self.run_frames_r: print("WARNING: Player run frames list is empty!")
 
-
-    def _extract_frames(self, spritesheet, num_frames, frame_list_r, frame_list_l, anim_name):
-        """Helper to extract, scale, and append frames from a sheet."""
-        print(f"  Extracting {anim_name} frames ({num_frames})...")
-        if spritesheet.get_width() < num_frames or num_frames <= 0:
-             print(f"    Error: Invalid frames/sheet width for {anim_name}.")
-             self._add_fallback_frame(frame_list_r, frame_list_l)
-             return
-        frame_width = spritesheet.get_width() // num_frames
-        frame_height = spritesheet.get_height()
-        print(f"    Sheet: {spritesheet.get_size()}, Frame: {frame_width}x{frame_height}, Scaling to: {PLAYER_WIDTH}x{PLAYER_HEIGHT}")
-
-        for i in range(num_frames):
-            x = i * frame_width; frame_rect = pygame.Rect(x, 0, frame_width, frame_height)
-            try:
-                frame_surface = spritesheet.subsurface(frame_rect)
-                if frame_surface.get_width() != PLAYER_WIDTH or frame_surface.get_height() != PLAYER_HEIGHT:
-                    # Use smoothscale for potentially better results when scaling non-integer amounts
-                    frame_surface = pygame.transform.smoothscale(frame_surface, (PLAYER_WIDTH, PLAYER_HEIGHT))
-                frame_list_r.append(frame_surface)
-                frame_list_l.append(pygame.transform.flip(frame_surface, True, False))
-            except ValueError as e:
-                print(f"    Error processing {anim_name} frame {i}: {e}")
-                self._add_fallback_frame(frame_list_r, frame_list_l) # Add fallback if one frame fails
-                break # Stop processing this sheet
-
     def _add_fallback_frame(self, frame_list_r, frame_list_l):
          """Adds a fallback red square if loading fails."""
          if not frame_list_r: # Only add if list is currently empty
@@ -108,7 +148,7 @@ class Player(pygame.sprite.Sprite):
         """Resets player state and positions the HITBOX rect correctly."""
         self.pos = vec(x, y); self.vel = vec(0, 0); self.acc = vec(0, 0)
         self.on_ground = False; self.jumps_left = 2; self.wall_sliding = False; self.wall_slide_side = 0
-        self.facing_right = True
+        self.facing_right = True; self.riding = None
 
         # --- Reset Animation State ---
         self.current_frame_index = 0
@@ -121,7 +161,11 @@ class Player(pygame.sprite.Sprite):
 
         self.rect.topleft = self.pos # Position hitbox
         # --- Ground Snapping Logic ---
-        ground_platform = None; possible_grounds = [p for p in self.game.platforms if p.rect.left < self.rect.centerx < p.rect.right and p.rect.top >= self.pos.y]
+        ground_platform = None
+        grid = getattr(self.game, 'platform_grid', None)
+        if grid is not None: possible_grounds = grid.below(self.rect.centerx, self.pos.y)
+        else: possible_grounds = [p for p in self.game.platforms if p.rect.left < self.rect.centerx < p.rect.right and p.rect.top >= self.pos.y]
+        possible_grounds += [m for m in getattr(self.game, 'movers', ()) if m.rect.left < self.rect.centerx < m.rect.right and m.rect.top >= self.pos.y]
         if possible_grounds: ground_platform = min(possible_grounds, key=lambda p: p.rect.top)
         if ground_platform: self.rect.bottom = ground_platform.rect.top
         # ---------------------------
@@ -129,7 +173,27 @@ class Player(pygame.sprite.Sprite):
         # --- Immediate Ground Check ---
         self.check_collisions_y(self.game.platforms); self.vel = vec(0, 0)
         self.pos.x = self.rect.x; self.pos.y = self.rect.y # Final sync
-        print(f"Player reset. Hitbox: {self.rect.topleft}, OnGround: {self.on_ground}")
+        self.prev_topleft = self.rect.topleft # Don't interpolate across the teleport
+        log.debug("Player reset. Hitbox: %s, OnGround: %s", self.rect.topleft, self.on_ground)
+
+    def get_state(self):
+        """Everything a physics tick reads or writes, as a tuple (see set_state)."""
+        return (self.pos.x, self.pos.y, self.vel.x, self.vel.y, self.acc.x, self.acc.y, self.rect.x, self.rect.y,
+                self.prev_topleft, self.on_ground, self.jumps_left, self.wall_sliding, self.wall_slide_side,
+                self.facing_right, self.current_action, self.last_action, self.current_frame_index,
+                self.riding.index if self.riding is not None else -1)
+
+    def set_state(self, state):
+        """Restores a get_state() tuple without allocating (frames come from the loaded lists)."""
+        (pos_x, pos_y, vel_x, vel_y, acc_x, acc_y, self.rect.x, self.rect.y,
+         self.prev_topleft, self.on_ground, self.jumps_left, self.wall_sliding, self.wall_slide_side,
+         self.facing_right, self.current_action, self.last_action, self.current_frame_index, riding) = state
+        self.riding = self.game.movers[riding] if riding >= 0 else None
+        self.pos.update(pos_x, pos_y); self.vel.update(vel_x, vel_y); self.acc.update(acc_x, acc_y)
+        if self.current_action == 'run' and self.run_frames_r: frame_list = self.run_frames_r if self.facing_right else self.run_frames_l
+        else: frame_list = self.idle_frames_r if self.facing_right else self.idle_frames_l
+        if frame_list: self.image = frame_list[self.current_frame_index % len(frame_list)]
+        self.last_anim_update = pygame.time.get_ticks()
 
     def animate(self):
         """Switches between idle and run animations and updates the current frame."""
@@ -137,7 +201,7 @@ class Player(pygame.sprite.Sprite):
 
         # --- Determine Current Action ---
         # Simple check: Running if moving horizontally on ground or in air (can adjust later)
-        if abs(self.vel.x) > 0.1:
+        if abs(self.vel.x) > self.physics.stop_speed:
              self.current_action = 'run'
         else:
              self.current_action = 'idle'
@@ -185,9 +249,9 @@ class Player(pygame.sprite.Sprite):
         can_jump = False
         if self.wall_sliding:
             # Apply multiplier to wall jump vertical power
-            self.vel.y = PLAYER_WALL_JUMP_Y_POWER * jump_mult
+            self.vel.y = self.physics.wall_jump_y_power * jump_mult
             # Horizontal wall jump usually isn't multiplied
-            self.vel.x = PLAYER_WALL_JUMP_X_POWER * -self.wall_slide_side
+            self.vel.x = self.physics.wall_jump_x_power * -self.wall_slide_side
             self.wall_sliding = False;
             self.jumps_left = 1;  # <--- THIS IS THE KEY POINT
             self.on_ground = False;
@@ -195,127 +259,216 @@ class Player(pygame.sprite.Sprite):
             self.facing_right = self.vel.x > 0
         elif self.on_ground:
             # Apply multiplier to initial jump power
-            self.vel.y = PLAYER_JUMP_POWER * jump_mult
+            self.vel.y = self.physics.jump_power * jump_mult
             self.jumps_left -= 1;  # Starts at 2, becomes 1
             self.on_ground = False;
             can_jump = True
         elif self.jumps_left > 0:  # This handles the double jump
             # Apply multiplier to double jump power
-            self.vel.y = PLAYER_DOUBLE_JUMP_POWER * jump_mult
+            self.vel.y = self.physics.double_jump_power * jump_mult
             self.jumps_left -= 1;  # Becomes 0 if it was 1
             self.on_ground = False;
             can_jump = True
 
         if can_jump and hasattr(self.game, 'sfx_jump'):
             self.game.play_sound(self.game.sfx_jump)
-    def update(self, platforms):
+    def draw_position(self, alpha=1.0):
+        """Top-left for blitting the visual image, interpolated between the last two physics ticks."""
+        prev_x, prev_y = self.prev_topleft
+        hitbox_x = round(prev_x + (self.rect.x - prev_x) * alpha)
+        hitbox_y = round(prev_y + (self.rect.y - prev_y) * alpha)
+        image_draw_x = hitbox_x + self.rect.width // 2 - (PLAYER_WIDTH // 2)
+        image_draw_y = hitbox_y + self.rect.height - PLAYER_HEIGHT + PLAYER_VISUAL_Y_OFFSET
+        return image_draw_x, image_draw_y
+
+    @traced('player.update')
+    def update(self, platforms, inputs=None):
+        """Advances one physics tick. inputs is the tick's INPUT_* bitmask (read from the keyboard if None)."""
+        self.prev_topleft = self.rect.topleft
+        movers = getattr(self.game, 'mover_broadphase', None)
+        if movers is not None: self.ride(platforms, movers)
         self.animate()  # Animate first
-        original_speed_mult = 1  # Store the real multiplier
         # --- Determine Multipliers ---
         speed_mult = POWERUP_SPEED_MULTIPLIER if self.game.powerup_active else 1.0
         # Jump multiplier is handled directly in the jump() method
 
         # --- Apply Input and Acceleration ---
-        keys = pygame.key.get_pressed()
-        self.acc = vec(0, PLAYER_GRAVITY)  # Start with gravity
+        if inputs is None: inputs = keys_to_inputs(pygame.key.get_pressed())
+        held_left = inputs & INPUT_LEFT; held_right = inputs & INPUT_RIGHT
+        physics = self.physics  # Settings scaled to the tick length
+        self.acc = vec(0, physics.gravity)  # Start with gravity
         moving_sideways = False
 
         # Apply speed multiplier to horizontal acceleration from input
-        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
-            self.acc.x = -PLAYER_ACC * speed_mult
+        if held_left:
+            self.acc.x = -physics.acc * speed_mult
             moving_sideways = True
             self.facing_right = False
-        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
-            self.acc.x = PLAYER_ACC * speed_mult
+        if held_right:
+            self.acc.x = physics.acc * speed_mult
             moving_sideways = True
             self.facing_right = True
 
         # --- Apply Friction ---
         # Friction usually isn't multiplied by the power-up, but you could if you wanted
         if not moving_sideways:
-            self.acc.x += self.vel.x * PLAYER_FRICTION
+            self.acc.x += self.vel.x * physics.friction
 
         # --- Update Velocity ---
         self.vel += self.acc
 
         # --- Cap Horizontal Speed ---
         # Apply speed multiplier to the maximum running speed
-        current_max_speed = MAX_RUN_SPEED * speed_mult
+        current_max_speed = physics.max_run_speed * speed_mult
         if abs(self.vel.x) > current_max_speed:
             self.vel.x = current_max_speed if self.vel.x > 0 else -current_max_speed
 
         # Stop small horizontal drift
-        if abs(self.vel.x) < 0.1: self.vel.x = 0
+        if abs(self.vel.x) < physics.stop_speed: self.vel.x = 0
 
         # --- Wall Sliding Check ---
         # (Wall slide logic remains the same - it checks keys/collision, doesn't directly use multipliers here)
         self.wall_sliding = False;
         self.wall_slide_side = 0;
         hits_l = None
-        # --- TEMPORARY TEST ---
-        # speed_mult = 1.0 # Force normal speed ONLY for the collision check? (This won't work directly as velocity is already high)
-        # Instead, let's focus on the collision check pixel distance
-        check_dist = 2 if original_speed_mult > 1.0 else 1  # Check 2 pixels out if boosted?
-        # --- END TEMP TEST ---
         if not self.on_ground and self.vel.y > 0:
-            print(f"Wall slide check. SpeedMult: {original_speed_mult}, CheckDist: {check_dist}")  # Debug
-            # Use check_dist instead of 1
-            self.rect.x += check_dist;
-            hits_r = pygame.sprite.spritecollide(self, platforms, False);
-            self.rect.x -= check_dist
-            print(f"  Checking right wall ({check_dist}px)... Hits_R: {bool(hits_r)}")
-
-            if hits_r and (keys[pygame.K_RIGHT] or keys[pygame.K_d]):
+            self.rect.x += 1;
+            hits_r = self.collide_platforms(platforms);
+            self.rect.x -= 1
+
+            if hits_r and held_right:
                 self.wall_sliding = True;
                 self.wall_slide_side = 1
-                print("    >>> Sliding RIGHT")
-
-            elif (keys[pygame.K_LEFT] or keys[pygame.K_a]):
-                # Use check_dist instead of 1
-                self.rect.x -= check_dist;
-                hits_l = pygame.sprite.spritecollide(self, platforms, False);
-                self.rect.x += check_dist
-                print(f"  Checking left wall ({check_dist}px)... Hits_L: {bool(hits_l)}")
+
+            elif held_left:
+                self.rect.x -= 1;
+                hits_l = self.collide_platforms(platforms);
+                self.rect.x += 1
                 if hits_l:
                     self.wall_sliding = True;
                     self.wall_slide_side = -1
-                    print("    >>> Sliding LEFT")
             # ... (rest of wall slide checking logic) ...
             if self.wall_sliding:
                 # Wall slide speed itself usually isn't affected by power-up, but you could multiply here too
-                self.vel.y = min(self.vel.y, PLAYER_WALL_SLIDE_SPEED)
+                self.vel.y = min(self.vel.y, physics.wall_slide_speed)
                 self.jumps_left = 1
 
         # --- Apply Movement and Check Collisions ---
+        dx = self.vel.x + 0.5 * self.acc.x; dy = self.vel.y + 0.5 * self.acc.y
+        if TRACER.enabled:
+            with TRACER.span('collisions'): self.move(platforms, dx, dy)
+        else: self.move(platforms, dx, dy)
+
+        # Apply Max Fall Speed AFTER Y collisions
+        # Max fall speed usually isn't affected by power-ups, but you could multiply MAX_FALL_SPEED here if desired
+        if self.vel.y > physics.max_fall_speed: self.vel.y = physics.max_fall_speed
+
+    def ride(self, platforms, movers):
+        """
+        Moving platforms advance before the player (Game.update_movers): the one stood on last tick carries
+        the player along (a wall stops the sideways part), and any other that ran into the hitbox pushes it
+        out on the side it came from.
+        """
+        riding = self.riding; self.riding = None
+        if riding is not None and riding.solid:
+            dx, dy = riding.delta
+            if dx:
+                self.pos.x += dx; self.rect.x = round(self.pos.x)
+                for wall in self.collide_platforms(platforms):
+                    if wall is riding: continue
+                    if dx > 0: self.rect.right = wall.rect.left
+                    else: self.rect.left = wall.rect.right
+                    self.pos.x = self.rect.x
+            if dy: self.rect.bottom = riding.rect.top; self.pos.y = self.rect.y
+        for mover in movers.collide(self.rect):
+            if mover is riding: continue
+            dx, dy = mover.delta; was = mover.rect.move(-dx, -dy)
+            if was.right <= self.rect.left: self.rect.left = mover.rect.right; self.pos.x = self.rect.x
+            elif was.left >= self.rect.right: self.rect.right = mover.rect.left; self.pos.x = self.rect.x
+            elif was.bottom <= self.rect.top: self.rect.top = mover.rect.bottom; self.pos.y = self.rect.y; self.vel.y = max(self.vel.y, 0)
+            elif was.top >= self.rect.bottom: self.rect.bottom = mover.rect.top; self.pos.y = self.rect.y; self.vel.y = min(self.vel.y, 0)
+
+    def move(self, platforms, dx, dy):
+        """Moves the hitbox by (dx, dy) and resolves collisions, x first, then y."""
+        if abs(dx) > CCD_MAX_STEP_X or abs(dy) > CCD_MAX_STEP_Y: self.move_swept(platforms, dx, dy); return
         # Horizontal
-        self.pos.x += self.vel.x + 0.5 * self.acc.x
+        self.pos.x += dx
         self.rect.x = round(self.pos.x)
         self.check_collisions_x(platforms)
 
         # Vertical
-        self.pos.y += self.vel.y + 0.5 * self.acc.y
+        self.pos.y += dy
         self.rect.y = round(self.pos.y)
         if not self.wall_sliding: self.on_ground = False
         self.check_collisions_y(platforms)
 
-        # Apply Max Fall Speed AFTER Y collisions
-        # Max fall speed usually isn't affected by power-ups, but you could multiply MAX_FALL_SPEED here if desired
-        if self.vel.y > MAX_FALL_SPEED: self.vel.y = MAX_FALL_SPEED
-
-    def check_collisions_x(self, platforms):
-        collisions = pygame.sprite.spritecollide(self, platforms, False)
+    def move_swept(self, platforms, dx, dy):
+        """
+        Continuous collision for a move longer than CCD_MAX_STEP_X/Y, which a single step could carry
+        through a thin platform or past the landing check. The hitbox swept from start to end picks the
+        platforms in the way; if there are any, the move is split into equal sub-steps short enough to
+        resolve exactly like a normal tick, against those platforms only. An axis stops once it hits.
+        """
+        end = self.rect.copy(); end.topleft = (round(self.pos.x + dx), round(self.pos.y + dy))
+        candidates = self.collide_rect(end.union(self.rect), platforms)
+        steps = max(math.ceil(abs(dx) / CCD_MAX_STEP_X), math.ceil(abs(dy) / CCD_MAX_STEP_Y)) if candidates else 1
+        dx /= steps; dy /= steps
+        if not self.wall_sliding: self.on_ground = False
+        for _ in range(steps):
+            self.pos.x += dx
+            self.rect.x = round(self.pos.x)
+            if self.check_collisions_x(platforms, candidates): dx = 0
+            self.pos.y += dy
+            self.rect.y = round(self.pos.y)
+            if self.check_collisions_y(platforms, candidates): dy = 0
+
+    def collide_rect(self, rect, platforms):
+        """
+        Platforms overlapping rect, in level order (static ones, then solid moving ones). For the level's own group
+        the level's broadphases answer; any other group (a subset, a test's) is scanned as given.
+        """
+        if platforms is not getattr(self.game, 'platforms', None): return [p for p in platforms if rect.colliderect(p.rect)]
+        grid = getattr(self.game, 'platform_grid', None)
+        if grid is not None: hits = grid.collide(rect)
+        else: hits = [platform for platform in platforms if rect.colliderect(platform.rect)]
+        movers = getattr(self.game, 'mover_broadphase', None)
+        if movers is not None: hits.extend(movers.collide(rect))
+        return hits
+
+    def collide_platforms(self, platforms, candidates=None):
+        """
+        Platforms overlapping the hitbox: among candidates if given. For the level's own group, looked up in the
+        level's spatial hash when it is built, followed by the solid moving platforms from the mover broadphase;
+        any other group is checked as given.
+        """
+        if candidates is not None: return [platform for platform in candidates if self.rect.colliderect(platform.rect)]
+        if platforms is not getattr(self.game, 'platforms', None): return pygame.sprite.spritecollide(self, platforms, False)
+        grid = getattr(self.game, 'platform_grid', None)
+        if grid is not None: hits = grid.collide(self.rect)
+        else: hits = pygame.sprite.spritecollide(self, platforms, False)
+        movers = getattr(self.game, 'mover_broadphase', None)
+        if movers is not None: hits.extend(movers.collide(self.rect))
+        return hits
+
+    def check_collisions_x(self, platforms, candidates=None):
+        """Pushes the hitbox out of platforms against the direction of travel. Returns True if it hit any."""
+        collisions = self.collide_platforms(platforms, candidates)
         for platform in collisions:
             if self.vel.x > 0: self.rect.right = platform.rect.left
             elif self.vel.x < 0: self.rect.left = platform.rect.right
             self.pos.x = self.rect.x; self.vel.x = 0
+        return bool(collisions)
 
-    def check_collisions_y(self, platforms):
-        collisions = pygame.sprite.spritecollide(self, platforms, False); collisions.sort(key=lambda p: p.rect.top)
+    def check_collisions_y(self, platforms, candidates=None):
+        """Lands on or bumps into the platforms the hitbox overlaps. Returns True if it did either."""
+        collisions = self.collide_platforms(platforms, candidates)
+        if len(collisions) > 1: collisions.sort(key=lambda p: p.rect.top)
         original_on_ground = self.on_ground; landed_this_frame = False; hit_ceiling_this_frame = False
         for platform in collisions:
             if self.vel.y > 0 and self.rect.bottom > platform.rect.top:
                  if self.rect.centery < platform.rect.top + (PLAYER_HITBOX_HEIGHT / 2): # Check vertical alignment
                     self.rect.bottom = platform.rect.top; landed_this_frame = True; self.vel.y = 0; self.pos.y = self.rect.y
+                    if isinstance(platform, MovingPlatform): self.riding = platform
             elif self.vel.y < 0 and self.rect.top < platform.rect.bottom:
                  if self.rect.centery > platform.rect.bottom - (PLAYER_HITBOX_HEIGHT / 2): # Check vertical alignment
                     self.rect.top = platform.rect.bottom; hit_ceiling_this_frame = True; self.vel.y = 0; self.pos.y = self.rect.y
@@ -323,40 +476,118 @@ class Player(pygame.sprite.Sprite):
         if landed_this_frame and self.wall_sliding: self.wall_sliding = False; self.wall_slide_side = 0
         if landed_this_frame: self.jumps_left = 2
         # No need for `elif hit_ceiling_this_frame: self.vel.y = 0` as it's done in loop
+        return landed_this_frame or hit_ceiling_this_frame
 
 
 # --- Collectible Class ---
 class Collectible(pygame.sprite.Sprite):
-    # ... (Collectible class code - unchanged) ...
-    def __init__(self, frames, x, y):
+    def __init__(self, frames, x, y, phase=0, clock=None):
+        """
+        Args:
+            phase (int): Frames this coin runs ahead of the shared clock (optional third value in level data).
+            clock (AnimationClock): Shared frame counter for every coin; no per-coin update is needed.
+        """
         super().__init__(); self.frames = frames
-        if not self.frames: print("Error: Collectible init empty frames."); self.image = pygame.Surface([COLLECTIBLE_WIDTH, COLLECTIBLE_HEIGHT]); self.image.fill(YELLOW); self.image.set_colorkey(BLACK); self.frames = [self.image]
-        else: self.image = self.frames[0]
-        self.rect = self.image.get_rect(); self.rect.center = (x, y)
-        self.current_frame_index = 0; self.last_anim_update = pygame.time.get_ticks()
-
-    def update(self):
-        now = pygame.time.get_ticks();
-        if not self.frames: return
-        if now - self.last_anim_update > COLLECTIBLE_ANIM_SPEED:
-            self.last_anim_update = now; old_center = self.rect.center
-            self.current_frame_index = (self.current_frame_index + 1) % len(self.frames)
-            self.image = self.frames[self.current_frame_index]
-            self.rect = self.image.get_rect(); self.rect.center = old_center
+        if not self.frames: print("Error: Collectible init empty frames."); fallback = pygame.Surface([COLLECTIBLE_WIDTH, COLLECTIBLE_HEIGHT]); fallback.fill(YELLOW); fallback.set_colorkey(BLACK); self.frames = [fallback]
+        self.clock = clock; self.phase = phase
+        self.rect = self.frames[0].get_rect(); self.rect.center = (x, y) # All frames share one size
+
+    @property
+    def image(self):
+        if self.clock is None: return self.frames[0]
+        return self.frames[(self.clock.frame + self.phase) % len(self.frames)]
 
 # --- Platform Class ---
 class Platform(pygame.sprite.Sprite):
     # ... (Platform class code using tiling - unchanged) ...
     def __init__(self, game, x, y, width, height):
         super().__init__(); self.game = game; self.rect = pygame.Rect(x, y, width, height)
-        self.image = pygame.Surface(self.rect.size, pygame.SRCALPHA).convert_alpha(); self.image.fill((0, 0, 0, 0))
-        if hasattr(self.game, 'platform_tile_img') and self.game.platform_tile_img:
-            tile_img = self.game.platform_tile_img; tile_w, tile_h = tile_img.get_size()
-            if tile_w > 0 and tile_h > 0:
-                for tile_x in range(0, self.rect.width, tile_w):
-                    for tile_y in range(0, self.rect.height, tile_h): self.image.blit(tile_img, (tile_x, tile_y))
-            else: print("Warning: Platform tile zero dimension."); self.image.fill(GRAY)
-        else: print("Warning: Platform tile not loaded."); self.image.fill(GRAY)
+        self._image = None # Built on first use; streamed worlds tile straight into chunk surfaces instead
+
+    @property
+    def image(self):
+        if self._image is None:
+            self._image = pygame.Surface(self.rect.size, pygame.SRCALPHA).convert_alpha(); self._image.fill((0, 0, 0, 0))
+            draw_platform_tiles(self._image, self.game, self.rect, self.rect.topleft)
+        return self._image
+
+# --- Moving Platform Class ---
+class MovingPlatform(Platform):
+    def __init__(self, game, index, width, height, keys, elevator=False, crumble=None):
+        """
+        Platform following keyframes, advanced once per physics tick before the player moves (Game.update_movers).
+        Args:
+            index (int): Position in the level's mover list (how snapshots refer to the one being ridden).
+            keys (list): (seconds, x, y) top-left keyframes in time order, looped over the last key's time.
+            elevator (bool): Moves along the keys only while ridden, and back towards the first key when not.
+            crumble (tuple): (hold s, gone s): gives way this long after being landed on, returns after the other.
+        """
+        super().__init__(game, round(keys[0][1]), round(keys[0][2]), width, height)
+        self.index = index; self.keys = keys; self.elevator = elevator; self.crumble = crumble
+        self.reset()
+
+    def reset(self):
+        """Back to the first key, solid (start of an attempt)."""
+        self.end_tick = round(self.keys[-1][0] * self.game.tick_rate) # Path length in ticks (0 = stays put)
+        self.tick = 0; self.solid = True; self.crumble_timer = 0 # Ticks until it gives way or returns (0 = intact)
+        self.rect.topleft = self.position(0); self.prev_topleft = self.rect.topleft; self.delta = (0, 0)
+
+    def position(self, tick):
+        """Rounded top-left `tick` ticks along the path."""
+        t = tick / self.game.tick_rate; keys = self.keys
+        for i in range(1, len(keys)):
+            t1, x1, y1 = keys[i]
+            if t <= t1:
+                t0, x0, y0 = keys[i - 1]
+                f = (t - t0) / (t1 - t0) if t1 > t0 else 1.0
+                return round(x0 + (x1 - x0) * f), round(y0 + (y1 - y0) * f)
+        return round(keys[-1][1]), round(keys[-1][2])
+
+    def advance(self, player):
+        """One physics tick along the path (the move is kept in delta for riders), then crumbling/returning."""
+        ridden = player.riding is self
+        if self.elevator: self.tick = min(self.tick + 1, self.end_tick) if ridden else max(self.tick - 1, 0)
+        elif self.end_tick: self.tick = (self.tick + 1) % self.end_tick
+        self.prev_topleft = x0, y0 = self.rect.topleft
+        x, y = self.position(self.tick)
+        self.delta = (x - x0, y - y0); self.rect.topleft = (x, y)
+        if self.crumble is None: return
+        if self.crumble_timer:
+            self.crumble_timer -= 1
+            if self.crumble_timer: return
+            if self.solid: self.solid = False; self.crumble_timer = max(1, round(self.crumble[1] * self.game.tick_rate))
+            elif self.rect.colliderect(player.rect): self.crumble_timer = 1 # Don't come back inside the player
+            else: self.solid = True
+        elif ridden and self.solid: self.crumble_timer = max(1, round(self.crumble[0] * self.game.tick_rate))
+
+    def get_state(self):
+        return (self.tick, self.rect.x, self.rect.y, self.prev_topleft, self.delta, self.solid, self.crumble_timer)
+
+    def set_state(self, state):
+        self.tick, self.rect.x, self.rect.y, self.prev_topleft, self.delta, self.solid, self.crumble_timer = state
+
+    def draw_position(self, alpha=1.0):
+        """Top-left to blit at, interpolated between the last two ticks; shakes while about to give way."""
+        prev_x, prev_y = self.prev_topleft
+        x = round(prev_x + (self.rect.x - prev_x) * alpha); y = round(prev_y + (self.rect.y - prev_y) * alpha)
+        if self.solid and self.crumble_timer: x += self.crumble_timer // 2 % 3 - 1
+        return x, y
+
+def draw_platform_tiles(surface, game, rect, origin):
+    """Tiles platform rect (world coordinates) onto surface, whose top-left sits at world point origin."""
+    local = rect.move(-origin[0], -origin[1])
+    clip = local.clip(surface.get_rect())
+    if not clip: return
+    tile_img = getattr(game, 'platform_tile_img', None)
+    if not tile_img: print("Warning: Platform tile not loaded."); surface.fill(GRAY, clip); return
+    tile_w, tile_h = tile_img.get_size()
+    if tile_w <= 0 or tile_h <= 0: print("Warning: Platform tile zero dimension."); surface.fill(GRAY, clip); return
+    # Tiles start at the platform's own corner; only those touching the visible part are blitted
+    first_x = local.x + (clip.x - local.x) // tile_w * tile_w; first_y = local.y + (clip.y - local.y) // tile_h * tile_h
+    old_clip = surface.get_clip(); surface.set_clip(clip)
+    for tile_x in range(first_x, clip.right, tile_w):
+        for tile_y in range(first_y, clip.bottom, tile_h): surface.blit(tile_img, (tile_x, tile_y))
+    surface.set_clip(old_clip)
 
 # --- Goal Class ---
 class Goal(pygame.sprite.Sprite):
@@ -365,7 +596,7 @@ class Goal(pygame.sprite.Sprite):
         super().__init__(); self.game = game
         self.image = pygame.Surface([width, height]); self.image.fill(GREEN); self.image.set_colorkey(BLACK); fallback_used = True
         if hasattr(self.game, 'door_img') and self.game.door_img:
-            try: scaled_door_img = pygame.transform.smoothscale(self.game.door_img, (width, height)); self.image = scaled_door_img; fallback_used = False
+            try: scaled_door_img = self.game.get_door_image((width, height)); self.image = scaled_door_img; fallback_used = False
             except (ValueError, TypeError, pygame.error) as e: print(f"Error scaling door: {e}")
         if fallback_used: print(f"Warning: Using fallback goal at ({x},{y}).")
         self.rect = self.image.get_rect(); self.rect.topleft = (x, y)
\ No newline at end of file
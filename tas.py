@@ -0,0 +1,307 @@
+# tas.py
+# Tool-assisted fastest times: beam search over per-tick inputs through the real game update,
+# spread across a process pool. The best input sequence for each level is saved as a replay.
+#   python tas.py                        # Every level, all cores
+#   python tas.py --level 3 --beam 500   # One level, wider search
+#   python replay.py verify replays/level_03_tas.rpl
+import argparse
+import heapq
+import math
+import multiprocessing
+import sys
+import time
+from settings import * # Import all settings
+from inputs import DirectInput
+from levelpack import get_level_pack
+from reachability import DISTANCE_CELL, LevelGraph, build_envelopes, distance_field, goal_region, region_cells
+from replay import Replay, ReplayRecorder, verify_replay
+from snapshot import GameSnapshot
+from tracing import set_log_level
+
+TAS_ACTIONS = tuple(move | jump for move in (0, INPUT_LEFT, INPUT_RIGHT) for jump in (0, INPUT_JUMP))
+DIVERSITY_CELL = 32 # Beam survivors per square of this size are capped, so greedy ranking can't crowd out other routes
+STALE_TICKS = PHYSICS_TICK_RATE // 2 # Lineages stuck at a node longer than this lose rank a tick per tick
+WALL_SEGMENT = PLAYER_HITBOX_HEIGHT * 2 # Walls are planned in pieces this tall: where on a wall you land matters
+
+class _RouteGraph(LevelGraph):
+    """LevelGraph with walls cut into segments (a wall can only be slid down, so landing low on it isn't reaching its top)."""
+    def __init__(self, level, envelopes):
+        super().__init__(level, envelopes)
+        for upper in self.nodes:
+            for lower in self.nodes:
+                if upper[2] and lower[2] == upper[2] and lower[0] == upper[0] and lower[1][0] == upper[1][1] + 1:
+                    self.edges[upper][lower] = 1 # Sliding into the next segment down
+
+    def find_walls(self):
+        return [((left, left), (top, min(hi, top + WALL_SEGMENT - 1)), side)
+                for (left, _), (lo, hi), side in super().find_walls() for top in range(lo, hi + 1, WALL_SEGMENT)]
+
+# --- Route Plan (beam ranking) ---
+def route_plan(level, envelopes):
+    """
+    Ranks progress through a level with its reachability graph (see reachability.py). Returns
+    (nodes, start) where nodes[i] = (node, ticks to goal, next target) and start indexes the start node.
+    Ticks to goal are lower bounds through the graph (inf if the goal can't be reached from the node);
+    the next target is the (left edge range, feet range) of the node or goal to head for from there.
+    """
+    graph = _RouteGraph(level, envelopes)
+    nodes = list(graph.edges) # Includes a thin-air start node
+    # The graph ignores ceilings, so it has nodes nothing can get to (like the top of a full-width ceiling):
+    # routes through them would outrank every real one
+    from_start = distance_field(level, graph.start[:2])
+    open_nodes = {node for node in nodes if any(d is not None for d in _region(from_start, node[:2]))}
+    goal_target = goal_region(level)
+    to_goal = {}; next_target = {}; queue = []; order = 0
+    predecessors = {node: [] for node in nodes}
+    for node, targets in graph.edges.items():
+        if node not in open_nodes: continue
+        for target, ticks in targets.items():
+            if target in open_nodes: predecessors[target].append((node, ticks))
+        touch = graph.touch_ticks(node, level.goal)
+        if touch is not None:
+            to_goal[node] = touch; next_target[node] = goal_target
+            heapq.heappush(queue, (touch, order, node)); order += 1
+    while queue: # Dijkstra backwards from the goal
+        ticks, _, node = heapq.heappop(queue)
+        if ticks > to_goal[node]: continue
+        for previous, cost in predecessors[node]:
+            if ticks + cost < to_goal.get(previous, math.inf):
+                to_goal[previous] = ticks + cost; next_target[previous] = node[:2]
+                heapq.heappush(queue, (ticks + cost, order, previous)); order += 1
+    plan = [(node, to_goal.get(node, math.inf), next_target.get(node, goal_target)) for node in nodes]
+    return plan, nodes.index(graph.start)
+
+def _region(field, target):
+    """Field distances over the cells of target."""
+    return [field[2][index] for index in region_cells(field[:2], target)]
+
+def _distance_at(field, x, y):
+    """Field distance at a hitbox top-left, interpolated between cells so every pixel of progress counts."""
+    width, height, distances = field
+    fx = min(max(x / DISTANCE_CELL, 0.0), width - 1.001); fy = min(max(y / DISTANCE_CELL, 0.0), height - 1.001)
+    cx = int(fx); cy = int(fy); tx = fx - cx; ty = fy - cy
+    total = weight_sum = 0.0
+    for dx, dy, weight in ((0, 0, (1 - tx) * (1 - ty)), (1, 0, tx * (1 - ty)), (0, 1, (1 - tx) * ty), (1, 1, tx * ty)):
+        d = distances[(cy + dy) * width + cx + dx]
+        if d is not None and weight > 0: total += d * weight; weight_sum += weight
+    return total / weight_sum if weight_sum else math.inf # Inside a platform corner: kept but ranked last
+
+class _PlanIndex:
+    """Finds the plan node the player stands on or slides down, by line (feet height or wall edge)."""
+    def __init__(self, plan):
+        self.lines = {}
+        for i, ((x_range, y_range, side), _, _) in enumerate(plan):
+            line, span = ((side, y_range[0]), x_range) if side == 0 else ((side, x_range[0]), y_range)
+            self.lines.setdefault(line, []).append((span[0], span[1], i))
+
+    def find(self, player):
+        """Index of the player's current surface or wall, or None while airborne."""
+        if player.on_ground: line, position = (0, player.rect.bottom), player.rect.x
+        elif player.wall_sliding: line, position = (player.wall_slide_side, player.rect.x), player.rect.bottom
+        else: return None
+        for lo, hi, i in self.lines.get(line, ()):
+            if lo <= position <= hi: return i
+        return None
+
+# --- Search Worker (one headless Game per pool process) ---
+_worker = {} # 'game', 'envelopes', 'level', 'coins', 'plan', 'fields' once initialised in this process
+
+def _start_worker(quiet=True):
+    if quiet: set_log_level('WARNING') # Pool workers skip the game's per-level INFO messages
+    import Game
+    _worker['game'] = Game.Game(headless=True); _worker.pop('level', None)
+
+def _envelopes(depth):
+    """Normal and power-up envelopes (by powerup_active), kept while the depth stays the same."""
+    if _worker.get('envelopes', (None,))[0] != depth:
+        _worker['envelopes'] = (depth, {powerup: build_envelopes(depth, powerup) for powerup in (False, True)})
+    return _worker['envelopes'][1]
+
+def _load_level(level_index, depth):
+    """
+    Loads level_index in this process's Game and plans its route (every process plans for itself, so
+    jobs stay small). Returns (packed start state, start node).
+    """
+    game = _worker['game']
+    game.start_attempt(level_index)
+    level = get_level_pack().level(level_index)
+    # Collecting coins can turn the power-up on, so a state is ranked by the plan for its own movement
+    plans = {powerup: route_plan(level, envelopes) for powerup, envelopes in _envelopes(depth).items()}
+    start_node = plans[False][1]
+    _worker['level'] = level_index; _worker['fields'] = {}
+    _worker['plan'] = (level, {powerup: plan for powerup, (plan, _) in plans.items()}, _PlanIndex(plans[False][0]))
+    _worker['coins'] = game.collectibles.sprites() # Bit i of a packed state's coin mask is coins[i]
+    return pack_state(game), start_node
+
+def _field(target):
+    """Distance field towards target, built the first time a lineage in this process needs it."""
+    field = _worker['fields'].get(target)
+    if field is None: field = _worker['fields'][target] = distance_field(_worker['plan'][0], target)
+    return field
+
+def pack_state(game):
+    """Picklable form of a GameSnapshot: remaining coins become a bit mask over the level's coin list."""
+    snapshot = GameSnapshot(game)
+    remaining = set(snapshot.collectibles)
+    mask = sum(1 << i for i, coin in enumerate(_worker['coins']) if coin in remaining)
+    return (snapshot.level_ticks, snapshot.player_state, mask, snapshot.world_collected, snapshot.score,
+            snapshot.level_elapsed_time, snapshot.timer_active, snapshot.sim_time_ms,
+            snapshot.coins_for_powerup_count, snapshot.powerup_active, snapshot.powerup_end_time, snapshot.movers)
+
+def unpack_state(game, state):
+    snapshot = GameSnapshot.__new__(GameSnapshot)
+    (snapshot.level_ticks, snapshot.player_state, mask, snapshot.world_collected, snapshot.score,
+     snapshot.level_elapsed_time, snapshot.timer_active, snapshot.sim_time_ms, snapshot.coins_for_powerup_count,
+     snapshot.powerup_active, snapshot.powerup_end_time, snapshot.movers) = state
+    snapshot.level_index = game.current_level_index
+    snapshot.collectibles = [coin for i, coin in enumerate(_worker['coins']) if mask >> i & 1]
+    return snapshot
+
+def _expand(job):
+    """
+    Runs every action from each (state, last node, tick it got there) in job for one tick. Returns
+    (parent, bits, state, last node, arrival tick, key, rank, finished) for every child that didn't fall out.
+    """
+    level_index, depth, tick, states, pos_step, vel_step = job
+    if _worker.get('level') != level_index: _load_level(level_index, depth)
+    game = _worker['game']; source = game.input_source = DirectInput()
+    _, plans, plan_index = _worker['plan']
+    children = []
+    for parent, (state, last_node, arrival) in states:
+        snapshot = unpack_state(game, state)
+        for bits in TAS_ACTIONS:
+            game.restore_state(snapshot); game.game_state = STATE_PLAYING
+            source.bits = bits
+            game.update()
+            if game.game_state == STATE_GAME_OVER: continue
+            player = game.player
+            finished = game.game_state in (STATE_LEVEL_COMPLETE, STATE_GAME_WON)
+            node = plan_index.find(player); node_arrival = arrival
+            if node is None: node = last_node # Airborne: still ranked by where it took off from
+            elif node != last_node: node_arrival = tick
+            _, to_goal, target = plans[game.powerup_active][node]
+            # The plan's edges ignore obstacles, so lineages that can't follow it fall behind other routes
+            to_goal += max(0, tick - node_arrival - STALE_TICKS)
+            rank = (to_goal, _distance_at(_field(target), player.pos.x, player.pos.y))
+            key = (round(player.pos.x / pos_step), round(player.pos.y / pos_step), round(player.vel.x / vel_step),
+                   round(player.vel.y / vel_step), player.jumps_left, player.wall_sliding, game.powerup_active, node)
+            children.append((parent, bits, pack_state(game), node, node_arrival, key, rank, finished))
+    return children
+
+# --- Beam Search ---
+def search_level(level_index, pool=None, workers=1, beam_width=300, max_seconds=30.0, pos_step=2.0, vel_step=0.5,
+                 per_cell_limit=3, on_progress=None):
+    """
+    Fastest input sequence found for one level. Each tick, every beam state tries every action;
+    children are deduplicated on quantized position/velocity/jumps/wall slide and ranked by the
+    reachability graph (with or without the power-up, as the state has it): fewest ticks to the goal
+    from the last surface or wall touched, then free-space distance to the next one on that route. The beam_width best survive, at most per_cell_limit per DIVERSITY_CELL
+    square. The first tick a child reaches the goal ends the search.
+    Returns (list of per-tick bits, ticks) or (None, ticks searched) if the goal wasn't reached.
+    """
+    depth = envelope_depth([level_index])
+    per_node_limit = max(1, beam_width // 4)
+    if pool is None:
+        if 'game' not in _worker: _start_worker(quiet=False)
+        start, start_node = _load_level(level_index, depth)
+    else: start, start_node = pool.apply(_load_level, (level_index, depth)) # Others load it on their first job
+    history = [] # Per tick: list of (parent index in the previous tick's beam, bits)
+    beam = [(start, start_node, 0)]
+    for tick in range(int(max_seconds * PHYSICS_TICK_RATE)):
+        states = list(enumerate(beam))
+        jobs_count = max(1, min(len(states), workers * 4))
+        jobs = [(level_index, depth, tick, states[i::jobs_count], pos_step, vel_step) for i in range(jobs_count)]
+        results = map(_expand, jobs) if pool is None else pool.imap_unordered(_expand, jobs)
+        best = {} # key -> child
+        winner = None
+        for children in results:
+            for child in children:
+                if child[7] and (winner is None or child[:2] < winner[:2]): winner = child
+                current = best.get(child[5])
+                # Ties go by parent and input, so the result doesn't depend on which worker finished first
+                if current is None or (child[6], child[0], child[1]) < (current[6], current[0], current[1]):
+                    best[child[5]] = child
+        if winner is not None:
+            history.append([(winner[0], winner[1])])
+            return _inputs(history, 0), tick + 1
+        survivors = []; per_cell = {}; per_node = {}
+        for child in sorted(best.values(), key=lambda c: (c[6], c[0], c[1])):
+            cell = (child[2][1][6] // DIVERSITY_CELL, child[2][1][7] // DIVERSITY_CELL) # Hitbox top-left
+            # Caps keep the beam spread over the level and over routes, so an optimistic graph edge can't take it all
+            if per_cell.get(cell, 0) >= per_cell_limit or per_node.get(child[3], 0) >= per_node_limit: continue
+            per_cell[cell] = per_cell.get(cell, 0) + 1; per_node[child[3]] = per_node.get(child[3], 0) + 1
+            survivors.append(child)
+            if len(survivors) == beam_width: break
+        if not survivors: break
+        history.append([(c[0], c[1]) for c in survivors])
+        beam = [c[2:5] for c in survivors]
+        if on_progress is not None: on_progress(tick + 1, survivors[0][6])
+    return None, len(history)
+
+def envelope_depth(indices):
+    """Fall depth the jump envelopes must cover for the given levels (shared so workers build them once)."""
+    return max((get_level_pack().level(i).world_size or (SCREEN_WIDTH, SCREEN_HEIGHT))[1] for i in indices) + PLAYER_HITBOX_HEIGHT + 50
+
+def _inputs(history, index):
+    """Walks parent links back from entry index of the last tick."""
+    bits = []
+    for entries in reversed(history):
+        parent, tick_bits = entries[index]
+        bits.append(tick_bits); index = parent
+    bits.reverse()
+    return bits
+
+def to_replay(level_index, bits):
+    runs = []
+    for b in bits:
+        if runs and runs[-1][0] == b: runs[-1][1] += 1
+        else: runs.append([b, 1])
+    return Replay(level_index, runs, level_time=len(bits) / PHYSICS_TICK_RATE)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Search for the fastest input sequence of each level.")
+    parser.add_argument('--level', type=int, help="Level number (1-based); all levels by default")
+    parser.add_argument('--beam', type=int, default=300, help="States kept per tick")
+    parser.add_argument('--max-beam', type=int, default=1200, help="Retry unsolved levels with double the beam up to this")
+    parser.add_argument('--per-cell', type=int, default=3, help=f"States kept per {DIVERSITY_CELL}px square")
+    parser.add_argument('--workers', type=int, default=0, help="Processes (0 = one per CPU core)")
+    parser.add_argument('--max-seconds', type=float, default=20.0, help="Give up on a level after this much game time")
+    parser.add_argument('--pos-step', type=float, default=2.0, help="Position quantum (px) for merging states")
+    parser.add_argument('--vel-step', type=float, default=0.5, help="Velocity quantum (px/tick) for merging states")
+    args = parser.parse_args()
+    set_log_level('WARNING') # The game's per-level INFO messages would bury the results
+    workers = args.workers or os.cpu_count() or 1
+    indices = range(len(get_level_pack())) if args.level is None else [args.level - 1]
+    pool = multiprocessing.Pool(workers, _start_worker) if workers > 1 else None
+    recorder = ReplayRecorder(); game = None; failures = 0
+    try:
+        for level_index in indices:
+            start = time.perf_counter(); beam = args.beam
+            while True:
+                bits, ticks = search_level(level_index, pool, workers, beam, args.max_seconds, args.pos_step,
+                                           args.vel_step, args.per_cell)
+                if bits is not None or beam * 2 > args.max_beam: break
+                beam *= 2
+            elapsed = time.perf_counter() - start
+            if bits is None:
+                print(f"Level {level_index + 1}: goal not reached in {ticks} ticks, beam {beam} ({elapsed:.1f}s)")
+                failures += 1
+                continue
+            replay = to_replay(level_index, bits)
+            if game is None:
+                import Game
+                game = Game.Game(headless=True)
+            finished, _, level_time, problems = verify_replay(replay, game)
+            if not finished or problems:
+                print(f"Level {level_index + 1}: found {ticks} ticks but replay failed: {problems}"); failures += 1
+                continue
+            replay.level_time = level_time
+            os.makedirs(recorder.replay_dir, exist_ok=True)
+            path = recorder.replay_path(level_index, 'tas'); replay.save(path)
+            print(f"Level {level_index + 1}: {level_time:.3f}s ({ticks} ticks, {len(replay.runs)} runs) "
+                  f"-> {path} [beam {beam}, {elapsed:.1f}s search]")
+    finally:
+        if pool is not None: pool.close(); pool.join()
+    if game is not None: pygame.quit()
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,6 @@
+# conftest.py
+# The game's modules live at the repository root; tests import them from there.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,50 @@
+# test_batch_physics.py
+# Agent-by-agent parity between BatchPhysics and the game's own update (Player.update, coins, goal, falling out).
+#   python -m pytest tests/test_batch_physics.py
+import contextlib
+import os
+import pytest
+from settings import * # Import all settings
+from batch_physics import BatchPhysics, game_agent_state, random_inputs
+from inputs import ScriptedInput
+from levelpack import get_level_pack
+
+AGENTS = 12; TICKS = 400
+
+@pytest.fixture(scope='module')
+def game():
+    import Game
+    with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null): game = Game.Game(headless=True)
+    yield game
+    pygame.quit()
+
+def start_level(game, level_index):
+    """Starts an attempt at level_index and returns its start snapshot."""
+    with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null): game.start_attempt(level_index)
+    return game.snapshot_state()
+
+@pytest.mark.parametrize('level_index', range(len(get_level_pack())))
+def test_matches_game_update(game, level_index):
+    """Seeded random inputs: position, velocity, jumps, wall sliding, score and status match on every tick."""
+    inputs = random_inputs(TICKS, AGENTS, seed=level_index)
+    start = start_level(game, level_index)
+    batch = BatchPhysics(game.level_pack.level(level_index), AGENTS, game.sim_time_ms)
+    expected = []
+    with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null):
+        for agent in range(AGENTS):
+            game.restore_state(start); game.game_state = STATE_PLAYING
+            game.input_source = ScriptedInput([(int(bits), 1) for bits in inputs[:, agent]])
+            states = []
+            while len(states) < TICKS and game.game_state == STATE_PLAYING: game.update(); states.append(game_agent_state(game))
+            expected.append(states)
+    for tick in range(TICKS):
+        batch.step(inputs[tick])
+        for agent in range(AGENTS):
+            if tick < len(expected[agent]):
+                assert batch.agent_state(agent) == expected[agent][tick], f"agent {agent} differs at tick {tick}"
+
+def test_start_matches_player_reset(game):
+    """Agents start where Player.reset() snaps the player on every level."""
+    for level_index in range(len(game.level_pack)):
+        start_level(game, level_index)
+        assert BatchPhysics(game.level_pack.level(level_index), 1).start == game.player.rect.topleft
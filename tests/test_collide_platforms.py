@@ -0,0 +1,31 @@
+# test_collide_platforms.py
+# Player collision lookups: the level's broadphase answers for the level's own group, other groups are used as given.
+#   python -m pytest tests/test_collide_platforms.py
+import contextlib
+import os
+import pytest
+from settings import * # Import all settings
+
+@pytest.fixture(scope='module')
+def game():
+    import Game
+    with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null):
+        game = Game.Game(headless=True); game.start_attempt(0)
+    yield game
+    pygame.quit()
+
+def test_level_group_uses_grid(game):
+    player = game.player; ground = game.platform_grid.collide(player.rect.move(0, 1))
+    player.rect.y += 1
+    try: assert player.collide_platforms(game.platforms) == ground and ground
+    finally: player.rect.y -= 1
+
+def test_other_group_is_used_as_given(game):
+    """A subset (or an unrelated group) is not replaced by the level's grid."""
+    player = game.player; player.rect.y += 1
+    try:
+        assert player.collide_platforms(pygame.sprite.Group()) == []
+        assert player.collide_rect(player.rect, pygame.sprite.Group()) == []
+        ground = player.collide_platforms(game.platforms)[0]
+        assert player.collide_platforms(pygame.sprite.Group(ground)) == [ground]
+    finally: player.rect.y -= 1
@@ -0,0 +1,24 @@
+# test_ghost.py
+# Ghost recording and file round trips, including positions past the int16 range of version 1 files.
+#   python -m pytest tests/test_ghost.py
+import zlib
+from array import array
+import pygame
+from types import SimpleNamespace
+from ghost import Ghost, GhostRecorder, GHOST_HEADER, GHOST_MAGIC
+
+def player_at(x, y):
+    return SimpleNamespace(rect=pygame.Rect(x, y, 1, 1), current_frame_index=1, facing_right=True, current_action='run')
+
+def test_round_trip_keeps_positions_of_wide_worlds():
+    """Streamed worlds run past 32767 px; recorded positions are stored unclamped."""
+    recorder = GhostRecorder(); path = [(10, 20), (40000, -70000), (123456, 33000)]
+    for x, y in path: recorder.record(player_at(x, y))
+    ghost = Ghost.from_bytes(recorder.finish(3, 12.5).to_bytes()); ghost.decode()
+    assert (ghost.level_index, ghost.level_time, ghost.tick_count) == (3, 12.5, 3)
+    assert list(zip(ghost.positions[0::2], ghost.positions[1::2])) == path
+
+def test_reads_version_1_files():
+    data = GHOST_HEADER.pack(GHOST_MAGIC, 1, 0, 2, 4.0) + zlib.compress(array('h', [1, -2, 300, 4]).tobytes() + bytes([5, 6]))
+    ghost = Ghost.from_bytes(data); ghost.decode()
+    assert list(ghost.positions) == [1, -2, 300, 4] and list(ghost.frames) == [5, 6]
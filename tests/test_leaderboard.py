@@ -0,0 +1,22 @@
+# test_leaderboard.py
+# One-time import of the legacy highscore.txt into the run database.
+#   python -m pytest tests/test_leaderboard.py
+from leaderboard import Leaderboard
+
+def open_leaderboard(tmp_path, highscore_file):
+    return Leaderboard(str(tmp_path / 'leaderboard.db'), str(highscore_file))
+
+def test_missing_file_leaves_migration_pending(tmp_path):
+    """The file turning up later (e.g. the game first started from another directory) still gets imported."""
+    highscore = tmp_path / 'highscore.txt'
+    board = open_leaderboard(tmp_path, highscore)
+    assert board.best_total_time() == float('inf'); board.close()
+    highscore.write_text("62.427")
+    board = open_leaderboard(tmp_path, highscore)
+    assert board.best_total_time() == 62.427; board.close()
+
+def test_imports_once(tmp_path):
+    highscore = tmp_path / 'highscore.txt'; highscore.write_text("62.427")
+    open_leaderboard(tmp_path, highscore).close()
+    board = open_leaderboard(tmp_path, highscore)
+    assert board.conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0] == 1; board.close()
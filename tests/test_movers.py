@@ -0,0 +1,110 @@
+# test_movers.py
+# Moving platforms on a one-level pack (compiled like collision.py's bench): riding, elevators, crumbling,
+# snapshots and the sweep-and-prune broadphase.
+#   python -m pytest tests/test_movers.py
+import contextlib
+import os
+import random
+import pytest
+from settings import * # Import all settings
+from inputs import DirectInput
+from levelpack import LevelPack, compile_levels, generate_mover_level
+
+SHUTTLE, ELEVATOR, LEDGE = range(3)
+MOVER_LEVEL = {
+    'platforms': [(0, 560, SCREEN_WIDTH, 40)], 'collectibles': [], 'goal': (SCREEN_WIDTH - 60, 490, 50, 70),
+    'player_start': (130, 300), # Snaps onto the shuttle
+    'movers': [{'size': (100, 20), 'keys': [(0, 100, 400), (2, 220, 400), (4, 100, 400)]},
+               {'size': (100, 20), 'keys': [(0, 350, 450), (2, 350, 330)], 'elevator': True},
+               {'size': (100, 20), 'keys': [(0, 550, 450)], 'crumble': True}],
+}
+
+@pytest.fixture(scope='module')
+def game():
+    import Game
+    with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null): game = Game.Game(headless=True)
+    yield game
+    pygame.quit()
+
+def start(game, level_data, tmp_path):
+    """Swaps in a pack holding only level_data and starts an attempt at it."""
+    path = tmp_path / 'movers.pack'; path.write_bytes(compile_levels([level_data]))
+    game.level_pack = LevelPack.open(str(path)); game.level_templates.templates.clear(); game.level_start_snapshot = None
+    game.input_source = DirectInput()
+    with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null): game.start_attempt(0)
+    return game.movers
+
+def ticks(seconds):
+    return round(seconds * PHYSICS_TICK_RATE)
+
+def step(game, count):
+    for _ in range(count):
+        game.update(); assert game.game_state == STATE_PLAYING
+
+def put_on(game, mover):
+    """Drops the player onto mover's top; returns once it has landed there."""
+    player = game.player
+    player.pos = pygame.math.Vector2(mover.rect.x + 35, mover.rect.top - PLAYER_HITBOX_HEIGHT)
+    player.rect.topleft = (round(player.pos.x), round(player.pos.y)); player.vel = pygame.math.Vector2(0, 0)
+    player.riding = None; player.on_ground = False
+    step(game, 1)
+    assert player.riding is mover and player.rect.bottom == mover.rect.top
+
+def test_shuttle_carries_player(game, tmp_path):
+    movers = start(game, MOVER_LEVEL, tmp_path); shuttle = movers[SHUTTLE]; player = game.player
+    assert player.rect.bottom == shuttle.rect.top
+    step(game, 1); offset = player.rect.x - shuttle.rect.x
+    for _ in range(ticks(3)):
+        step(game, 1)
+        assert player.riding is shuttle and player.rect.bottom == shuttle.rect.top and player.rect.x - shuttle.rect.x == offset
+    assert shuttle.rect.x != 100 # It did move
+
+def test_elevator_runs_only_while_ridden(game, tmp_path):
+    movers = start(game, MOVER_LEVEL, tmp_path); elevator = movers[ELEVATOR]; home = elevator.rect.topleft
+    step(game, ticks(1))
+    assert elevator.rect.topleft == home
+    put_on(game, elevator); step(game, ticks(1))
+    assert elevator.rect.y < home[1] and game.player.riding is elevator and game.player.rect.bottom == elevator.rect.top
+    game.player.pos.x = game.player.rect.x = 10 # Step off onto the floor, well away
+    step(game, ticks(3))
+    assert game.player.riding is not elevator and elevator.rect.topleft == home
+
+def test_crumbling_ledge_gives_way_and_returns(game, tmp_path):
+    movers = start(game, MOVER_LEVEL, tmp_path); ledge = movers[LEDGE]
+    put_on(game, ledge)
+    step(game, ticks(MOVER_CRUMBLE_DELAY))
+    assert ledge.solid # Holds for the whole delay...
+    step(game, 2)
+    assert not ledge.solid # ...then gives way
+    step(game, ticks(1))
+    assert game.player.rect.bottom == 560 and game.player.on_ground # Fell through to the floor
+    step(game, ticks(MOVER_CRUMBLE_RESPAWN) - ticks(1) - 2)
+    assert not ledge.solid
+    step(game, 2)
+    assert ledge.solid and ledge.rect.topleft == (550, 450)
+
+def test_snapshot_replays_movers(game, tmp_path):
+    """Restoring a mid-run snapshot and feeding the same inputs reproduces player and mover state tick for tick."""
+    movers = start(game, MOVER_LEVEL, tmp_path); rng = random.Random(7)
+    bits = [rng.choice((0, INPUT_LEFT, INPUT_RIGHT, INPUT_RIGHT | INPUT_JUMP, INPUT_JUMP)) for _ in range(ticks(6))]
+    put_on(game, movers[LEDGE]); step(game, 5) # Mid-crumble when the snapshot is taken
+    snapshot = game.snapshot_state()
+    runs = []
+    for _ in range(2):
+        game.restore_state(snapshot); game.game_state = STATE_PLAYING; states = []
+        for b in bits:
+            game.input_source.bits = b; game.update()
+            states.append((game.game_state, game.player.get_state(), [mover.get_state() for mover in movers]))
+        runs.append(states)
+    assert runs[0] == runs[1]
+
+def test_sweep_and_prune_matches_brute_force(game, tmp_path):
+    movers = start(game, generate_mover_level(120, columns=12), tmp_path); broadphase = game.mover_broadphase
+    width, height = game.level_pack.level(0).world_size; rng = random.Random(3)
+    for tick in range(ticks(5)):
+        for mover in movers: mover.advance(game.player)
+        if tick % 50 == 0: movers[tick % len(movers)].solid = not movers[tick % len(movers)].solid # Some gone
+        broadphase.update()
+        for _ in range(20):
+            rect = pygame.Rect(rng.randrange(width), rng.randrange(height), rng.randrange(1, 400), rng.randrange(1, 300))
+            assert broadphase.collide(rect) == [m for m in movers if m.solid and rect.colliderect(m.rect)]
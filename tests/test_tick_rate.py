@@ -0,0 +1,64 @@
+# test_tick_rate.py
+# Movement scaled to the physics tick rate (Game.set_tick_rate, sprites.TickPhysics) lands the same at any rate,
+# including rates slow enough that falls go through Player.move_swept, and never leaves the hitbox inside a platform.
+#   python -m pytest tests/test_tick_rate.py
+import contextlib
+import os
+import pytest
+from settings import * # Import all settings
+from inputs import DirectInput
+
+RATES = (60, 30, 20, 15) # 20 and 15 Hz fall more than CCD_MAX_STEP_Y per tick at MAX_FALL_SPEED
+DROP_HEIGHT = 2000
+
+@pytest.fixture(scope='module')
+def game():
+    import Game
+    with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null): game = Game.Game(headless=True)
+    yield game
+    game.set_tick_rate(PHYSICS_TICK_RATE)
+    pygame.quit()
+
+def start_level(game, rate, level_index=0):
+    game.set_tick_rate(rate); game.input_source = DirectInput()
+    with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null): game.start_attempt(level_index)
+
+def open_sky_platform(game):
+    """The thinnest platform with nothing above it over the hitbox width, so a drop from high up lands on it."""
+    for platform in sorted(game.platforms, key=lambda p: (p.rect.height, p.rect.x)):
+        if platform.rect.width < PLAYER_HITBOX_WIDTH: continue
+        column = pygame.Rect(platform.rect.x, platform.rect.top - DROP_HEIGHT - PLAYER_HITBOX_HEIGHT, PLAYER_HITBOX_WIDTH, DROP_HEIGHT + PLAYER_HITBOX_HEIGHT)
+        if not any(column.colliderect(other.rect) for other in game.platforms): return platform
+    pytest.skip("No platform with open sky above it")
+
+def run_until_landed(game, max_seconds=5.0):
+    """Ticks with no input until the player stands on something; asserts the hitbox never ends a tick inside a platform."""
+    player = game.player
+    for _ in range(round(max_seconds * game.tick_rate)):
+        game.update()
+        assert game.game_state == STATE_PLAYING
+        assert not [p for p in game.platforms if player.rect.colliderect(p.rect)], f"inside a platform at {player.rect}"
+        if player.on_ground: return player.rect.copy()
+    pytest.fail(f"never landed at {game.tick_rate} Hz")
+
+@pytest.mark.parametrize('rate', RATES)
+@pytest.mark.parametrize('offset', range(0, 60, 6)) # Where the last tick of the fall starts, relative to the platform
+def test_drop_lands_on_platform(game, rate, offset):
+    """Falling at MAX_FALL_SPEED from high above, the player lands on top of the platform below, not through it."""
+    start_level(game, rate)
+    platform = open_sky_platform(game); player = game.player
+    player.pos = pygame.math.Vector2(platform.rect.x, platform.rect.top - DROP_HEIGHT - PLAYER_HITBOX_HEIGHT - offset)
+    player.rect.topleft = (round(player.pos.x), round(player.pos.y))
+    player.vel = pygame.math.Vector2(0, 0); player.on_ground = False
+    landed = run_until_landed(game)
+    assert landed.bottom == platform.rect.top and landed.x == platform.rect.x
+
+def test_same_landing_at_every_rate(game):
+    """A jump straight up from the level start comes down at the same spot at every rate."""
+    landings = []
+    for rate in RATES:
+        start_level(game, rate); start = game.player.rect.copy()
+        game.input_source.bits = INPUT_JUMP; game.update(); game.input_source.bits = 0
+        assert not game.player.on_ground
+        landings.append((start.topleft, run_until_landed(game).topleft))
+    assert all(start == landed for start, landed in landings), landings
@@ -0,0 +1,101 @@
+# tracing.py
+# Leveled logging and low-overhead tracing. Spans and counters go to an in-memory ring buffer and can be
+# exported as Chrome trace-event JSON (open in https://ui.perfetto.dev or chrome://tracing).
+#   python main.py --trace session.json     # Trace a whole session; written on exit
+#   F9 in game                              # Start/stop tracing; stopping writes traces/trace_<time>.json
+import json
+import logging
+import threading
+import time
+from collections import deque
+from functools import wraps
+from settings import * # Import all settings
+
+# --- Logging ---
+class _PrintHandler(logging.Handler):
+    """Writes through print(), so whoever redirects stdout (tools, headless runs) also silences the game's log."""
+    def emit(self, record):
+        try: print(self.format(record))
+        except Exception: self.handleError(record)
+
+log = logging.getLogger('shadow')
+if not log.handlers:
+    _handler = _PrintHandler(); _handler.setFormatter(logging.Formatter('%(message)s'))
+    log.addHandler(_handler); log.propagate = False
+log.setLevel(LOG_LEVEL)
+
+def set_log_level(level):
+    """Level name ('DEBUG', 'INFO', 'WARNING', 'ERROR') or number. Per-tick messages are DEBUG."""
+    log.setLevel(level.upper() if isinstance(level, str) else level)
+
+# --- Tracing ---
+class _NullSpan:
+    __slots__ = ()
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'start')
+    def __init__(self, tracer, name): self.tracer = tracer; self.name = name
+    def __enter__(self): self.start = time.perf_counter_ns(); return self
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        self.tracer.events.append(('X', self.name, self.start, end - self.start, threading.get_ident()))
+        return False
+
+class Tracer:
+    def __init__(self, capacity=TRACE_BUFFER_EVENTS):
+        """
+        Ring buffer of the last `capacity` trace events. Disabled tracers hand out a shared no-op span,
+        so instrumented code costs one attribute check per span when nobody is tracing.
+        """
+        self.enabled = False
+        self.events = deque(maxlen=capacity) # ('X', name, start ns, duration ns, thread) or ('C', name, time ns, value, thread)
+
+    def span(self, name):
+        """Context manager timing a block as one complete event."""
+        return _Span(self, name) if self.enabled else _NULL_SPAN
+
+    def counter(self, name, value):
+        if self.enabled: self.events.append(('C', name, time.perf_counter_ns(), value, threading.get_ident()))
+
+    def start(self):
+        self.events.clear(); self.enabled = True
+
+    def stop(self):
+        self.enabled = False
+
+    def chrome_events(self):
+        """Buffered events in Chrome trace-event format (timestamps in microseconds)."""
+        pid = os.getpid(); threads = {}; out = []
+        for kind, name, at, value, thread in list(self.events):
+            tid = threads.setdefault(thread, len(threads) + 1)
+            if kind == 'X': out.append({'name': name, 'ph': 'X', 'ts': at / 1000, 'dur': value / 1000, 'pid': pid, 'tid': tid})
+            else: out.append({'name': name, 'ph': 'C', 'ts': at / 1000, 'pid': pid, 'tid': tid, 'args': {name: value}})
+        main = threading.main_thread().ident
+        for thread, tid in threads.items():
+            label = 'main' if thread == main else f'thread {tid}'
+            out.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': label}})
+        return out
+
+    def export_chrome(self, path):
+        """Writes the buffer as a Chrome trace JSON file. Returns the number of events written."""
+        events = self.chrome_events()
+        directory = os.path.dirname(path)
+        if directory: os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f: json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return len(events)
+
+TRACER = Tracer()
+
+def traced(name):
+    """Decorator: runs the function inside TRACER.span(name) while tracing is on."""
+    def decorate(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled: return function(*args, **kwargs)
+            with _Span(TRACER, name): return function(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -1,6 +1,12 @@
 # ui.py
+from collections import OrderedDict
 import pygame
 from settings import * # Import necessary settings
+from render import blit_counter
+
+TIMER_GLYPHS = "0123456789:-" # Everything format_time can produce
+BOOST_GLYPHS = "Boost: 0123456789." # HUD power-up countdown, e.g. "Boost: 1.5s"
+PROFILER_GLYPHS = "abcdefghijklmnopqrstuvwxyz0123456789. " # F3 overlay stats
 
 # --- Button Class (Using Images) ---
 class Button:
@@ -42,6 +48,7 @@ class Button:
         # Recalculate text rect center in case button image/rect changes (it shouldn't here, but safer)
         self.text_rect.center = self.rect.center
         screen.blit(self.text_surf, self.text_rect)
+        blit_counter.count += 2
 
     def check_hover(self, mouse_pos):
         # Update hover state based on collision with the button's rect
@@ -52,10 +59,82 @@ class Button:
         # Check for left mouse button down while hovered
         return event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.is_hovered
 
-# --- Text Drawing Helper (Unchanged) ---
+# --- Rendered Text Cache (LRU) ---
+class TextCache:
+    def __init__(self, max_entries=TEXT_CACHE_SIZE):
+        """
+        Keeps recently rendered text surfaces so labels that rarely change are rasterized once.
+        Args:
+            max_entries (int): Least recently used surfaces are dropped beyond this many.
+        """
+        self.max_entries = max_entries
+        self.entries = OrderedDict() # (text, font, color) -> Surface, oldest first
+
+    def render(self, text, font, color):
+        key = (text, font, color)
+        surf = self.entries.get(key)
+        if surf is not None:
+            self.entries.move_to_end(key)
+            return surf
+        surf = font.render(text, True, color)
+        self.entries[key] = surf
+        if len(self.entries) > self.max_entries: self.entries.popitem(last=False)
+        return surf
+
+    def clear(self):
+        self.entries.clear()
+
+text_cache = TextCache() # Shared by draw_text
+
+# --- Glyph Atlas (per-frame strings over a fixed alphabet) ---
+class GlyphAtlas:
+    def __init__(self, font, color, alphabet):
+        """
+        Pre-renders each character of a fixed alphabet once; strings are then assembled from glyph blits.
+        Args:
+            font (pygame.font.Font): Font to rasterize with.
+            color (tuple): RGB text color.
+            alphabet (str): Characters to pre-render. Others fall back to the text cache.
+        """
+        self.font = font
+        self.color = color
+        self.glyphs = {ch: font.render(ch, True, color) for ch in set(alphabet)}
+        self.height = font.get_height()
+        self.blit_list = [] # Reused between calls
+
+    def draw(self, text, surface, x, y, center=False):
+        """Draws text like draw_text and returns its rect."""
+        glyphs = self.glyphs
+        if any(ch not in glyphs for ch in text): # Outside the alphabet: render the whole string instead
+            return draw_text(text, self.font, self.color, surface, x, y, center)
+        width = 0
+        for ch in text: width += glyphs[ch].get_width()
+        textrect = pygame.Rect(0, 0, width, self.height)
+        if center: textrect.center = (x, y)
+        else: textrect.topleft = (x, y)
+        blit_list = self.blit_list; blit_list.clear()
+        pen_x = textrect.x
+        for ch in text:
+            glyph = glyphs[ch]
+            blit_list.append((glyph, (pen_x, textrect.y)))
+            pen_x += glyph.get_width()
+        surface.blits(blit_list, doreturn=False); blit_counter.count += len(blit_list)
+        return textrect
+
+_glyph_atlases = {}
+
+def get_glyph_atlas(font, color, alphabet=TIMER_GLYPHS):
+    """Shared GlyphAtlas for a (font, color, alphabet), built on first use."""
+    key = (font, color, alphabet)
+    atlas = _glyph_atlases.get(key)
+    if atlas is None: atlas = _glyph_atlases[key] = GlyphAtlas(font, color, alphabet)
+    return atlas
+
+# --- Text Drawing Helper ---
 def draw_text(text, font, color, surface, x, y, center=False):
-    textobj = font.render(text, True, color)
+    textobj = text_cache.render(text, font, color)
     textrect = textobj.get_rect()
     if center: textrect.center = (x, y)
     else: textrect.topleft = (x, y)
-    surface.blit(textobj, textrect)
\ No newline at end of file
+    surface.blit(textobj, textrect); blit_counter.count += 1
+    return textrect
\ No newline at end of file
@@ -0,0 +1,182 @@
+# world.py
+# Camera and chunk streaming for levels bigger than the screen.
+#   python world.py bench [--width 40000]   # Run right through a generated wide level, headless
+import argparse
+import pygame
+from settings import * # Import all settings
+from collision import SpatialHash
+from sprites import Platform, Collectible, draw_platform_tiles
+from render import blit_counter
+
+CHUNK_COLORKEY = (255, 0, 255) # Empty space in chunk surfaces
+
+# --- Camera ---
+class Camera:
+    def __init__(self, world_width=SCREEN_WIDTH, world_height=SCREEN_HEIGHT):
+        """Screen-sized view into the world, kept centred on a point and clamped to the world's edges."""
+        self.world_width = max(world_width, SCREEN_WIDTH); self.world_height = max(world_height, SCREEN_HEIGHT)
+        self.rect = pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+
+    @property
+    def scrolls(self):
+        return self.world_width > SCREEN_WIDTH or self.world_height > SCREEN_HEIGHT
+
+    def follow(self, x, y):
+        """Centres the view on world point (x, y). Returns the new top-left (the drawing offset)."""
+        self.rect.x = min(max(int(x) - SCREEN_WIDTH // 2, 0), self.world_width - SCREEN_WIDTH)
+        self.rect.y = min(max(int(y) - SCREEN_HEIGHT // 2, 0), self.world_height - SCREEN_HEIGHT)
+        return self.rect.topleft
+
+# --- Chunks ---
+class Chunk:
+    __slots__ = ('rect', 'first_coin', 'coin_count', 'first_ref', 'ref_count', 'collectibles', 'surface')
+
+    def __init__(self, rect, first_coin, coin_count, first_ref, ref_count):
+        self.rect = rect
+        self.first_coin = first_coin; self.coin_count = coin_count # Coins whose centre is inside the chunk
+        self.first_ref = first_ref; self.ref_count = ref_count # Platforms overlapping it (in the level's ref list)
+        self.collectibles = None # Coin index -> Collectible, only while loaded
+        self.surface = None # Pre-tiled platforms, only while loaded
+
+class StreamedWorld:
+    def __init__(self, game, level):
+        """
+        Streams a compiled level (levelpack.PackedLevel) in fixed-size chunks. Only chunks within
+        WORLD_STREAM_MARGIN chunks of the camera have sprites, entries in the game's groups and collision
+        grid, and a rendered surface. Memory and per-frame work depend on the view, not the level size.
+        """
+        self.game = game
+        self.level = level
+        self.chunk_size = level.chunk_size
+        self.width, self.height = level.world_size
+        size = self.chunk_size
+        self.chunks = {key: Chunk(pygame.Rect(key[0] * size, key[1] * size, size, size), *ranges)
+                       for key, ranges in level.chunks().items()} # Only chunks with content
+        self.grid = SpatialHash()
+        self.loaded = {} # (chunk_x, chunk_y) -> Chunk
+        self.platforms = {} # Platform index -> [Platform, number of loaded chunks it belongs to]
+        self.collected = set() # Indices of coins taken this attempt (whether or not their chunk is loaded)
+        self.span = None # Chunk range currently loaded
+
+    def chunk_span(self, rect):
+        size = self.chunk_size
+        return (rect.left // size, (max(rect.right, rect.left + 1) - 1) // size,
+                rect.top // size, (max(rect.bottom, rect.top + 1) - 1) // size)
+
+    def reset(self):
+        """Unloads everything and forgets collected coins (fresh attempt; the template is reused)."""
+        for key in list(self.loaded): self.unload(key)
+        self.grid.clear(); self.collected.clear(); self.span = None
+
+    def stream(self, view_rect):
+        """Loads chunks near view_rect and evicts the rest. Cheap when the view stays in the same chunks."""
+        x0, x1, y0, y1 = self.chunk_span(view_rect)
+        margin = WORLD_STREAM_MARGIN
+        span = (x0 - margin, x1 + margin, y0 - margin, y1 + margin)
+        if span == self.span: return
+        self.span = span
+        wanted = [(cx, cy) for cx in range(span[0], span[1] + 1) for cy in range(span[2], span[3] + 1)
+                  if (cx, cy) in self.chunks]
+        wanted_set = set(wanted)
+        for key in [key for key in self.loaded if key not in wanted_set]: self.unload(key)
+        for key in wanted:
+            if key not in self.loaded: self.load(key)
+
+    def load(self, key):
+        chunk = self.loaded[key] = self.chunks[key]
+        game = self.game; level = self.level
+        refs = level.refs[chunk.first_ref:chunk.first_ref + chunk.ref_count].tolist()
+        for index in refs:
+            entry = self.platforms.get(index)
+            if entry is None: # First loaded chunk touching this platform
+                platform = Platform(game, *level.platform(index))
+                self.grid.insert(platform, index); game.platforms.add(platform)
+                entry = self.platforms[index] = [platform, 0]
+            entry[1] += 1
+        chunk.collectibles = {}
+        for index in range(chunk.first_coin, chunk.first_coin + chunk.coin_count):
+            coin = chunk.collectibles[index] = Collectible(game.collectible_frames, *level.collectible(index),
+                                                           clock=game.coin_clock)
+            coin.world_index = index
+            if index not in self.collected: game.collectibles.add(coin); game.all_sprites.add(coin)
+        if refs:
+            # Tiles are opaque, so a colorkeyed (RLE) surface blits much faster than per-pixel alpha
+            chunk.surface = pygame.Surface(chunk.rect.size).convert(); chunk.surface.fill(CHUNK_COLORKEY)
+            for index in refs:
+                draw_platform_tiles(chunk.surface, game, self.platforms[index][0].rect, chunk.rect.topleft)
+            chunk.surface.set_colorkey(CHUNK_COLORKEY, pygame.RLEACCEL)
+
+    def unload(self, key):
+        chunk = self.loaded.pop(key)
+        game = self.game
+        for index in self.level.refs[chunk.first_ref:chunk.first_ref + chunk.ref_count].tolist():
+            entry = self.platforms[index]
+            entry[1] -= 1
+            if entry[1] == 0: # No loaded chunk needs it any more
+                del self.platforms[index]; self.grid.remove(entry[0]); game.platforms.remove(entry[0])
+        for coin in chunk.collectibles.values(): coin.kill()
+        chunk.collectibles = None; chunk.surface = None
+
+    def collect(self, coins):
+        self.collected.update(coin.world_index for coin in coins)
+
+    def restore(self, collected):
+        """Returns to a snapshot's set of collected coin indices, fixing up the coins of loaded chunks."""
+        self.collected = set(collected)
+        game = self.game
+        for chunk in self.loaded.values():
+            for index, coin in chunk.collectibles.items():
+                if index in self.collected: coin.kill()
+                elif not coin.alive(): game.collectibles.add(coin); game.all_sprites.add(coin)
+
+    def draw(self, surface, offset):
+        """Blits the loaded chunks that intersect the view."""
+        ox, oy = offset
+        view = pygame.Rect(ox, oy, SCREEN_WIDTH, SCREEN_HEIGHT)
+        draw_list = [(chunk.surface, (chunk.rect.x - ox, chunk.rect.y - oy)) for chunk in self.loaded.values()
+                     if chunk.surface is not None and chunk.rect.colliderect(view)]
+        surface.blits(draw_list, doreturn=False); blit_counter.count += len(draw_list)
+
+
+def generate_wide_level(width, height=SCREEN_HEIGHT):
+    """Level data for a long run to the right: steps of platforms with coins above them."""
+    platforms = [(0, height - 40, width, 40)]
+    collectibles = []
+    for x in range(400, width - 400, 300):
+        step_y = height - 140 - (x // 300 % 4) * 60
+        platforms.append((x, step_y, 160, 20))
+        collectibles.append((x + 80, step_y - 40))
+    return {'platforms': platforms, 'collectibles': collectibles, 'goal': (width - 120, height - 40 - 70, 50, 70),
+            'player_start': (60, height - 200), 'world_size': (width, height)}
+
+
+if __name__ == '__main__':
+    import contextlib
+    import time
+    parser = argparse.ArgumentParser(description="Streaming benchmark on a generated wide level.")
+    parser.add_argument('command', choices=('bench',))
+    parser.add_argument('--width', type=int, default=40000)
+    args = parser.parse_args()
+    import Game
+    from inputs import ScriptedInput
+    from levelpack import LevelPack, compile_levels
+    with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null):
+        game = Game.Game(headless=True, input_source=ScriptedInput([(INPUT_RIGHT, 30), (INPUT_RIGHT | INPUT_JUMP, 1)]))
+        game.level_pack = LevelPack(compile_levels([generate_wide_level(args.width)])) # Only level for this run
+        start = time.perf_counter()
+        game.load_level(0)
+        load_time = time.perf_counter() - start
+        game.game_state = STATE_PLAYING; game.timer_active = True
+        frame_times = []; max_loaded = 0
+        while game.game_state == STATE_PLAYING and len(frame_times) < 60 * 600:
+            start = time.perf_counter()
+            game.update(); game.draw()
+            frame_times.append(time.perf_counter() - start)
+            max_loaded = max(max_loaded, len(game.world.loaded))
+    frame_times.sort()
+    print(f"{args.width}px level: {len(game.world.chunks)} chunks, loaded in {load_time * 1000:.1f} ms")
+    print(f"{len(frame_times)} frames, reached x={game.player.rect.x}, state {game.game_state}; "
+          f"at most {max_loaded} chunks loaded")
+    print(f"update+draw p50 {frame_times[len(frame_times) // 2] * 1e6:.0f} us, "
+          f"p99 {frame_times[len(frame_times) * 99 // 100] * 1e6:.0f} us, max {frame_times[-1] * 1e6:.0f} us")
+    pygame.quit()